@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.database import get_db
 from app.schemas.document_schemas import Document, DocumentCreate, ProcessingStatus
 from app.services.document_service import DocumentService
+from app.services.upload_storage import validate_upload_filename
 
 router = APIRouter()
 
@@ -11,21 +12,21 @@ router = APIRouter()
 async def upload_document(
     project_id: int,
     file: UploadFile = File(...),
+    analysis_profile: Optional[str] = Form(None),
+    previous_document_id: Optional[int] = Form(None),
     background_tasks: BackgroundTasks = None,
     db: Session = Depends(get_db)
 ):
     service = DocumentService(db)
+    service.validate_profile(analysis_profile)
+    # Rejects unsupported file types before anything is stored
+    validate_upload_filename(file.filename)
     
-    # Validate file type
-    allowed_types = ['.pdf', '.docx', '.txt']
-    if not any(file.filename.endswith(ext) for ext in allowed_types):
-        raise HTTPException(status_code=400, detail="File type not supported")
-    
-    document = await service.upload_document(project_id, file)
+    document = await service.upload_document(project_id, file, previous_document_id)
     requirements = await service.get_document_requirements(document.id)
     # Process document in background
     if background_tasks:
-        background_tasks.add_task(service.process_document, document.id)
+        background_tasks.add_task(service.process_document, document.id, analysis_profile)
         background_tasks.add_task(service.enhance_requirements, document.id)
     
     return document
@@ -1,20 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.database import get_db
 from app.services.test_service import TestService
 
 router = APIRouter()
 
 @router.post("/documents/{document_id}/generate-tests")
-async def generate_test_cases(document_id: int, db: Session = Depends(get_db)):
+async def generate_test_cases(
+    document_id: int,
+    force_refresh: bool = False,
+    refresh_requirement_ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db)
+):
     service = TestService(db)
     try:
-        test_suite = await service.generate_test_cases(document_id)
+        test_suite = await service.generate_test_cases(document_id, force_refresh, refresh_requirement_ids)
         return test_suite
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/documents/{document_id}/generate-tests/stream")
+async def stream_test_cases(
+    document_id: int,
+    force_refresh: bool = False,
+    refresh_requirement_ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Server-sent events: each test case is sent as soon as it is generated and saved"""
+    service = TestService(db)
+    try:
+        events = await service.stream_test_cases(document_id, force_refresh, refresh_requirement_ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def event_stream():
+        try:
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/projects/{project_id}/test-suite")
 async def get_project_test_suite(project_id: int, db: Session = Depends(get_db)):
     service = TestService(db)
@@ -29,9 +29,42 @@ class Settings(BaseSettings):
     API_KEY: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
     HUGGINGFACE_API_KEY: Optional[str] = None
+    SPACY_MODEL: str = "en_core_web_sm"
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # torch, onnx or onnx-int8 (ONNX Runtime, no torch at inference)
+    ONNX_MODEL_DIR: str = "./onnx_models"  # Exported/quantized ONNX models are written here once
+    EMBEDDING_MAX_TOKENS_PER_BATCH: int = 8192  # Padded tokens per length-bucketed batch
+    EMBEDDING_MAX_BATCH_SIZE: int = 128
+    PRELOAD_MODELS: bool = False  # Load NLP models at startup instead of on first upload
+    NLP_BATCH_SIZE: int = 64
+    NLP_N_PROCESS: int = 1
+    ANALYSIS_PROFILE: str = "full"  # full, fast (no NER) or minimal (no NER, no parser); projects can override
+    DEDUP_THRESHOLD: float = 0.85
+    DEDUP_BLOCK_SIZE: int = 1024
+    REQUIREMENT_CHUNK_SIZE: int = 256  # Requirements analyzed and committed per chunk
+    ANALYSIS_WORKERS: int = 1  # >1 enables process-pool sharded analysis for large documents
+    SHARDED_ANALYSIS_MIN_CHARS: int = 500_000
+    ANALYSIS_SHARD_CHARS: int = 100_000
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000
+    EMBEDDING_CACHE_DTYPE: str = "float32"  # or float16 to halve the store size
+    EXTRACTION_EXECUTOR: str = "process"  # process or thread pool for PDF/DOCX text extraction
+    EXTRACTION_WORKERS: int = 4
+    EXTRACTION_QUEUE_SIZE: int = 16  # Extractions waiting for a worker before callers queue on the loop
+    PDF_BACKEND: str = "auto"  # pdfium (fast), pdfplumber (layout) or auto (pdfium, pdfplumber for bad pages)
+    TEST_GENERATION_BATCH_TOKENS: int = 12000  # Estimated prompt + output tokens per test generation request
+    TEST_GENERATION_MAX_BATCH_SIZE: int = 20  # Requirements per test generation request
+    TEST_GENERATION_CONCURRENCY: int = 4  # Test generation requests in flight per suite
+    LLM_CONCURRENCY: int = 4  # Requests in flight per LLM provider across the process
+    LLM_TIMEOUT_SECONDS: float = 120.0
+    LLM_CACHE_ENABLED: bool = True  # Serve repeated prompts (same provider, model and config) from disk
+    LLM_CACHE_PATH: str = "./llm_cache/responses.sqlite3"
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
     
     # File Upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Uploads are copied to disk in chunks of this size
     UPLOAD_DIR: str = "uploads"
     
     # Redis (for Celery)
@@ -4,6 +4,15 @@ from app.core.config import settings
 from app.models.database import create_tables, get_db
 from app.api.endpoints import projects, documents, test_cases, auth
 from app.api.endpoints import analytics, upload, templates, settings as settings_router
+from ml.pipelines.model_registry import get_model_registry
+from ml.pipelines.embedding_cache import configure_embedding_cache, get_embedding_cache
+from ml.pipelines.embedding_backends import configure_embedding_backends
+from ml.pipelines.sharded_analyzer import shutdown_shard_pools
+from ml.pipelines.extraction_pool import configure_extraction_pool, get_extraction_pool, shutdown_extraction_pool
+from ml.pipelines.llm_providers import configure_llm_providers, llm_provider_stats, close_llm_providers
+from ml.pipelines.llm_cache import configure_llm_cache, get_llm_cache
+from app.services.document_service import document_cache_stats
+from app.services.upload_storage import blob_stats
 from contextlib import asynccontextmanager
 import uvicorn
 
@@ -11,9 +20,44 @@ import uvicorn
 async def lifespan(app: FastAPI):
     # Startup: Create tables and directories
     create_tables()
+    configure_embedding_cache(
+        settings.EMBEDDING_CACHE_PATH,
+        settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        settings.EMBEDDING_CACHE_DTYPE
+    )
+    configure_embedding_backends(
+        settings.EMBEDDING_BACKEND,
+        settings.ONNX_MODEL_DIR,
+        settings.EMBEDDING_MAX_TOKENS_PER_BATCH,
+        settings.EMBEDDING_MAX_BATCH_SIZE
+    )
+    configure_extraction_pool(
+        settings.EXTRACTION_WORKERS,
+        settings.EXTRACTION_QUEUE_SIZE,
+        settings.EXTRACTION_EXECUTOR
+    )
+    configure_llm_providers(
+        settings.GEMINI_API_KEY,
+        settings.API_KEY,
+        settings.LLM_CONCURRENCY,
+        settings.LLM_TIMEOUT_SECONDS
+    )
+    configure_llm_cache(
+        settings.LLM_CACHE_PATH,
+        settings.LLM_CACHE_MAX_BYTES,
+        settings.LLM_CACHE_TTL_SECONDS,
+        settings.LLM_CACHE_ENABLED
+    )
+    if settings.PRELOAD_MODELS:
+        registry = get_model_registry()
+        registry.get_spacy(settings.SPACY_MODEL)
+        registry.get_embedding_backend(settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND, settings.ONNX_MODEL_DIR)
     print(f"🚀 {settings.PROJECT_NAME} API starting up...")
     yield
     # Shutdown
+    shutdown_shard_pools()
+    shutdown_extraction_pool()
+    await close_llm_providers()
     print("🔴 API shutting down...")
 
 app = FastAPI(
@@ -61,6 +105,22 @@ async def health_check():
         "version": settings.VERSION
     }
 
+@app.get("/health/pipeline")
+async def pipeline_health():
+    """Load time and memory footprint of the shared ML models, plus cache and pool statistics"""
+    registry = get_model_registry()
+    llm_cache = get_llm_cache()
+    return {
+        "models": registry.stats(),
+        "embedding_cache": get_embedding_cache().stats(),
+        "embedding_encoders": registry.encoder_stats(),
+        "extraction_pool": get_extraction_pool().stats(),
+        "upload_blobs": blob_stats(),
+        "document_cache": document_cache_stats(),
+        "llm_providers": llm_provider_stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean, inspect, text
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
@@ -36,6 +36,7 @@ class Project(Base):
     name = Column(String(255), index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     description = Column(Text)
+    analysis_profile = Column(String(20), nullable=True)  # Overrides settings.ANALYSIS_PROFILE
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # FIX: Never null
     
@@ -64,9 +65,14 @@ class Document(Base):
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     processed_text = Column(Text)
     meta_data = Column(JSON)
+    document_index = Column(JSON)  # Persisted DocumentIndex of the preprocessed text
+    content_hash = Column(String(64), index=True, nullable=True)  # sha256 of the uploaded file
+    parent_document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)  # Previous revision
+    revision = Column(Integer, default=1, nullable=True)
     
     # Relationships
     project = relationship("Project", back_populates="documents")
+    parent_document = relationship("Document", remote_side=[id])
     requirements = relationship("Requirement", back_populates="document", cascade="all, delete-orphan")
     test_suites = relationship("TestSuite", back_populates="document")
 
@@ -79,6 +85,10 @@ class Requirement(Base):
     requirement_type = Column(String(50))
     complexity_score = Column(Integer)
     analysis_result = Column(JSON)
+    fingerprint = Column(String(64), index=True, nullable=True)  # Content hash of the requirement block
+    reused_from_id = Column(Integer, ForeignKey("requirements.id"), nullable=True)  # Cloned from a previous revision
+    page = Column(Integer, nullable=True)  # 1-based source page (paginated formats only)
+    enhanced = Column(Boolean, default=False, nullable=True)  # analysis_result holds the AI enhancement
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
@@ -119,6 +129,19 @@ class TestSuite(Base):
     document = relationship("Document", back_populates="test_suites")
     test_cases = relationship("TestCase", back_populates="test_suite", cascade="all, delete-orphan")
 
+# AI-generated test cases memoized by requirement content, reused on regeneration
+class RequirementTestCases(Base):
+    __tablename__ = "requirement_test_cases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), index=True, nullable=False)  # Fingerprint of requirement text and type
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    test_cases = Column(JSON, nullable=False)  # Test case dicts without id/requirement_id
+    test_scenarios = Column(JSON, nullable=True)  # Scenarios starting with one of its cases; cases as [content_hash, index]
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 class Template(Base):
     __tablename__ = "templates"
 
@@ -171,8 +194,27 @@ def get_db():
         db.close()
 
 # Create tables function
+def _add_missing_columns():
+    """create_all never alters existing tables, so add new nullable columns by hand"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                for index in table.indexes:
+                    if column.name in index.columns:
+                        index.create(connection, checkfirst=True)
+                print(f"✅ Added column {table.name}.{column.name}")
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
     print("✅ Database tables created successfully!")
     
     # Create uploads directory if it doesn't exist
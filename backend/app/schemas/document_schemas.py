@@ -18,6 +18,8 @@ class Document(DocumentBase):
     uploaded_at: datetime
     processed_text: Optional[str] = None
     meta_data: Optional[Dict[str, Any]] = None
+    parent_document_id: Optional[int] = None
+    revision: Optional[int] = None
     
     class Config:
         from_attributes = True
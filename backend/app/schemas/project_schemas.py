@@ -1,10 +1,11 @@
 from pydantic import BaseModel, validator
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Literal
 
 class ProjectBase(BaseModel):
     name: str
     description: Optional[str] = None
+    analysis_profile: Optional[Literal['full', 'fast', 'minimal']] = None
 
 class ProjectCreate(ProjectBase):
     pass
@@ -1,48 +1,77 @@
 import os
-import uuid
+import time
+import asyncio
+import threading
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from fastapi import UploadFile, HTTPException
 from app.models.database import Document as DocumentModel, Project, Requirement
+from app.core.config import settings
+from app.services.upload_storage import save_upload
 from ml.pipelines.document_processor import AdvancedDocumentProcessor
-from ml.pipelines.requirement_analyzer import SemanticRequirementAnalyzer
-import aiofiles
+from ml.pipelines.requirement_analyzer import SemanticRequirementAnalyzer, ANALYSIS_PROFILES
+from ml.pipelines.sharded_analyzer import ShardedRequirementAnalyzer
+from ml.pipelines.document_index import DocumentIndex
+from ml.pipelines.revision_diff import paragraph_fingerprints, diff_paragraphs, diff_requirements
 import logging
 from datetime import datetime
 from ml.pipelines.ai_requirement_enhancer import AIRequirementEnhancer
 
 logger = logging.getLogger(__name__)
 
+# Documents processed by cloning an identical, already processed upload
+_document_cache_stats = {'hits': 0, 'misses': 0, 'cloned_requirements': 0, 'clone_seconds': 0.0}
+_document_cache_lock = threading.Lock()
+
+
+def document_cache_stats() -> Dict[str, Any]:
+    with _document_cache_lock:
+        stats = dict(_document_cache_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    stats['clone_seconds'] = round(stats['clone_seconds'], 4)
+    return stats
+
+# meta_data keys describing an analysis run rather than the extracted text
+_ANALYSIS_META_KEYS = ('analysis_profile', 'requirement_fingerprints', 'revision_diff', 'duplicate_of')
+
 class DocumentService:
     def __init__(self, db: Session):
         self.db = db
-        self.upload_dir = "uploads"
+        self.upload_dir = settings.UPLOAD_DIR
         os.makedirs(self.upload_dir, exist_ok=True)
 
-    async def upload_document(self, project_id: int, file: UploadFile) -> DocumentModel:
+    async def upload_document(self, project_id: int, file: UploadFile,
+                              previous_document_id: Optional[int] = None) -> DocumentModel:
         # Verify project exists
         project = self.db.query(Project).filter(Project.id == project_id).first()
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        # Generate unique filename
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(self.upload_dir, unique_filename)
+        # A new revision of an existing document is analyzed incrementally
+        parent = None
+        if previous_document_id is not None:
+            parent = self.db.query(DocumentModel).filter(
+                DocumentModel.id == previous_document_id,
+                DocumentModel.project_id == project_id
+            ).first()
+            if not parent:
+                raise HTTPException(status_code=404, detail="Previous document revision not found in this project")
 
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
+        # Stream the file to disk under a unique name (type and size are checked here)
+        stored = await save_upload(file, self.upload_dir)
 
         # Create document record
         db_document = DocumentModel(
             project_id=project_id,
-            filename=file.filename,
-            file_path=file_path,
-            file_size=len(content),
-            file_type=file_extension,
-            status="uploaded"
+            filename=stored.filename,
+            file_path=stored.file_path,
+            file_size=stored.size,
+            file_type=stored.file_type,
+            content_hash=stored.sha256,
+            status="uploaded",
+            parent_document_id=parent.id if parent else None,
+            revision=(parent.revision or 1) + 1 if parent else 1
         )
         
         self.db.add(db_document)
@@ -51,55 +80,297 @@ class DocumentService:
         
         return db_document
 
-    async def process_document(self, document_id: int):
+    async def process_document(self, document_id: int, profile: Optional[str] = None):
         document = self.db.query(DocumentModel).filter(DocumentModel.id == document_id).first()
         if not document:
             return
+        profile = self._resolve_profile(document, profile)
+
+        # A re-run replaces the rows of an earlier (possibly interrupted) run
+        self._delete_requirements(document)
+
+        # Identical content analyzed the same way already: clone instead of recomputing
+        source = self._processed_duplicate(document, profile)
+        if source is not None:
+            self._clone_processed_document(source, document, profile)
+            return
+        if document.content_hash:
+            with _document_cache_lock:
+                _document_cache_stats['misses'] += 1
 
         try:
             # Update status to processing
             document.status = "processing"
             self.db.commit()
 
-            # Process document
-            processor = AdvancedDocumentProcessor()
-            processed_data = await processor.process_document(document.file_path)
-            print(f"Processed data: {processed_data}")
+            # Re-analysis reuses the stored text and index; otherwise process the file
+            processed_data = self._stored_extraction(document)
+            if processed_data is None:
+                processor = AdvancedDocumentProcessor(pdf_backend=settings.PDF_BACKEND)
+                processed_data = await processor.process_document(document.file_path)
 
             if not processed_data['success']:
                 document.status = "failed"
                 self.db.commit()
                 return
-            # Analyze requirements
-            semantic_analyzer = SemanticRequirementAnalyzer()
+            # Analyze requirements; building the analyzer loads (or exports) models,
+            # so it runs in the default executor like the analysis itself
+            loop = asyncio.get_running_loop()
+            semantic_analyzer = await loop.run_in_executor(None, self._create_analyzer, processed_data['raw_text'])
 
-            # Extract and analyze requirements with BERT/spaCy
-            raw_requirements = semantic_analyzer.extract_requirements(processed_data["raw_text"])
-            analyzed_requirements = raw_requirements  
+            document.processed_text = processed_data['raw_text']
+            document.meta_data = processed_data['metadata']
+            document.document_index = processed_data['index'].to_dict()
+            self.db.commit()
 
-            # Save requirements to database
-            for req_data in analyzed_requirements:
-                requirement = Requirement(
-                    document_id=document_id,
-                    original_text=req_data['original_text'],
-                    requirement_type=req_data['type'],
-                    complexity_score=req_data['complexity'],
-                    analysis_result=req_data
-                )
-                self.db.add(requirement)
+            # Requirements of the previous revision that can be reused as-is
+            parent = document.parent_document
+            reusable_rows = self._reusable_requirements(parent, profile)
+
+            # Extract and analyze requirements with BERT/spaCy, persisting
+            # each chunk as soon as it is analyzed
+            saved_count = 0
+            fingerprints = []
+            chunks = semantic_analyzer.iter_requirements(
+                processed_data["raw_text"],
+                brd_name=document.filename,
+                chunk_size=settings.REQUIREMENT_CHUNK_SIZE,
+                profile=profile,
+                reuse={fp: row.analysis_result or {} for fp, row in reusable_rows.items()},
+                index=processed_data['index'],
+                page_offsets=processed_data['metadata'].get('page_offsets')
+            )
+            # Analysis blocks, so each chunk is computed in the default executor
+            # and the event loop keeps serving requests meanwhile. The await is
+            # shielded so a cancellation leaves the running chunk awaitable below
+            pending = None
+            try:
+                while True:
+                    pending = loop.run_in_executor(None, next, chunks, None)
+                    chunk = await asyncio.shield(pending)
+                    if chunk is None:
+                        break
+                    self._save_requirements(document_id, chunk, reusable_rows)
+                    self.db.commit()
+                    saved_count += len(chunk)
+                    fingerprints.extend([req['id'], req['fingerprint']] for req in chunk)
+                    logger.info(f"Document {document_id}: {saved_count} requirements saved")
+            finally:
+                if pending is not None and not pending.done():
+                    # Cancelled mid-chunk: the generator cannot be closed while it runs
+                    await asyncio.wait([pending])
+                chunks.close()
+
+            meta_data = dict(document.meta_data or {})
+            meta_data['analysis_profile'] = profile
+            meta_data['requirement_fingerprints'] = fingerprints
+            if parent:
+                meta_data['revision_diff'] = self._revision_diff(parent, document.processed_text, fingerprints, reusable_rows)
 
             # Update document status
+            document.meta_data = meta_data
             document.status = "processed"
-            document.processed_text = processed_data['raw_text']
-            document.meta_data = processed_data['metadata']
-            
             self.db.commit()
 
         except Exception as e:
+            self.db.rollback()
+            # Chunks were committed as they were analyzed; drop the partial result
+            self._delete_requirements(document)
             document.status = "failed"
             self.db.commit()
             raise e
+
+    def _stored_extraction(self, document: DocumentModel) -> Optional[Dict[str, Any]]:
+        """
+        Processor output of an earlier run (text, metadata and structural
+        index), or None if the document was never extracted, its index was
+        written by another index version, or the PDF backend changed
+        """
+        index = DocumentIndex.from_dict(document.document_index)
+        if document.processed_text is None or index is None:
+            return None
+        meta_data = {key: value for key, value in (document.meta_data or {}).items()
+                     if key not in _ANALYSIS_META_KEYS}
+        if document.file_type == '.pdf' and meta_data.get('pdf_backend') != settings.PDF_BACKEND:
+            return None
+        return {'success': True, 'raw_text': document.processed_text, 'metadata': meta_data, 'index': index}
+
+    def _delete_requirements(self, document: DocumentModel):
+        """Delete the requirement rows (and their test cases) stored for a document"""
+        for row in self.db.query(Requirement).filter(Requirement.document_id == document.id).all():
+            self.db.delete(row)
         
+    def _processed_duplicate(self, document: DocumentModel, profile: str) -> Optional[DocumentModel]:
+        """Latest processed document with the same content, profile and PDF backend, if any"""
+        if not document.content_hash:
+            return None
+        candidates = self.db.query(DocumentModel).filter(
+            DocumentModel.content_hash == document.content_hash,
+            DocumentModel.file_type == document.file_type,
+            DocumentModel.id != document.id,
+            DocumentModel.status.in_(("processed", "enhanced"))
+        ).order_by(DocumentModel.id.desc())
+        for candidate in candidates:
+            meta_data = candidate.meta_data or {}
+            if meta_data.get('analysis_profile') != profile:
+                continue
+            if document.file_type == '.pdf' and meta_data.get('pdf_backend') != settings.PDF_BACKEND:
+                continue
+            return candidate
+        return None
+
+    def _clone_processed_document(self, source: DocumentModel, document: DocumentModel, profile: str):
+        """Copy the extraction output and requirement rows of an identical document"""
+        started = time.perf_counter()
+        rows = self.db.query(Requirement).filter(Requirement.document_id == source.id).order_by(Requirement.id).all()
+        self.db.add_all([
+            Requirement(
+                document_id=document.id,
+                original_text=row.original_text,
+                requirement_type=row.requirement_type,
+                complexity_score=row.complexity_score,
+                analysis_result=row.analysis_result,
+                fingerprint=row.fingerprint,
+                page=row.page,
+                reused_from_id=row.id,
+                enhanced=row.enhanced
+            )
+            for row in rows
+        ])
+
+        meta_data = dict(source.meta_data or {})
+        meta_data.pop('revision_diff', None)
+        meta_data['file_path'] = document.file_path
+        meta_data['duplicate_of'] = source.id
+        parent = document.parent_document
+        if parent:
+            reusable_rows = self._reusable_requirements(parent, profile)
+            meta_data['revision_diff'] = self._revision_diff(
+                parent, source.processed_text, meta_data.get('requirement_fingerprints', []), reusable_rows
+            )
+
+        document.processed_text = source.processed_text
+        document.document_index = source.document_index
+        document.meta_data = meta_data
+        document.status = "processed"
+        self.db.commit()
+
+        elapsed = time.perf_counter() - started
+        with _document_cache_lock:
+            _document_cache_stats['hits'] += 1
+            _document_cache_stats['cloned_requirements'] += len(rows)
+            _document_cache_stats['clone_seconds'] += elapsed
+        logger.info(f"Document {document.id}: cloned {len(rows)} requirements from identical document {source.id}")
+
+    @staticmethod
+    def validate_profile(profile: Optional[str]):
+        if profile is not None and profile not in ANALYSIS_PROFILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown analysis profile '{profile}', expected one of {list(ANALYSIS_PROFILES)}"
+            )
+        return profile
+
+    def _resolve_profile(self, document: DocumentModel, profile: Optional[str]) -> str:
+        """Per-call profile, else the project's, else the configured default"""
+        project = document.project
+        return (
+            profile
+            or (project.analysis_profile if project else None)
+            or settings.ANALYSIS_PROFILE
+        )
+
+    def _create_analyzer(self, text: str):
+        """Pick the in-process analyzer or, for very large documents, the sharded one"""
+        analyzer_kwargs = dict(
+            model_name=settings.EMBEDDING_MODEL,
+            spacy_model=settings.SPACY_MODEL,
+            batch_size=settings.NLP_BATCH_SIZE,
+            n_process=settings.NLP_N_PROCESS,
+            dedup_threshold=settings.DEDUP_THRESHOLD,
+            dedup_block_size=settings.DEDUP_BLOCK_SIZE,
+            embedding_backend=settings.EMBEDDING_BACKEND,
+            onnx_model_dir=settings.ONNX_MODEL_DIR
+        )
+        if settings.ANALYSIS_WORKERS > 1 and len(text) >= settings.SHARDED_ANALYSIS_MIN_CHARS:
+            return ShardedRequirementAnalyzer(
+                workers=settings.ANALYSIS_WORKERS,
+                shard_chars=settings.ANALYSIS_SHARD_CHARS,
+                embedding_cache=dict(
+                    path=settings.EMBEDDING_CACHE_PATH,
+                    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                    dtype=settings.EMBEDDING_CACHE_DTYPE
+                ),
+                embedding_backends=dict(
+                    backend=settings.EMBEDDING_BACKEND,
+                    onnx_model_dir=settings.ONNX_MODEL_DIR,
+                    max_tokens_per_batch=settings.EMBEDDING_MAX_TOKENS_PER_BATCH,
+                    max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE
+                ),
+                **analyzer_kwargs
+            )
+        return SemanticRequirementAnalyzer(**analyzer_kwargs)
+
+    def _save_requirements(self, document_id: int, analyzed_requirements: List[Dict],
+                           reusable_rows: Optional[Dict[str, Requirement]] = None):
+        reusable_rows = reusable_rows or {}
+        for req_data in analyzed_requirements:
+            source = reusable_rows.get(req_data['fingerprint'])
+            if source is not None and source.enhanced:
+                # The previous row was enhanced; keep its enhanced fields
+                requirement = Requirement(
+                    document_id=document_id,
+                    original_text=source.original_text,
+                    requirement_type=source.requirement_type,
+                    complexity_score=source.complexity_score,
+                    analysis_result=source.analysis_result,
+                    fingerprint=req_data['fingerprint'],
+                    reused_from_id=source.id,
+                    page=req_data.get('page'),
+                    enhanced=True
+                )
+            else:
+                requirement = Requirement(
+                    document_id=document_id,
+                    original_text=req_data['original_text'],
+                    requirement_type=req_data['type'],
+                    complexity_score=req_data['complexity'],
+                    analysis_result=req_data,
+                    fingerprint=req_data['fingerprint'],
+                    reused_from_id=source.id if source is not None else None,
+                    page=req_data.get('page')
+                )
+            self.db.add(requirement)
+
+    def _reusable_requirements(self, parent: Optional[DocumentModel], profile: str) -> Dict[str, Requirement]:
+        """Requirement rows of the previous revision by fingerprint, if they were analyzed the same way"""
+        if parent is None or parent.status not in ("processed", "enhanced"):
+            return {}
+        if (parent.meta_data or {}).get('analysis_profile') != profile:
+            logger.info(f"Document {parent.id} was analyzed with another profile, re-analyzing everything")
+            return {}
+        return {
+            row.fingerprint: row
+            for row in self.db.query(Requirement).filter(Requirement.document_id == parent.id)
+            if row.fingerprint
+        }
+
+    def _revision_diff(self, parent: DocumentModel, text: str, fingerprints: List[List[str]],
+                       reusable_rows: Dict[str, Requirement]) -> Dict[str, Any]:
+        """Paragraph and requirement level changes against the previous revision"""
+        previous = (parent.meta_data or {}).get('requirement_fingerprints', [])
+        requirements = diff_requirements(map(tuple, previous), map(tuple, fingerprints))
+        return {
+            'parent_document_id': parent.id,
+            'paragraphs': diff_paragraphs(
+                paragraph_fingerprints(parent.processed_text or ""),
+                paragraph_fingerprints(text or "")
+            ),
+            'requirements': requirements,
+            'reused': sum(1 for _, fp in fingerprints if fp in reusable_rows),
+            'reanalyzed': sum(1 for _, fp in fingerprints if fp not in reusable_rows)
+        }
+
     async def enhance_requirements(self, document_id: int):
         """Enhance requirements for a document - called after initial processing"""
         document = self.db.query(DocumentModel).filter(DocumentModel.id == document_id).first()
@@ -107,10 +378,16 @@ class DocumentService:
             return
 
         try:
-            # Get unenhanced requirements
+            # Get unenhanced requirements; rows reused from an enhanced
+            # revision or duplicate keep their enhancement
             requirements = self.db.query(Requirement).filter(
                 Requirement.document_id == document_id
             ).all()
+            if requirements and all(req.enhanced for req in requirements):
+                document.status = "enhanced"
+                self.db.commit()
+                return
+            requirements = [req for req in requirements if not req.enhanced]
 
             if not requirements:
                 logger.info(f"No requirements to enhance for document {document_id}")
@@ -143,6 +420,7 @@ class DocumentService:
                     requirement.requirement_type = enhanced_req['requirement_type']
                     requirement.complexity_score = enhanced_req['complexity_score']
                     requirement.analysis_result = enhanced_req
+                    requirement.enhanced = True
 
             # Update document status
             document.status = "enhanced"
@@ -163,10 +441,16 @@ class DocumentService:
         if not document:
             return None
 
+        message = f"Document is {document.status}"
+        if document.status == "processing":
+            # Requirements are committed chunk by chunk while processing
+            extracted = self.db.query(Requirement).filter(Requirement.document_id == document_id).count()
+            message = f"Document is processing ({extracted} requirements extracted so far)"
+
         return {
             "status": document.status,
             "progress": 100 if document.status == "processed" else 50 if document.status == "processing" else 0,
-            "message": f"Document is {document.status}"
+            "message": message
         }
 
     async def get_document_requirements(self, document_id: int) -> Optional[List[Dict]]:
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator
 from app.models.database import Document, Requirement, TestCase, TestSuite, Project
-from ml.pipelines.test_generator import AdvancedTestGenerator
+from ml.pipelines.test_generator import AdvancedTestGenerator, AIConfig
+from app.core.config import settings
 from ml.pipelines.traceability_engine import TraceabilityEngine
 import json
 from fastapi.responses import FileResponse
@@ -21,10 +22,20 @@ from reportlab.pdfbase.ttfonts import TTFont
 class TestService:
     def __init__(self, db: Session):
         self.db = db
-        self.test_generator = AdvancedTestGenerator(self.db)
-        self.traceability_engine = TraceabilityEngine()
+        # Semantic links must use the configured embedding model, like requirement analysis
+        self.traceability_engine = TraceabilityEngine(
+            model_name=settings.EMBEDDING_MODEL,
+            embedding_backend=settings.EMBEDDING_BACKEND,
+            onnx_model_dir=settings.ONNX_MODEL_DIR
+        )
+        self.test_generator = AdvancedTestGenerator(self.db, AIConfig(
+            batch_tokens=settings.TEST_GENERATION_BATCH_TOKENS,
+            max_batch_size=settings.TEST_GENERATION_MAX_BATCH_SIZE,
+            concurrency=settings.TEST_GENERATION_CONCURRENCY
+        ), traceability_engine=self.traceability_engine)
 
-    async def generate_test_cases(self, document_id: int) -> Dict[str, Any]:
+    def _requirement_data(self, document_id: int):
+        """(document, requirements in the format expected by the test generator)"""
         document = self.db.query(Document).filter(Document.id == document_id).first()
         if not document:
             raise Exception("Document not found")
@@ -43,34 +54,53 @@ class TestService:
             "complexity": req.complexity_score,
             "analysis": req.analysis_result
         } for req in requirements]
+        return document, requirement_data
 
-        # Generate test suite
-        test_suite = self.test_generator.generate_test_suite(requirement_data, document_id)
-
-        # Create test suite record
+    def _create_test_suite(self, document: Document) -> TestSuite:
         db_test_suite = TestSuite(
-            document_id=document_id,
+            document_id=document.id,
             name=f"Test Suite for {document.filename}",
             description=f"Automatically generated test suite"
         )
         self.db.add(db_test_suite)
         self.db.commit()
         self.db.refresh(db_test_suite)
+        return db_test_suite
+
+    @staticmethod
+    def _test_case_row(test_suite_id: int, test_case_data: Dict[str, Any]) -> TestCase:
+        return TestCase(
+            test_suite_id=test_suite_id,
+            requirement_id=test_case_data.get('requirement_id'),
+            name=test_case_data['name'],
+            description=test_case_data.get('description'),
+            test_steps=test_case_data.get('test_steps', []),
+            expected_results=test_case_data.get('expected_results'),
+            test_data=test_case_data.get('test_data', {}),
+            test_type=test_case_data.get('test_type', 'positive'),
+            priority=test_case_data.get('priority', 'medium')
+        )
+
+    async def generate_test_cases(self, document_id: int, force_refresh: bool = False,
+                                  refresh_requirement_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Generate and save a test suite. Requirements whose content already has
+        generated test cases reuse them; force_refresh (all requirements) and
+        refresh_requirement_ids (those requirements) regenerate instead.
+        """
+        document, requirement_data = self._requirement_data(document_id)
+
+        # Generate test suite
+        test_suite = await self.test_generator.generate_test_suite(
+            requirement_data, document_id, force_refresh, refresh_requirement_ids
+        )
+
+        # Create test suite record
+        db_test_suite = self._create_test_suite(document)
 
         # Save test cases
         for test_case_data in test_suite['test_cases']:
-            db_test_case = TestCase(
-                test_suite_id=db_test_suite.id,
-                requirement_id=test_case_data.get('requirement_id'),
-                name=test_case_data['name'],
-                description=test_case_data.get('description'),
-                test_steps=test_case_data.get('test_steps', []),
-                expected_results=test_case_data.get('expected_results'),
-                test_data=test_case_data.get('test_data', {}),
-                test_type=test_case_data.get('test_type', 'positive'),
-                priority=test_case_data.get('priority', 'medium')
-            )
-            self.db.add(db_test_case)
+            self.db.add(self._test_case_row(db_test_suite.id, test_case_data))
 
         self.db.commit()
 
@@ -86,7 +116,61 @@ class TestService:
                 "document_name": document.filename,
                 "test_cases": test_suite['test_cases']
             },
-            "traceability_matrix": traceability_matrix
+            "traceability_matrix": traceability_matrix,
+            "generation_stats": test_suite.get('generation_stats', {})
+        }
+
+    async def stream_test_cases(self, document_id: int, force_refresh: bool = False,
+                                refresh_requirement_ids: Optional[List[int]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming generate_test_cases. Looks up the document eagerly (so
+        errors surface before streaming starts) and returns an iterator of
+        events: 'test_suite' first, then each 'test_case' as soon as it is
+        parsed and saved (its id is the saved row's id), 'batch' progress
+        events, and finally 'complete' with the traceability matrix.
+        """
+        document, requirement_data = self._requirement_data(document_id)
+        return self._stream_test_cases(document, requirement_data, force_refresh, refresh_requirement_ids)
+
+    async def _stream_test_cases(self, document: Document, requirement_data: List[Dict[str, Any]],
+                                 force_refresh: bool, refresh_requirement_ids: Optional[List[int]]):
+        db_test_suite = self._create_test_suite(document)
+        yield {
+            "event": "test_suite",
+            "id": db_test_suite.id,
+            "name": db_test_suite.name,
+            "document_name": document.filename
+        }
+
+        saved = []
+        generation_stats = {}
+        events = self.test_generator.stream_test_suite(requirement_data, force_refresh, refresh_requirement_ids)
+        try:
+            async for event in events:
+                if event['event'] == 'generation_stats':
+                    generation_stats = event['generation_stats']
+                    continue
+                if event['event'] == 'test_case':
+                    test_case_data = event['test_case']
+                    db_test_case = self._test_case_row(db_test_suite.id, test_case_data)
+                    self.db.add(db_test_case)
+                    self.db.commit()
+                    test_case_data['id'] = db_test_case.id
+                    saved.append(test_case_data)
+                yield event
+        finally:
+            # Cancels the generation tasks right away when the client goes away
+            await events.aclose()
+
+        traceability_matrix = self.traceability_engine.build_traceability_matrix(
+            requirement_data, saved, project_id=document.project_id
+        )
+        yield {
+            "event": "complete",
+            "test_suite_id": db_test_suite.id,
+            "total_test_cases": len(saved),
+            "traceability_matrix": traceability_matrix,
+            "generation_stats": generation_stats
         }
 
     async def get_project_test_suites(self, project_id: int) -> List[Dict[str, Any]]:
@@ -26,7 +26,7 @@ class UploadService:
             self.db.refresh(project)
             
             # Upload and process document
-            document = await self.document_service.upload_document(file, project.id)
+            document = await self.document_service.upload_document(project.id, file)
             
             return {
                 "upload_id": str(uuid.uuid4()),
@@ -36,6 +36,9 @@ class UploadService:
                 "message": "Document uploaded and processed successfully"
             }
             
+        except HTTPException:
+            self.db.rollback()
+            raise
         except Exception as e:
             self.db.rollback()
             raise HTTPException(
@@ -57,7 +60,7 @@ class UploadService:
         
         for file in files:
             try:
-                document = await self.document_service.upload_document(file, project_id)
+                document = await self.document_service.upload_document(project_id, file)
                 results.append({
                     "filename": file.filename,
                     "status": "success",
@@ -67,7 +70,7 @@ class UploadService:
                 results.append({
                     "filename": file.filename,
                     "status": "failed",
-                    "error": str(e)
+                    "error": e.detail if isinstance(e, HTTPException) else str(e)
                 })
         
         return {
@@ -0,0 +1,119 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+
+import aiofiles
+from fastapi import UploadFile, HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = ['.pdf', '.docx', '.txt']
+
+_blob_stats = {'stored': 0, 'deduplicated': 0, 'bytes_deduplicated': 0}
+_blob_stats_lock = threading.Lock()
+
+
+@dataclass
+class StoredUpload:
+    filename: str
+    file_path: str
+    file_type: str
+    size: int
+    sha256: str
+    deduplicated: bool = False
+
+
+def validate_upload_filename(filename: str) -> str:
+    """Return the (lower-case) extension of a supported upload, else 400"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="File type not supported")
+    return extension
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the maximum upload size of {max_size} bytes"
+    )
+
+
+async def save_upload(file: UploadFile, upload_dir: str = None, max_size: int = None,
+                      chunk_size: int = None) -> StoredUpload:
+    """
+    Copy an upload to disk in fixed-size chunks, hashing it on the way.
+
+    Only one chunk is held in memory at a time. The copy is written to a
+    ".part" file; if the upload goes over max_size (413) or anything else
+    fails, the partial file is removed. Complete files are content
+    addressed: they are stored once under blobs/ by their sha256, and an
+    identical upload reuses the existing blob.
+    """
+    upload_dir = upload_dir or settings.UPLOAD_DIR
+    max_size = max_size or settings.MAX_FILE_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    extension = validate_upload_filename(file.filename)
+    # The multipart parser knows the size when the part was spooled completely
+    if file.size is not None and file.size > max_size:
+        raise _too_large(max_size)
+
+    os.makedirs(upload_dir, exist_ok=True)
+    partial_path = os.path.join(upload_dir, f"{uuid.uuid4()}{extension}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(partial_path, 'wb') as out_file:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise _too_large(max_size)
+                digest.update(chunk)
+                await out_file.write(chunk)
+
+        sha256 = digest.hexdigest()
+        file_path = blob_path(upload_dir, sha256, extension)
+        deduplicated = os.path.exists(file_path)
+        if deduplicated:
+            os.remove(partial_path)
+        else:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(partial_path, file_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    with _blob_stats_lock:
+        if deduplicated:
+            _blob_stats['deduplicated'] += 1
+            _blob_stats['bytes_deduplicated'] += size
+        else:
+            _blob_stats['stored'] += 1
+    logger.info(f"Stored upload {file.filename} ({size} bytes) at {file_path}"
+                f"{' (existing blob)' if deduplicated else ''}")
+    return StoredUpload(
+        filename=file.filename,
+        file_path=file_path,
+        file_type=extension,
+        size=size,
+        sha256=sha256,
+        deduplicated=deduplicated
+    )
+
+
+def blob_path(upload_dir: str, sha256: str, extension: str) -> str:
+    return os.path.join(upload_dir, "blobs", sha256[:2], f"{sha256}{extension}")
+
+
+def blob_stats():
+    with _blob_stats_lock:
+        return dict(_blob_stats)
@@ -0,0 +1,107 @@
+"""
+Compare embedding backends (torch, ONNX Runtime, ONNX Runtime int8).
+
+Each backend runs in a fresh process so resident memory is measured in
+isolation. Reports load time, batch throughput, single-text latency, RSS
+growth and cosine drift against the first backend (torch by default), plus
+throughput with length-bucketed batching (BucketedEncoder). The
+ONNX backends export the model on first use, which needs torch once.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_backends --count 2000 --backends torch onnx onnx-int8
+"""
+import argparse
+import time
+import multiprocessing
+
+import numpy as np
+
+from benchmarks.synthetic import generate_requirement_texts
+
+
+def _run_backend(backend, model_name, onnx_model_dir, texts, batch_size, latency_samples, queue):
+    from ml.pipelines.model_registry import get_model_registry, _current_rss
+    from ml.pipelines.embedding_backends import BucketedEncoder
+
+    rss_before = _current_rss()
+    started = time.perf_counter()
+    encoder = get_model_registry().get_embedding_backend(model_name, backend, onnx_model_dir)
+    load_time = time.perf_counter() - started
+
+    # Warm up so lazy initialization is not part of the measurements
+    encoder.encode(texts[:batch_size], batch_size=batch_size)
+
+    started = time.perf_counter()
+    embeddings = encoder.encode(texts, batch_size=batch_size)
+    batch_time = time.perf_counter() - started
+
+    bucketed = BucketedEncoder(encoder)
+    started = time.perf_counter()
+    bucketed.encode(texts)
+    bucketed_time = time.perf_counter() - started
+
+    latencies = []
+    for text in texts[:latency_samples]:
+        started = time.perf_counter()
+        encoder.encode([text], batch_size=1)
+        latencies.append(time.perf_counter() - started)
+
+    queue.put({
+        'backend': backend,
+        'load_seconds': load_time,
+        'texts_per_second': len(texts) / batch_time,
+        'bucketed_texts_per_second': len(texts) / bucketed_time,
+        'padding_ratio': bucketed.stats()['padding_ratio'],
+        'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'rss_mib': (_current_rss() - rss_before) / 2**20,
+        'embeddings': embeddings,
+    })
+
+
+def run_isolated(backend, args, texts):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_run_backend,
+        args=(backend, args.model, args.onnx_model_dir, texts, args.batch_size, args.latency_samples, queue)
+    )
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def cosine_drift(reference, embeddings):
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    cosine = np.einsum('ij,ij->i', reference, embeddings)
+    return float(cosine.mean()), float(cosine.min())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-model-dir", default="./onnx_models")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    args = parser.parse_args()
+
+    texts = generate_requirement_texts(args.count)
+    results = [run_isolated(backend, args, texts) for backend in args.backends]
+    reference = results[0]['embeddings']
+
+    print(f"{'backend':<12}{'load s':>8}{'texts/s':>10}{'bucketed':>10}{'pad':>7}{'p50 ms':>9}{'p95 ms':>9}{'RSS MiB':>9}"
+          f"{'cos mean':>10}{'cos min':>9}")
+    for result in results:
+        mean_cosine, min_cosine = cosine_drift(reference, result['embeddings'])
+        print(f"{result['backend']:<12}{result['load_seconds']:>8.2f}{result['texts_per_second']:>10.1f}"
+              f"{result['bucketed_texts_per_second']:>10.1f}{result['padding_ratio']:>7.1%}"
+              f"{result['latency_p50_ms']:>9.2f}{result['latency_p95_ms']:>9.2f}{result['rss_mib']:>9.1f}"
+              f"{mean_cosine:>10.4f}{min_cosine:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
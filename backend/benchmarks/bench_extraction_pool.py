@@ -0,0 +1,87 @@
+"""
+Event-loop responsiveness while several large documents are extracted.
+
+Runs a heartbeat coroutine (a stand-in for other API requests) next to
+concurrent extractions and reports the worst and p95 heartbeat delay, with
+extraction run inline on the loop (the old behaviour) and through the
+thread and process extraction pools.
+
+Usage (from backend/):
+    python -m benchmarks.bench_extraction_pool --documents 4 --pages 200 --format pdf
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import BRD_STYLES, write_brd
+from ml.pipelines.document_processor import extract_pdf_text, extract_docx_text
+from ml.pipelines.extraction_pool import ExtractionPool
+
+EXTRACTORS = {'pdf': extract_pdf_text, 'docx': extract_docx_text}
+
+
+async def _heartbeat(interval, delays, stop):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        delays.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_mode(mode, paths, extractor, workers, queue_size, interval):
+    pool = None if mode == 'inline' else ExtractionPool(workers, queue_size, mode)
+
+    async def extract(path):
+        if pool is None:
+            return extractor(path)
+        return await pool.run(extractor, path)
+
+    if pool is not None:
+        # Start the workers outside the measurement
+        await pool.run(len, "warm-up")
+
+    delays = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(interval, delays, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(extract(path) for path in paths))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await heartbeat
+
+    stats = pool.stats() if pool is not None else None
+    if pool is not None:
+        pool.shutdown()
+    return elapsed, delays, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--format", default="pdf", choices=list(EXTRACTORS))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--interval", type=float, default=0.01, help="heartbeat interval in seconds")
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    parser.add_argument("--corpus-dir", default="benchmarks/corpus")
+    args = parser.parse_args()
+
+    paths = [write_brd(BRD_STYLES[i % len(BRD_STYLES)], args.pages, args.format, args.corpus_dir, seed=i)
+             for i in range(args.documents)]
+
+    print(f"{'mode':<10}{'wall s':>9}{'max lag ms':>12}{'p95 lag ms':>12}{'queue wait p95':>16}{'exec p95':>10}")
+    for mode in args.modes:
+        elapsed, delays, stats = asyncio.run(run_mode(
+            mode, paths, EXTRACTORS[args.format], args.workers, args.queue_size, args.interval
+        ))
+        delays = delays or [0.0]
+        queue_wait = f"{stats['queue_wait_seconds']['p95']:.3f}" if stats else "-"
+        exec_time = f"{stats['exec_seconds']['p95']:.3f}" if stats else "-"
+        print(f"{mode:<10}{elapsed:>9.2f}{max(delays) * 1000:>12.1f}{np.percentile(delays, 95) * 1000:>12.1f}"
+              f"{queue_wait:>16}{exec_time:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+End-to-end ingestion benchmark over synthetic BRD corpora.
+
+Generates BRDs in every style (numbered, formal IDs, user stories, free
+prose) and format (TXT, DOCX, PDF) at the requested page counts, then runs
+AdvancedDocumentProcessor text extraction and the SemanticRequirementAnalyzer
+stages one by one. Each document is processed in a fresh process so the peak
+RSS belongs to that document alone. Stages timed:
+
+    text_extraction, preprocessing, structure, extraction_strategies,
+    dedup, spacy, scoring
+
+Results are written as JSON together with the git commit, so runs on two
+commits can be compared with --compare. Everything runs offline: Hugging Face
+downloads are disabled, so the embedding model must already be in the local
+cache (or exported for the ONNX backends). Embeddings use a fresh, empty
+cache per document unless --warm-cache is given.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingestion --pages 10 100 1000 --formats txt docx pdf
+    python -m benchmarks.bench_ingestion --pages 10 --compare benchmarks/results/ingestion-<commit>.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from queue import Empty
+
+from benchmarks.synthetic import BRD_STYLES, BRD_FORMATS, write_brd
+
+STAGES = ['text_extraction', 'preprocessing', 'structure', 'extraction_strategies', 'dedup', 'spacy', 'scoring']
+OFFLINE_ENV = {'HF_HUB_OFFLINE': '1', 'TRANSFORMERS_OFFLINE': '1', 'HF_DATASETS_OFFLINE': '1'}
+
+
+def _peak_rss() -> int:
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def _timed(timings, stage):
+    started = time.perf_counter()
+    yield
+    timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+def _measure_document(path, options):
+    from ml.pipelines.document_processor import AdvancedDocumentProcessor
+    from ml.pipelines.document_index import DocumentIndex, preprocess_text
+    from ml.pipelines.embedding_cache import configure_embedding_cache
+    from ml.pipelines.extraction_pool import configure_extraction_pool
+    from ml.pipelines.requirement_analyzer import SemanticRequirementAnalyzer
+    from ml.pipelines.model_registry import _current_rss
+
+    cache_dir = None
+    if not options['warm_cache']:
+        cache_dir = tempfile.TemporaryDirectory()
+        configure_embedding_cache(os.path.join(cache_dir.name, "embeddings.sqlite3"))
+
+    # One document per process: a thread keeps worker start-up out of text_extraction
+    configure_extraction_pool(workers=1, executor='thread')
+
+    started = time.perf_counter()
+    processor = AdvancedDocumentProcessor(pdf_backend=options['pdf_backend'])
+    analyzer = SemanticRequirementAnalyzer(
+        batch_size=options['batch_size'],
+        profile=options['profile'],
+        embedding_backend=options['embedding_backend'],
+        onnx_model_dir=options['onnx_model_dir']
+    )
+    model_load = time.perf_counter() - started
+    models_rss = _current_rss()
+
+    timings = {}
+    with _timed(timings, 'text_extraction'):
+        text = asyncio.run(processor._extract_text(path))
+    with _timed(timings, 'preprocessing'):
+        cleaned_text = preprocess_text(text)
+    with _timed(timings, 'structure'):
+        index = DocumentIndex.build(cleaned_text, analyzer.section_patterns)
+        structure = analyzer._analyze_document_structure(cleaned_text, index)
+    with _timed(timings, 'extraction_strategies'):
+        candidates = analyzer._multi_strategy_extraction(cleaned_text, structure, index)
+    with _timed(timings, 'dedup'):
+        requirements = analyzer._deduplicate_requirements(candidates)
+    with _timed(timings, 'spacy'):
+        docs = list(analyzer._parse_texts([req['text'] for req in requirements], options['profile']))
+    with _timed(timings, 'scoring'):
+        analyzed = analyzer._score_parsed(requirements, docs, 0, options['profile'])
+
+    if cache_dir is not None:
+        cache_dir.cleanup()
+    return {
+        'file_bytes': os.path.getsize(path),
+        'characters': len(text),
+        'candidates': len(candidates),
+        'requirements': len(analyzed),
+        'model_load_seconds': round(model_load, 4),
+        'stages': {stage: round(timings[stage], 4) for stage in STAGES},
+        'total_seconds': round(sum(timings.values()), 4),
+        'models_rss_mib': round(models_rss / 2**20, 1),
+        'peak_rss_mib': round(_peak_rss() / 2**20, 1),
+    }
+
+
+def _run_document(path, options, queue):
+    try:
+        result = _measure_document(path, options)
+    except BaseException as e:
+        # e.g. a model missing from the local cache while Hugging Face is offline
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+        raise
+    queue.put(result)
+
+
+def run_isolated(path, options, poll_seconds: float = 1.0):
+    """
+    Result of one document measured in a fresh process, or {'error': ...}
+    if the child failed or died (crash, OOM kill) without reporting
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_document, args=(path, options, queue))
+    process.start()
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=poll_seconds)
+        except Empty:
+            if not process.is_alive():
+                # The child may have reported right before exiting
+                try:
+                    result = queue.get(timeout=poll_seconds)
+                except Empty:
+                    result = {}
+    process.join()
+    if process.exitcode != 0 and 'error' not in result:
+        result = {'error': f"worker exited with code {process.exitcode}"}
+    return result
+
+
+def git_revision():
+    """(commit, dirty) of the working tree, or (None, None) outside a git checkout"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def _case_key(result):
+    return result['style'], result['format'], result['pages']
+
+
+def print_results(results, baseline=None):
+    baseline_cases = {_case_key(case): case for case in (baseline or {}).get('results', [])}
+    header = f"{'style':<11}{'fmt':<6}{'pages':>6}{'reqs':>7}" + "".join(f"{stage[:10]:>11}" for stage in STAGES)
+    header += f"{'total s':>9}{'peak MiB':>10}"
+    if baseline_cases:
+        header += f"{'vs base':>9}"
+    print(header)
+    for result in results:
+        line = f"{result['style']:<11}{result['format']:<6}{result['pages']:>6}{result['requirements']:>7}"
+        line += "".join(f"{result['stages'][stage]:>11.3f}" for stage in STAGES)
+        line += f"{result['total_seconds']:>9.2f}{result['peak_rss_mib']:>10.1f}"
+        base = baseline_cases.get(_case_key(result))
+        if base:
+            line += f"{result['total_seconds'] / base['total_seconds']:>8.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--styles", nargs="+", default=BRD_STYLES, choices=BRD_STYLES)
+    parser.add_argument("--formats", nargs="+", default=BRD_FORMATS, choices=BRD_FORMATS)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profile", default="full")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--embedding-backend", default=None)
+    parser.add_argument("--pdf-backend", default="auto", choices=["auto", "pdfium", "pdfplumber"])
+    parser.add_argument("--onnx-model-dir", default="./onnx_models")
+    parser.add_argument("--warm-cache", action="store_true", help="use the configured embedding cache")
+    parser.add_argument("--corpus-dir", default="benchmarks/corpus")
+    parser.add_argument("--output", default=None, help="defaults to benchmarks/results/ingestion-<commit>.json")
+    parser.add_argument("--compare", default=None, help="results JSON of an earlier run")
+    args = parser.parse_args()
+
+    # Inherited by the spawned workers before any model library is imported
+    os.environ.update(OFFLINE_ENV)
+
+    options = {
+        'profile': args.profile,
+        'batch_size': args.batch_size,
+        'embedding_backend': args.embedding_backend,
+        'pdf_backend': args.pdf_backend,
+        'onnx_model_dir': args.onnx_model_dir,
+        'warm_cache': args.warm_cache,
+    }
+    results = []
+    for pages in args.pages:
+        for style in args.styles:
+            for fmt in args.formats:
+                path = write_brd(style, pages, fmt, args.corpus_dir, args.seed)
+                result = {'style': style, 'format': fmt, 'pages': pages, **run_isolated(path, options)}
+                if 'error' in result:
+                    print(f"{style}/{fmt}/{pages}p: skipped, {result['error']}", flush=True)
+                    continue
+                results.append(result)
+                print(f"{style}/{fmt}/{pages}p: {result['requirements']} requirements "
+                      f"in {result['total_seconds']:.2f}s, peak {result['peak_rss_mib']:.0f} MiB", flush=True)
+
+    commit, dirty = git_revision()
+    report = {
+        'benchmark': 'ingestion',
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'options': {**options, 'seed': args.seed},
+        'results': results,
+    }
+    output = args.output or os.path.join("benchmarks", "results", f"ingestion-{(commit or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print()
+    print_results(results, baseline)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare per-requirement spaCy calls with batched nlp.pipe in the analyzer.
+
+Usage (from backend/):
+    python -m benchmarks.bench_nlp_pipe --count 500 --batch-sizes 16 64 256 --n-process 1 2
+"""
+import argparse
+import time
+
+from ml.pipelines.requirement_analyzer import SemanticRequirementAnalyzer
+from benchmarks.synthetic import generate_requirement_texts
+
+
+def _requirements(texts):
+    return [{'id': f"REQ-{i}", 'text': text, 'original': text, 'format': 'numbered', 'metadata': {}}
+            for i, text in enumerate(texts, 1)]
+
+
+def run_sequential(analyzer, requirements):
+    started = time.perf_counter()
+    results = [analyzer._deep_analyze_requirement(req, i + 1) for i, req in enumerate(requirements)]
+    return time.perf_counter() - started, results
+
+
+def run_batched(analyzer, requirements):
+    started = time.perf_counter()
+    docs = analyzer._parse_texts([req['text'] for req in requirements])
+    results = [analyzer._deep_analyze_requirement(req, i + 1, doc)
+               for i, (req, doc) in enumerate(zip(requirements, docs))]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    requirements = _requirements(generate_requirement_texts(args.count))
+    analyzer = SemanticRequirementAnalyzer()
+    # Warm up so model loading is not part of either measurement
+    run_sequential(analyzer, requirements[:10])
+
+    baseline_time, baseline = run_sequential(analyzer, requirements)
+    print(f"{'mode':<28}{'seconds':>10}{'req/s':>10}{'speedup':>10}")
+    print(f"{'nlp() per requirement':<28}{baseline_time:>10.2f}{args.count / baseline_time:>10.1f}{1.0:>10.2f}")
+
+    for n_process in args.n_process:
+        for batch_size in args.batch_sizes:
+            analyzer.batch_size = batch_size
+            analyzer.n_process = n_process
+            elapsed, results = run_batched(analyzer, requirements)
+            assert results == baseline, "batched analysis diverged from per-requirement analysis"
+            label = f"pipe bs={batch_size} np={n_process}"
+            print(f"{label:<28}{elapsed:>10.2f}{args.count / elapsed:>10.1f}{baseline_time / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Throughput and extracted-requirement parity of the PDF text backends.
+
+Extracts every PDF of the fixture corpus (synthetic BRDs in all styles, plus
+any --files) with each backend, then runs the analyzer's extraction
+strategies on the text. Parity is the overlap of the extracted requirements
+(id and whitespace-normalized text) with the pdfplumber result; text parity
+is the share of pages whose text is identical.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pdf_backends --pages 50 --backends pdfplumber pdfium auto
+"""
+import argparse
+import re
+import time
+from collections import Counter
+
+from benchmarks.synthetic import BRD_STYLES, write_brd
+from ml.pipelines.document_processor import PDF_BACKENDS, extract_pdf_pages, join_pages
+from ml.pipelines.requirement_analyzer import SemanticRequirementAnalyzer
+
+REFERENCE = 'pdfplumber'
+
+
+def _requirement_keys(analyzer, text):
+    return Counter((req['id'], re.sub(r'\s+', ' ', req['text'])) for req in analyzer._extract_candidates(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--files", nargs="*", default=[], help="additional PDF fixtures")
+    parser.add_argument("--backends", nargs="+", default=list(PDF_BACKENDS), choices=PDF_BACKENDS)
+    parser.add_argument("--corpus-dir", default="benchmarks/corpus")
+    args = parser.parse_args()
+
+    paths = [write_brd(style, args.pages, "pdf", args.corpus_dir) for style in BRD_STYLES] + args.files
+    analyzer = SemanticRequirementAnalyzer()
+    backends = [REFERENCE] + [backend for backend in args.backends if backend != REFERENCE]
+
+    totals = {backend: {'seconds': 0.0, 'pages': 0, 'same_pages': 0, 'matched': 0, 'expected': 0, 'found': 0}
+              for backend in backends}
+    for path in paths:
+        reference_pages = reference_keys = None
+        for backend in backends:
+            started = time.perf_counter()
+            pages = extract_pdf_pages(path, backend=backend)
+            elapsed = time.perf_counter() - started
+            keys = _requirement_keys(analyzer, join_pages(pages)[0])
+            if backend == REFERENCE:
+                reference_pages, reference_keys = pages, keys
+
+            total = totals[backend]
+            total['seconds'] += elapsed
+            total['pages'] += len(pages)
+            total['same_pages'] += sum(a.strip() == b.strip() for a, b in zip(pages, reference_pages))
+            total['matched'] += sum((keys & reference_keys).values())
+            total['expected'] += sum(reference_keys.values())
+            total['found'] += sum(keys.values())
+
+    print(f"{'backend':<12}{'seconds':>9}{'pages/s':>9}{'speedup':>9}{'text parity':>13}{'req recall':>12}{'req precision':>15}")
+    reference_seconds = totals[REFERENCE]['seconds']
+    for backend in backends:
+        total = totals[backend]
+        print(f"{backend:<12}{total['seconds']:>9.2f}{total['pages'] / total['seconds']:>9.1f}"
+              f"{reference_seconds / total['seconds']:>9.2f}{total['same_pages'] / total['pages']:>13.1%}"
+              f"{total['matched'] / max(total['expected'], 1):>12.1%}{total['matched'] / max(total['found'], 1):>15.1%}")
+
+
+if __name__ == "__main__":
+    main()
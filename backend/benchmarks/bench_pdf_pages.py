@@ -0,0 +1,52 @@
+"""
+Wall-clock time of page-parallel PDF extraction by worker count.
+
+Extracts the same synthetic PDF serially (one pdfplumber pass, as before)
+and through process extraction pools of increasing size, checking that the
+joined text is identical.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pdf_pages --pages 500 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.synthetic import write_brd
+from ml.pipelines.document_processor import AdvancedDocumentProcessor, extract_pdf_text
+from ml.pipelines.extraction_pool import configure_extraction_pool
+
+
+async def _extract(path):
+    return await AdvancedDocumentProcessor()._extract_text_with_pages(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--style", default="prose")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--corpus-dir", default="benchmarks/corpus")
+    args = parser.parse_args()
+
+    path = write_brd(args.style, args.pages, "pdf", args.corpus_dir)
+    started = time.perf_counter()
+    reference = extract_pdf_text(path)
+    serial = time.perf_counter() - started
+
+    print(f"{'mode':<16}{'seconds':>10}{'speedup':>10}")
+    print(f"{'serial':<16}{serial:>10.2f}{1.0:>10.2f}")
+    for workers in args.workers:
+        pool = configure_extraction_pool(workers=workers, executor="process")
+        # Start the worker processes outside the measurement
+        asyncio.run(pool.run(len, "warm-up"))
+        started = time.perf_counter()
+        text, page_offsets = asyncio.run(_extract(path))
+        elapsed = time.perf_counter() - started
+        assert text == reference, "page-parallel text differs from serial extraction"
+        print(f"{f'{workers} workers':<16}{elapsed:>10.2f}{serial / elapsed:>10.2f}")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
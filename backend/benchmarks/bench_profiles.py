@@ -0,0 +1,71 @@
+"""
+Throughput and score drift of the analyzer's spaCy pipeline profiles.
+
+Every profile analyzes the same synthetic requirements; drift is measured
+against the "full" profile (mean/max absolute difference per score, share of
+requirements whose risks change, key phrase overlap).
+
+Usage (from backend/):
+    python -m benchmarks.bench_profiles --count 1000 --batch-size 64
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ml.pipelines.requirement_analyzer import SemanticRequirementAnalyzer, ANALYSIS_PROFILES
+from benchmarks.synthetic import generate_requirement_texts
+
+SCORES = ['complexity', 'testability', 'ambiguity', 'specificity', 'quality_score']
+
+
+def _requirements(texts):
+    return [{'id': f"REQ-{i}", 'text': text, 'original': text, 'format': 'numbered', 'metadata': {}}
+            for i, text in enumerate(texts, 1)]
+
+
+def run_profile(analyzer, requirements, profile):
+    started = time.perf_counter()
+    results = analyzer._analyze_requirements(requirements, profile=profile)
+    return time.perf_counter() - started, results
+
+
+def drift(reference, results):
+    report = {}
+    for score in SCORES:
+        diff = np.abs(np.array([r[score] for r in results]) - np.array([r[score] for r in reference]))
+        report[score] = (float(diff.mean()), float(diff.max()))
+    report['risks_changed'] = float(np.mean([r['risks'] != ref['risks'] for r, ref in zip(results, reference)]))
+    overlaps = []
+    for r, ref in zip(results, reference):
+        union = set(r['key_phrases']) | set(ref['key_phrases'])
+        overlaps.append(len(set(r['key_phrases']) & set(ref['key_phrases'])) / len(union) if union else 1.0)
+    report['key_phrase_jaccard'] = float(np.mean(overlaps))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--profiles", nargs="+", default=list(ANALYSIS_PROFILES))
+    args = parser.parse_args()
+
+    requirements = _requirements(generate_requirement_texts(args.count))
+    analyzer = SemanticRequirementAnalyzer(batch_size=args.batch_size)
+    # Warm up so model loading is not part of any measurement
+    analyzer._analyze_requirements(requirements[:10])
+
+    _, reference = run_profile(analyzer, requirements, 'full')
+    print(f"{'profile':<10}{'seconds':>10}{'docs/s':>10}  drift vs full (mean/max)")
+    for profile in args.profiles:
+        elapsed, results = run_profile(analyzer, requirements, profile)
+        report = drift(reference, results)
+        scores = "  ".join(f"{score}={mean:.3f}/{worst:.3f}" for score, (mean, worst) in
+                           ((s, report[s]) for s in SCORES))
+        print(f"{profile:<10}{elapsed:>10.2f}{args.count / elapsed:>10.1f}  {scores}  "
+              f"risks_changed={report['risks_changed']:.1%}  key_phrase_jaccard={report['key_phrase_jaccard']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Deterministic synthetic requirement text for offline benchmarks"""
+import os
+import random
+import textwrap
+from typing import List
+
+ACTORS = ["The system", "The application", "The admin portal", "The reporting service", "The mobile app"]
+MODALS = ["shall", "must", "should", "will"]
+ACTIONS = [
+    "create", "update", "delete", "view", "manage", "process", "export", "validate",
+    "encrypt", "synchronize", "archive", "approve",
+]
+OBJECTS = [
+    "user accounts", "customer orders", "audit logs", "invoice records", "session tokens",
+    "dashboard metrics", "payment transactions", "notification preferences", "role permissions",
+]
+QUALIFIERS = [
+    "within 2 seconds", "for up to 500 concurrent users", "when the user is authenticated",
+    "if the request is valid", "using TLS 1.3 encryption", "as needed", "in a user-friendly way",
+    "unless the account is locked", "with a maximum size of 10 MB", "and notify the administrator by email",
+]
+
+
+def requirement_sentence(rng: random.Random) -> str:
+    qualifiers = rng.sample(QUALIFIERS, rng.randint(0, 3))
+    parts = [rng.choice(ACTORS), rng.choice(MODALS), rng.choice(ACTIONS), rng.choice(OBJECTS)] + qualifiers
+    return " ".join(parts) + "."
+
+
+def generate_requirement_texts(count: int, seed: int = 42) -> List[str]:
+    """Generate `count` requirement sentences of varying length"""
+    rng = random.Random(seed)
+    return [requirement_sentence(rng) for _ in range(count)]
+
+
+def generate_numbered_brd(count: int, seed: int = 42) -> str:
+    """Generate a numbered-list BRD body with `count` requirements"""
+    return "\n".join(f"{i}. {text}" for i, text in enumerate(generate_requirement_texts(count, seed), 1))
+
+
+# Synthetic BRDs for the ingestion benchmark. A "page" is WORDS_PER_PAGE words,
+# which is roughly what one printed page of the PDF writer below holds.
+BRD_STYLES = ['numbered', 'formal', 'user_story', 'prose']
+BRD_FORMATS = ['txt', 'docx', 'pdf']
+WORDS_PER_PAGE = 390
+
+SECTIONS = [
+    "Account Management", "Order Processing", "Billing", "Reporting", "Security",
+    "Notifications", "Integrations", "Administration", "Performance", "Data Retention",
+]
+ROLES = ["customer", "administrator", "support agent", "finance manager", "auditor"]
+BENEFITS = [
+    "I can finish my work faster", "errors are caught early", "the data stays consistent",
+    "I stay compliant with policy", "I do not lose track of open items",
+]
+PRIORITIES = ["High", "Medium", "Low"]
+NARRATIVE = [
+    "This section describes the expected behaviour in the current release.",
+    "Stakeholders reviewed these items during the discovery workshops.",
+    "The existing process relies on spreadsheets that are shared by email.",
+    "Details of the legacy interface are covered in the appendix.",
+    "Open questions are tracked separately by the project office.",
+]
+
+
+def _brd_block(style: str, number: int, rng: random.Random) -> str:
+    sentence = requirement_sentence(rng)
+    if style == 'numbered':
+        return f"{number}. {sentence}"
+    if style == 'formal':
+        return f"REQ-{number:04d}: {sentence}\nPriority: {rng.choice(PRIORITIES)}"
+    if style == 'user_story':
+        return (f"As a {rng.choice(ROLES)}, I want to {rng.choice(ACTIONS)} {rng.choice(OBJECTS)} "
+                f"so that {rng.choice(BENEFITS)}.")
+    # Free prose: requirement sentences embedded in narrative paragraphs
+    return " ".join([rng.choice(NARRATIVE), sentence, rng.choice(NARRATIVE)])
+
+
+def generate_brd(style: str, pages: int, seed: int = 42) -> str:
+    """Generate a BRD of roughly `pages` pages in one of BRD_STYLES"""
+    if style not in BRD_STYLES:
+        raise ValueError(f"Unknown BRD style '{style}', expected one of {BRD_STYLES}")
+    rng = random.Random(seed)
+    target_words = pages * WORDS_PER_PAGE
+    lines = ["BUSINESS REQUIREMENTS DOCUMENT", "", "SCOPE", rng.choice(NARRATIVE), ""]
+    words = sum(len(line.split()) for line in lines)
+    number = 0
+    section = 0
+    while words < target_words:
+        section += 1
+        header = f"# {section}. {SECTIONS[(section - 1) % len(SECTIONS)]}"
+        lines.extend([header, rng.choice(NARRATIVE), ""])
+        words += len(header.split())
+        for _ in range(rng.randint(15, 30)):
+            number += 1
+            block = _brd_block(style, number, rng)
+            lines.extend([block, ""])
+            words += len(block.split())
+    return "\n".join(lines)
+
+
+def write_txt(text: str, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def write_docx(text: str, path: str):
+    from docx import Document
+    document = Document()
+    for line in text.split("\n"):
+        if line.strip():
+            document.add_paragraph(line)
+    document.save(path)
+
+
+def write_pdf(text: str, path: str, line_width: int = 95):
+    """Plain text PDF written with the reportlab canvas (platypus is too slow at 1,000 pages)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+    margin, leading = 50, 12
+    y = height - margin
+    for paragraph in text.split("\n"):
+        for line in textwrap.wrap(paragraph, line_width) or [""]:
+            if y < margin:
+                pdf.showPage()
+                y = height - margin
+            pdf.setFont("Helvetica", 9)
+            pdf.drawString(margin, y, line)
+            y -= leading
+    pdf.save()
+
+
+BRD_WRITERS = {'txt': write_txt, 'docx': write_docx, 'pdf': write_pdf}
+
+
+def write_brd(style: str, pages: int, fmt: str, directory: str, seed: int = 42) -> str:
+    """Write a synthetic BRD file (reused if it already exists) and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"brd-{style}-{pages}p-s{seed}.{fmt}")
+    if not os.path.exists(path):
+        BRD_WRITERS[fmt](generate_brd(style, pages, seed), path)
+    return path
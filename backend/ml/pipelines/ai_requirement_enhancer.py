@@ -1,20 +1,16 @@
-from openai import AsyncOpenAI
 from typing import List, Dict, Any
 import json
 import logging
 from datetime import datetime
 import re
 from dotenv import load_dotenv
-import os
+from .llm_providers import get_llm_provider
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-client = AsyncOpenAI(
-    api_key=os.getenv("API_KEY"),
-    base_url="https://openrouter.ai/api/v1"
-)
+ENHANCER_MODEL = "openai/gpt-3.5-turbo"
 
 
 def extract_json(text: str) -> str:
@@ -25,10 +21,17 @@ def extract_json(text: str) -> str:
         text = re.sub(r"```$", "", text)
     return text.strip()
 
+def _parse_requirement_array(text: str) -> List[Dict[str, Any]]:
+    structured_data = json.loads(extract_json(text))
+    # Validate response structure
+    if not isinstance(structured_data, list):
+        raise ValueError("Expected JSON array response")
+    return structured_data
+
+
 class AIRequirementEnhancer:
     def __init__(self, api_key: str = None):
-        if api_key:
-            client.api_key = api_key  
+        self.provider = get_llm_provider('openrouter', api_key)
     
     async def enhance_requirements(self, requirements: List[Dict]) -> List[Dict]:
         """Enhance all requirements in a single API call"""
@@ -85,29 +88,13 @@ class AIRequirementEnhancer:
         """Single API call to structure all requirements"""
         
         try:
-            response = await client.chat.completions.create(
-                model="openai/gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a business analyst expert at structuring software requirements. Process all requirements in the order provided and return a JSON array."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt,
-                    }
-                ],
-                temperature=0.1
+            structured_data = await self.provider.generate_json(
+                ENHANCER_MODEL,
+                prompt,
+                system="You are a business analyst expert at structuring software requirements. Process all requirements in the order provided and return a JSON array.",
+                temperature=0.1,
+                parse=_parse_requirement_array
             )
-            
-            result_text = response.choices[0].message.content
-            cleaned_text = extract_json(result_text)
-            print(f"Cleaned JSON text: {cleaned_text}")
-            structured_data = json.loads(cleaned_text)
-            
-            # Validate response structure
-            if not isinstance(structured_data, list):
-                raise ValueError("Expected JSON array response")
                 
             logger.info(f"Batch API call successful, processed {len(structured_data)} requirements")
             return structured_data
@@ -116,6 +103,6 @@ class AIRequirementEnhancer:
             logger.error(f"Failed to parse JSON response: {e}")
             raise
         except Exception as e:
-            logger.error(f"OpenAI API call failed: {e}")
+            logger.error(f"OpenRouter API call failed: {e}")
             raise
     
\ No newline at end of file
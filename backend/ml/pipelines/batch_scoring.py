@@ -0,0 +1,203 @@
+import numpy as np
+from dataclasses import dataclass
+from collections import Counter
+from typing import List, Dict, Set, Sequence
+
+from .keyword_matcher import KeywordMatcher
+
+CLAUSE_DEPS = {'advcl', 'relcl', 'ccomp', 'conj'}
+CONDITION_LEMMAS = {'if', 'when', 'unless', 'provided'}
+
+RISK_LABELS = ['high_ambiguity', 'high_complexity', 'low_testability', 'high_interpretation_risk']
+
+# Used instead of dependency labels when the parser is disabled
+CLAUSE_POS = {'SCONJ', 'CCONJ'}
+CLAUSE_TAGS = {'WDT', 'WP', 'WP$', 'WRB'}
+
+
+def clause_count(doc) -> int:
+    """
+    Number of subordinate/coordinated clauses. Uses dependency labels when the
+    document was parsed and falls back to conjunction and wh-word tags when the
+    parser is disabled by the analysis profile.
+    """
+    if doc.has_annotation("DEP"):
+        return sum(1 for token in doc if token.dep_ in CLAUSE_DEPS)
+    return sum(1 for token in doc if token.pos_ in CLAUSE_POS or token.tag_ in CLAUSE_TAGS)
+
+
+@dataclass
+class ScoreBatch:
+    """Scores of a batch of requirements, one array element per requirement"""
+    requirement_types: List[str]
+    priorities: List[str]
+    complexity: np.ndarray
+    ambiguity: np.ndarray
+    specificity: np.ndarray
+    testability: np.ndarray
+    quality_score: np.ndarray
+    risk_flags: np.ndarray  # n x len(RISK_LABELS) booleans
+
+    def __len__(self) -> int:
+        return len(self.requirement_types)
+
+    def fields(self, i: int) -> Dict:
+        """Per-requirement fields in the shape produced by the analyzer"""
+        return {
+            'type': self.requirement_types[i],
+            'priority': self.priorities[i],
+            'complexity': float(self.complexity[i]),
+            'testability': float(self.testability[i]),
+            'ambiguity': float(self.ambiguity[i]),
+            'specificity': float(self.specificity[i]),
+            'risks': [label for label, flag in zip(RISK_LABELS, self.risk_flags[i]) if flag],
+            # round() on the Python float keeps the scalar formula's rounding
+            'quality_score': round(float(self.quality_score[i]), 2),
+        }
+
+    def report(self) -> Dict:
+        return build_report(
+            self.requirement_types, self.priorities,
+            np.array([round(float(q), 2) for q in self.quality_score]),
+            self.complexity, self.testability, self.ambiguity,
+            self.risk_flags.sum(axis=1)
+        )
+
+
+class BatchScorer:
+    """
+    Compute requirement quality metrics for a whole batch with NumPy.
+
+    A keyword-count matrix (requirements x lexicons) and a syntactic feature
+    matrix (token count, clauses, conditions) are built once, and every score
+    is derived from them with array operations. The arithmetic mirrors the
+    scalar formulas of SemanticRequirementAnalyzer operation for operation, so
+    the results are bit-for-bit identical.
+    """
+
+    def __init__(self, matcher: KeywordMatcher, type_names: Sequence[str], priority_levels: Sequence[str]):
+        self.matcher = matcher
+        self.type_names = list(type_names)
+        self.priority_levels = list(priority_levels)
+        self.lexicon_names = list(matcher.lexicons)
+        self._column = {name: i for i, name in enumerate(self.lexicon_names)}
+        self._type_columns = [self._column[f"type:{name}"] for name in self.type_names]
+        self._priority_columns = [self._column[f"priority:{level}"] for level in self.priority_levels]
+
+    def keyword_matrix(self, hits_list: List[Set[str]]) -> np.ndarray:
+        counts = np.zeros((len(hits_list), len(self.lexicon_names)), dtype=np.int64)
+        for row, hits in enumerate(hits_list):
+            for name, count in self.matcher.count_hits(hits).items():
+                counts[row, self._column[name]] = count
+        return counts
+
+    @staticmethod
+    def feature_matrix(docs) -> np.ndarray:
+        """Token count, clause count and condition count per parsed requirement"""
+        features = np.zeros((len(docs), 3), dtype=np.int64)
+        for row, doc in enumerate(docs):
+            features[row, 0] = len(doc)
+            features[row, 1] = clause_count(doc)
+            features[row, 2] = sum(1 for token in doc if token.lemma_.lower() in CONDITION_LEMMAS)
+        return features
+
+    def score(self, hits_list: List[Set[str]], docs, metadatas: List[Dict]) -> ScoreBatch:
+        counts = self.keyword_matrix(hits_list)
+        features = self.feature_matrix(docs)
+        column = lambda name: counts[:, self._column[name]]
+
+        complexity = (
+            np.minimum(features[:, 0] / 50, 1.0)
+            + np.minimum(features[:, 1] / 3, 1.0)
+            + np.minimum(features[:, 2] / 2, 1.0)
+        ) / 3
+
+        ambiguity = np.minimum((column('ambiguous') + column('vague')) / 5, 1.0)
+        specificity = np.minimum(((column('specific') * 0.6) + (column('measurable') * 0.4)) / 8, 1.0)
+        testability = (specificity + np.minimum(column('success') / 3, 1.0) + (1.0 - ambiguity)) / 3
+
+        quality_score = (
+            (1 - complexity) * 0.2 +
+            (1 - ambiguity) * 0.3 +
+            testability * 0.3 +
+            specificity * 0.2
+        )
+
+        risk_flags = np.column_stack([
+            ambiguity > 0.7,
+            complexity > 0.8,
+            testability < 0.3,
+            (ambiguity > 0.5) & (complexity > 0.6),
+        ]) if len(counts) else np.zeros((0, len(RISK_LABELS)), dtype=bool)
+
+        # Type: first lexicon with the highest count, functional when nothing matched
+        type_counts = counts[:, self._type_columns]
+        best = type_counts.argmax(axis=1) if self.type_names else np.zeros(len(counts), dtype=np.int64)
+        requirement_types = [
+            self.type_names[b] if self.type_names and type_counts[row, b] > 0 else 'functional'
+            for row, b in enumerate(best)
+        ]
+
+        # Priority: explicit metadata, else the first level with any indicator
+        priority_hits = counts[:, self._priority_columns] > 0
+        priorities = []
+        for row, metadata in enumerate(metadatas):
+            if 'priority' in metadata:
+                priorities.append(metadata['priority'].lower())
+                continue
+            levels = np.flatnonzero(priority_hits[row])
+            priorities.append(self.priority_levels[levels[0]] if len(levels) else 'medium')
+
+        return ScoreBatch(
+            requirement_types=requirement_types,
+            priorities=priorities,
+            complexity=complexity,
+            ambiguity=ambiguity,
+            specificity=specificity,
+            testability=testability,
+            quality_score=quality_score,
+            risk_flags=risk_flags,
+        )
+
+
+def build_report(requirement_types: List[str], priorities: List[str], quality_score: np.ndarray,
+                 complexity: np.ndarray, testability: np.ndarray, ambiguity: np.ndarray,
+                 risk_counts: np.ndarray) -> Dict:
+    """Report aggregates computed directly from score arrays"""
+    if not len(requirement_types):
+        return {}
+
+    recommendations = []
+    ambiguous = int((ambiguity > 0.7).sum())
+    complex_count = int((complexity > 0.8).sum())
+    low_testability = int((testability < 0.3).sum())
+    if ambiguous:
+        recommendations.append(f"Clarify {ambiguous} ambiguous requirements")
+    if complex_count:
+        recommendations.append(f"Simplify {complex_count} highly complex requirements")
+    if low_testability:
+        recommendations.append(f"Make {low_testability} requirements more testable")
+    if not recommendations:
+        recommendations.append("Requirements quality is generally good")
+
+    return {
+        'summary': {
+            'total_requirements': len(requirement_types),
+            'average_quality_score': round(np.mean(quality_score), 2),
+            'average_complexity': round(np.mean(complexity), 2),
+            'average_testability': round(np.mean(testability), 2),
+            'total_risks_identified': int(np.sum(risk_counts)),
+            'high_risk_requirements': int((quality_score < 0.5).sum())
+        },
+        'distribution': {
+            'by_type': dict(Counter(requirement_types)),
+            'by_priority': dict(Counter(priorities))
+        },
+        'quality_analysis': {
+            'excellent_quality': int((quality_score >= 0.8).sum()),
+            'good_quality': int(((quality_score >= 0.6) & (quality_score < 0.8)).sum()),
+            'fair_quality': int(((quality_score >= 0.4) & (quality_score < 0.6)).sum()),
+            'poor_quality': int((quality_score < 0.4).sum())
+        },
+        'recommendations': recommendations
+    }
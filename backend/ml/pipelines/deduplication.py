@@ -0,0 +1,97 @@
+import numpy as np
+from typing import List
+
+
+class NearDuplicateDetector:
+    """
+    Greedy first-wins near-duplicate detection over sentence embeddings.
+
+    An item is kept unless it has cosine similarity above ``threshold`` with
+    an *earlier kept* item - the same result as walking the full n x n
+    similarity matrix row by row, but computed with blocked matrix products
+    of L2-normalized embeddings. Peak memory is ``block_size x block_size``
+    similarities instead of ``n x n``.
+
+    The detector is stateful: ``add`` can be called repeatedly with
+    consecutive batches of embeddings and compares each batch against
+    everything kept so far. ``unique_indices`` runs a fresh detection.
+    """
+
+    def __init__(self, threshold: float = 0.85, block_size: int = 1024):
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+        self.threshold = threshold
+        self.block_size = block_size
+        self.reset()
+
+    def reset(self):
+        self._kept = None
+        self._kept_count = 0
+
+    @property
+    def kept_count(self) -> int:
+        return self._kept_count
+
+    def unique_indices(self, embeddings) -> List[int]:
+        """Indices of the items kept by greedy first-wins deduplication"""
+        self.reset()
+        return self.add(embeddings)
+
+    def add(self, embeddings) -> List[int]:
+        """
+        Deduplicate a batch against itself and every previously kept item.
+        Returns the indices (within this batch) of the items that were kept.
+        """
+        vectors = self._normalize(embeddings)
+        kept_indices: List[int] = []
+
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start:start + self.block_size]
+            alive = self._not_similar_to_kept(block)
+
+            # Greedy pass inside the block, restricted to the survivors
+            candidates = np.flatnonzero(alive)
+            if len(candidates) > 1:
+                block_similarity = block[candidates] @ block[candidates].T
+                for a in range(len(candidates)):
+                    if not alive[candidates[a]]:
+                        continue
+                    duplicates = np.flatnonzero(block_similarity[a, a + 1:] > self.threshold) + a + 1
+                    alive[candidates[duplicates]] = False
+
+            self._append_kept(block[alive])
+            kept_indices.extend((start + np.flatnonzero(alive)).tolist())
+
+        return kept_indices
+
+    def _not_similar_to_kept(self, block: np.ndarray) -> np.ndarray:
+        alive = np.ones(len(block), dtype=bool)
+        for kept_start in range(0, self._kept_count, self.block_size):
+            kept = self._kept[kept_start:min(kept_start + self.block_size, self._kept_count)]
+            alive &= ~(block @ kept.T > self.threshold).any(axis=1)
+        return alive
+
+    def _append_kept(self, vectors: np.ndarray):
+        if not len(vectors):
+            return
+        if self._kept is None:
+            self._kept = np.empty((max(len(vectors), self.block_size), vectors.shape[1]), dtype=vectors.dtype)
+        needed = self._kept_count + len(vectors)
+        if needed > len(self._kept):
+            grown = np.empty((max(needed, 2 * len(self._kept)), self._kept.shape[1]), dtype=self._kept.dtype)
+            grown[:self._kept_count] = self._kept[:self._kept_count]
+            self._kept = grown
+        self._kept[self._kept_count:needed] = vectors
+        self._kept_count = needed
+
+    @staticmethod
+    def _normalize(embeddings) -> np.ndarray:
+        vectors = np.asarray(embeddings)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if not np.issubdtype(vectors.dtype, np.floating):
+            vectors = vectors.astype(np.float32)
+        norms = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+        # Zero vectors stay zero (similarity 0), matching sklearn's normalize
+        norms[norms == 0.0] = 1.0
+        return vectors / norms[:, np.newaxis]
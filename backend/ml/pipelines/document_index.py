@@ -0,0 +1,228 @@
+import re
+import hashlib
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+
+# Section headers
+SECTION_PATTERNS = [
+    r'#+\s*(.*?)(?=\n|$)',
+    r'\d+\.\d*\s*(.*?)(?=\n|$)',
+    r'^(?:FUNCTIONAL|NON-FUNCTIONAL|BUSINESS|TECHNICAL)\s+REQUIREMENTS',
+    r'^REQUIREMENTS?\s*$',
+    r'^SPECIFICATIONS?\s*$',
+    r'^SCOPE\s*$',
+]
+_SECTION_REGEXES = [re.compile(pattern, re.IGNORECASE) for pattern in SECTION_PATTERNS]
+
+SENTENCE_BREAK = re.compile(r'[.!?]+')
+NUMBERED_ITEM = re.compile(r'^(\d+)\.\s+', re.MULTILINE)
+
+_SPACES = re.compile(r' {2,}')
+_TABS = re.compile(r'\t+')
+_BLANK_LINES = re.compile(r'\n\s*\n')
+_REPLACEMENT_CHARS = re.compile('\ufffd+')
+
+# preprocess_text as an ordered list of substitutions, so offsets can be mapped through it
+_PREPROCESS_STEPS = [
+    # Remove excessive whitespace but preserve structure
+    (_SPACES, ' '),
+    (_TABS, ' '),
+    (_BLANK_LINES, '\n\n'),
+    # Fix common encoding issues
+    (_REPLACEMENT_CHARS, ''),
+]
+
+INDEX_VERSION = 2
+
+
+def match_section_header(line: str, patterns: List[str] = SECTION_PATTERNS) -> Optional[str]:
+    """Return the section name if the (stripped) line is a section header"""
+    regexes = _SECTION_REGEXES if patterns is SECTION_PATTERNS else [re.compile(p, re.IGNORECASE) for p in patterns]
+    for regex in regexes:
+        match = regex.match(line)
+        if match:
+            return match.group(1) if match.groups() else line
+    return None
+
+
+def preprocess_text(text: str) -> str:
+    """Clean and normalize text before extraction (whitespace and encoding fixes)"""
+    for regex, replacement in _PREPROCESS_STEPS:
+        text = regex.sub(replacement, text)
+    return text.strip()
+
+
+def _sub_with_offsets(regex, replacement: str, text: str, offsets: List[int]) -> Tuple[str, List[int]]:
+    """regex.sub plus the new position of each (sorted) offset; offsets inside a match move to its start"""
+    pieces = []
+    mapped = []
+    last = 0
+    shift = 0
+    k = 0
+    for match in regex.finditer(text):
+        start, end = match.span()
+        while k < len(offsets) and offsets[k] < end:
+            offset = offsets[k]
+            mapped.append(offset - shift if offset < start else start - shift + min(offset - start, len(replacement)))
+            k += 1
+        pieces.append(text[last:start])
+        pieces.append(replacement)
+        last = end
+        shift += (end - start) - len(replacement)
+    pieces.append(text[last:])
+    mapped.extend(offset - shift for offset in offsets[k:])
+    return ''.join(pieces), mapped
+
+
+def preprocess_with_offsets(text: str, offsets: List[int]) -> Tuple[str, List[int]]:
+    """
+    preprocess_text(text) together with the given non-decreasing character
+    offsets of text translated to offsets in the preprocessed text.
+    """
+    offsets = list(offsets)
+    for regex, replacement in _PREPROCESS_STEPS:
+        text, offsets = _sub_with_offsets(regex, replacement, text, offsets)
+    stripped = text.strip()
+    lead = len(text) - len(text.lstrip())
+    return stripped, [min(max(offset - lead, 0), len(stripped)) for offset in offsets]
+
+
+def page_for_offset(page_offsets: List[int], offset: int) -> Optional[int]:
+    """1-based number of the page containing a character offset, given each page's start offset"""
+    if not page_offsets:
+        return None
+    return max(bisect_right(page_offsets, offset), 1)
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Offsets of the pieces re.split(r'[.!?]+', text) returns, empty pieces included"""
+    spans = []
+    start = 0
+    for match in SENTENCE_BREAK.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+    return spans
+
+
+def split_sentences(text: str) -> List[str]:
+    return [text[start:end] for start, end in sentence_spans(text)]
+
+
+class DocumentIndex:
+    """
+    Structural index of a preprocessed document, built in a single pass.
+
+    Holds line offsets, section spans (by line), sentence offsets and the
+    numbered-item table, so extraction strategies and metadata extraction
+    slice the text instead of re-scanning it. The index can be persisted with
+    ``to_dict`` and restored with ``from_dict``; ``matches`` tells whether it
+    still describes a given text. For paginated sources (PDF) it also keeps
+    the start offset of every page, so offsets can be mapped to page numbers.
+    """
+
+    def __init__(self, length: int, digest: str, line_starts: List[int], sections: List[Dict[str, Any]],
+                 sentences: List[Tuple[int, int]], numbered_items: List[Tuple[str, int, int]],
+                 page_offsets: Optional[List[int]] = None):
+        self.length = length
+        self.digest = digest
+        self.line_starts = line_starts
+        # [{'name', 'header_line' (None for the implicit "Main" section), 'start_line', 'end_line'}]
+        self.sections = sections
+        self.sentences = sentences
+        # (number, content start, content end)
+        self.numbered_items = numbered_items
+        self.page_offsets = page_offsets
+
+    @classmethod
+    def build(cls, text: str, section_patterns: List[str] = SECTION_PATTERNS,
+              page_offsets: Optional[List[int]] = None) -> "DocumentIndex":
+        """page_offsets are page start offsets in this (preprocessed) text"""
+        line_starts = [0]
+        line_starts.extend(match.end() for match in re.finditer('\n', text))
+
+        sections = [{'name': "Main", 'header_line': None, 'start_line': 0, 'end_line': len(line_starts)}]
+        # Boundaries that end a numbered item: the next item or a '#' line
+        item_boundaries = []
+        for line_no, start in enumerate(line_starts):
+            end = line_starts[line_no + 1] - 1 if line_no + 1 < len(line_starts) else len(text)
+            line = text[start:end]
+            if line.startswith('#'):
+                item_boundaries.append(start)
+
+            stripped = line.strip()
+            if not stripped:
+                continue
+            name = match_section_header(stripped, section_patterns)
+            if name is not None:
+                sections[-1]['end_line'] = line_no
+                sections.append({'name': name, 'header_line': line_no, 'start_line': line_no + 1,
+                                 'end_line': len(line_starts)})
+
+        items = [(match.group(1), match.start(), match.end()) for match in NUMBERED_ITEM.finditer(text)]
+        item_boundaries = sorted(item_boundaries + [start for _, start, _ in items])
+        numbered_items = []
+        for number, _, content_start in items:
+            position = bisect_left(item_boundaries, content_start)
+            content_end = item_boundaries[position] if position < len(item_boundaries) else len(text)
+            numbered_items.append((number, content_start, content_end))
+
+        return cls(len(text), text_digest(text), line_starts, sections, sentence_spans(text), numbered_items,
+                   page_offsets)
+
+    def matches(self, text: str) -> bool:
+        return len(text) == self.length and text_digest(text) == self.digest
+
+    def page_at(self, offset: int) -> Optional[int]:
+        return page_for_offset(self.page_offsets, offset)
+
+    def line(self, text: str, line_no: int) -> str:
+        start = self.line_starts[line_no]
+        end = self.line_starts[line_no + 1] - 1 if line_no + 1 < len(self.line_starts) else len(text)
+        return text[start:end]
+
+    def iter_sentences(self, text: str) -> Iterator[str]:
+        for start, end in self.sentences:
+            yield text[start:end]
+
+    def section_names(self) -> List[str]:
+        """Header names in document order"""
+        return [section['name'] for section in self.sections if section['header_line'] is not None]
+
+    def sections_content(self, text: str) -> Dict[str, List[str]]:
+        """Meaningful (stripped, > 10 chars) non-header lines grouped by section name"""
+        content: Dict[str, List[str]] = {}
+        for section in self.sections:
+            for line_no in range(section['start_line'], section['end_line']):
+                line = self.line(text, line_no).strip()
+                if len(line) > 10:
+                    content.setdefault(section['name'], []).append(line)
+        return content
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': INDEX_VERSION,
+            'length': self.length,
+            'digest': self.digest,
+            'line_starts': self.line_starts,
+            'sections': self.sections,
+            'sentences': [list(span) for span in self.sentences],
+            'numbered_items': [list(item) for item in self.numbered_items],
+            'page_offsets': self.page_offsets,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["DocumentIndex"]:
+        """Restore a persisted index, or None if it was written by another index version"""
+        if not data or data.get('version') != INDEX_VERSION:
+            return None
+        return cls(
+            data['length'], data['digest'], data['line_starts'], data['sections'],
+            [tuple(span) for span in data['sentences']],
+            [tuple(item) for item in data['numbered_items']],
+            data.get('page_offsets')
+        )
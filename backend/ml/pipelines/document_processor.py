@@ -1,24 +1,180 @@
 import pdfplumber
+import pypdfium2 as pdfium
 from docx import Document
 import aiofiles
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import re
 import os
+import math
+import threading
+import unicodedata
 from pathlib import Path
 import asyncio
 import openai
 import json
+from typing import Optional
+from .document_index import DocumentIndex, preprocess_text, preprocess_with_offsets
+from .extraction_pool import get_extraction_pool
+
+# Smallest page range handed to one extraction task; opening the PDF is repeated per task
+PDF_MIN_PAGES_PER_TASK = int(os.getenv("PDF_MIN_PAGES_PER_TASK", "16"))
+
+# pdfium: fast plain text. pdfplumber: layout analysis. auto: pdfium, with
+# pdfplumber for pages where pdfium returns nothing or garbage.
+PDF_BACKENDS = ('auto', 'pdfium', 'pdfplumber')
+DEFAULT_PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")
+# Share of unusable characters above which a pdfium page counts as garbled
+GARBLED_CHAR_RATIO = 0.1
+
+# PDFium is not thread-safe; serialize it within a process
+_pdfium_lock = threading.Lock()
+
+
+def validate_pdf_backend(backend: str) -> str:
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{backend}', expected one of {list(PDF_BACKENDS)}")
+    return backend
+
+
+def pdf_page_count(file_path: str, backend: str = DEFAULT_PDF_BACKEND) -> int:
+    try:
+        if backend == 'pdfplumber':
+            with pdfplumber.open(file_path) as pdf:
+                return len(pdf.pages)
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    except Exception as e:
+        raise Exception(f"PDF extraction failed: {str(e)}")
+
+
+def _pdfplumber_pages(file_path: str, page_numbers: List[int]) -> List[str]:
+    with pdfplumber.open(file_path) as pdf:
+        return [pdf.pages[number].extract_text() or "" for number in page_numbers]
+
+
+def _normalize_pdfium_text(text: str) -> str:
+    # pdfium ends lines with \r\n and marks a hyphen at a line break with U+FFFE (or U+0002)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = text.replace('\ufffe', '-\n').replace('\x02', '-\n')
+    return text.strip()
+
+
+def _pdfium_pages(file_path: str, page_numbers: List[int]) -> List[str]:
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            texts = []
+            for number in page_numbers:
+                page = pdf[number]
+                textpage = page.get_textpage()
+                texts.append(_normalize_pdfium_text(textpage.get_text_range()))
+                textpage.close()
+                page.close()
+            return texts
+        finally:
+            pdf.close()
+
+
+def is_garbled(text: str) -> bool:
+    """Empty page text, or too many replacement, control, private-use or unassigned characters"""
+    chars = [char for char in text if not char.isspace()]
+    if not chars:
+        return True
+    unusable = sum(1 for char in chars if char == '\ufffd' or unicodedata.category(char) in ('Cc', 'Co', 'Cn'))
+    return unusable / len(chars) > GARBLED_CHAR_RATIO
+
+
+def extract_pdf_pages(file_path: str, start: int = 0, end: Optional[int] = None,
+                      backend: str = DEFAULT_PDF_BACKEND) -> List[str]:
+    """Text of pages [start, end) of a PDF, '' for pages without text (blocking; runs in the extraction pool)"""
+    try:
+        if end is None:
+            end = pdf_page_count(file_path, backend)
+        page_numbers = list(range(start, end))
+        if backend == 'pdfplumber':
+            return _pdfplumber_pages(file_path, page_numbers)
+
+        texts = _pdfium_pages(file_path, page_numbers)
+        if backend == 'auto':
+            retry = [i for i, text in enumerate(texts) if is_garbled(text)]
+            if retry:
+                fallback = _pdfplumber_pages(file_path, [page_numbers[i] for i in retry])
+                for i, text in zip(retry, fallback):
+                    texts[i] = text
+        return texts
+    except Exception as e:
+        raise Exception(f"PDF extraction failed: {str(e)}")
+
+
+def join_pages(page_texts: List[str]) -> Tuple[str, List[int]]:
+    """Document text from page texts plus the character offset at which each page starts"""
+    pieces = []
+    starts = []
+    length = 0
+    for page_text in page_texts:
+        starts.append(length)
+        if page_text:
+            pieces.append(page_text + "\n")
+            length += len(page_text) + 1
+    text = "".join(pieces)
+    stripped = text.strip()
+    lead = len(text) - len(text.lstrip())
+    return stripped, [min(max(start - lead, 0), len(stripped)) for start in starts]
+
+
+def extract_pdf_text(file_path: str, backend: str = DEFAULT_PDF_BACKEND) -> str:
+    """Extract text from PDF serially (blocking)"""
+    return join_pages(extract_pdf_pages(file_path, backend=backend))[0]
+
+
+def extract_docx_text(file_path: str) -> str:
+    """Extract text from DOCX (blocking; runs in the extraction pool)"""
+    try:
+        # ✅ First verify file exists and is accessible
+        if not os.path.exists(file_path):
+            raise Exception(f"File not found: {file_path}")
+
+        # ✅ Check file size to ensure it's not empty/corrupt
+        file_size = os.path.getsize(file_path)
+        if file_size == 0:
+            raise Exception("File is empty or corrupted")
+
+        # ✅ Verify it's actually a DOCX file
+        if not file_path.lower().endswith('.docx'):
+            raise Exception("File is not a DOCX document")
+
+        # ✅ Use absolute path and ensure proper file permissions
+        absolute_path = os.path.abspath(file_path)
+
+        doc = Document(absolute_path)
+        text = ""
+        for paragraph in doc.paragraphs:
+            if paragraph.text and paragraph.text.strip():
+                text += paragraph.text + "\n"
+
+        if not text.strip():
+            raise Exception("No extractable text found in DOCX document")
+
+        return text.strip()
+
+    except Exception as e:
+        raise Exception(f"DOCX extraction failed: {str(e)}")
+
 
 class AdvancedDocumentProcessor:
-    def __init__(self, openrouter_api_key: str = None):
+    def __init__(self, openrouter_api_key: str = None, pdf_backend: str = None):
         self.supported_formats = ['.pdf', '.docx', '.txt']
+        self.pdf_backend = validate_pdf_backend(pdf_backend or DEFAULT_PDF_BACKEND)
     
     async def process_document(self, file_path: str) -> Dict:
         """Extract text from document and then extract requirements using AI"""
         try:
             # Step 1: Extract raw text from document
-            text = await self._extract_text(file_path)
-            print(f"Extracted text: {text}")
+            text, page_offsets = await self._extract_text_with_pages(file_path)
             if not text.strip():
                 return {
                     'success': False,
@@ -26,12 +182,24 @@ class AdvancedDocumentProcessor:
                     'raw_text': '',
                     'metadata': {}
                 }
-            metadata = self._extract_metadata(text, file_path)
+            # Structural index of the preprocessed text, shared with the analyzer
+            if page_offsets is not None:
+                cleaned_text, cleaned_page_offsets = preprocess_with_offsets(text, page_offsets)
+            else:
+                cleaned_text, cleaned_page_offsets = preprocess_text(text), None
+            index = DocumentIndex.build(cleaned_text, page_offsets=cleaned_page_offsets)
+            metadata = self._extract_metadata(text, file_path, index, cleaned_text)
+            if page_offsets is not None:
+                # Page start offsets into raw_text; see document_index.page_for_offset
+                metadata['page_count'] = len(page_offsets)
+                metadata['page_offsets'] = page_offsets
+                metadata['pdf_backend'] = self.pdf_backend
             
             return {
                 'success': True,
                 'raw_text': text,
-                'metadata': metadata
+                'metadata': metadata,
+                'index': index
             }
             
         except Exception as e:
@@ -44,15 +212,20 @@ class AdvancedDocumentProcessor:
     
     async def _extract_text(self, file_path: str) -> str:
         """Extract raw text from document"""
+        text, _ = await self._extract_text_with_pages(file_path)
+        return text
+    
+    async def _extract_text_with_pages(self, file_path: str) -> Tuple[str, Optional[List[int]]]:
+        """Raw text plus page start offsets (None for formats without pages)"""
         file_path = await self._validate_file_path(file_path)
         file_extension = Path(file_path).suffix.lower()
         
         if file_extension == '.pdf':
             return await self._extract_from_pdf(file_path)
         elif file_extension == '.docx':
-            return await self._extract_from_docx(file_path)
+            return await self._extract_from_docx(file_path), None
         elif file_extension == '.txt':
-            return await self._extract_from_text(file_path)
+            return await self._extract_from_text(file_path), None
         else:
             raise ValueError(f"Unsupported format: {file_extension}")
     
@@ -73,51 +246,24 @@ class AdvancedDocumentProcessor:
         
         return file_path
     
-    async def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        text = ""
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            return text.strip()
-        except Exception as e:
-            raise Exception(f"PDF extraction failed: {str(e)}")
+    async def _extract_from_pdf(self, file_path: str) -> Tuple[str, List[int]]:
+        """
+        Extract text from PDF with page ranges spread over the extraction
+        pool's workers, joined in page order. Returns the text and the
+        character offset at which each page starts.
+        """
+        pool = get_extraction_pool()
+        page_count = await pool.run(pdf_page_count, file_path, self.pdf_backend)
+        pages_per_task = max(PDF_MIN_PAGES_PER_TASK, math.ceil(page_count / pool.workers))
+        ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        page_ranges = await asyncio.gather(*(
+            pool.run(extract_pdf_pages, file_path, start, end, self.pdf_backend) for start, end in ranges
+        ))
+        return join_pages([page_text for page_range in page_ranges for page_text in page_range])
     
     async def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX"""
-        try:
-            # ✅ First verify file exists and is accessible
-            if not os.path.exists(file_path):
-                raise Exception(f"File not found: {file_path}")
-            
-            # ✅ Check file size to ensure it's not empty/corrupt
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
-                raise Exception("File is empty or corrupted")
-            
-            # ✅ Verify it's actually a DOCX file
-            if not file_path.lower().endswith('.docx'):
-                raise Exception("File is not a DOCX document")
-            
-            # ✅ Use absolute path and ensure proper file permissions
-            absolute_path = os.path.abspath(file_path)
-            
-            doc = Document(absolute_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                if paragraph.text and paragraph.text.strip():
-                    text += paragraph.text + "\n"
-            
-            if not text.strip():
-                raise Exception("No extractable text found in DOCX document")
-                
-            return text.strip()
-            
-        except Exception as e:
-            raise Exception(f"DOCX extraction failed: {str(e)}")
+        """Extract text from DOCX in the extraction pool"""
+        return await get_extraction_pool().run(extract_docx_text, file_path)
     
     async def _extract_from_text(self, file_path: str) -> str:
         """Extract text from TXT"""
@@ -132,10 +278,14 @@ class AdvancedDocumentProcessor:
                 continue
         raise ValueError("Could not decode text file")
     
-    def _extract_metadata(self, text: str, file_path: str) -> Dict:
+    def _extract_metadata(self, text: str, file_path: str, index: Optional[DocumentIndex] = None,
+                          cleaned_text: Optional[str] = None) -> Dict:
         """Extract comprehensive metadata from document"""
         words = text.split()
-        sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+        if index is None or cleaned_text is None:
+            cleaned_text = preprocess_text(text)
+            index = DocumentIndex.build(cleaned_text)
+        sentences = [s.strip() for s in index.iter_sentences(cleaned_text) if s.strip()]
         
         return {
             'file_path': file_path,
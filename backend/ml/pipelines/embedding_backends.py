@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import logging
+import threading
+import numpy as np
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+DEFAULT_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+DEFAULT_ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx_models")
+DEFAULT_MAX_TOKENS_PER_BATCH = int(os.getenv("EMBEDDING_MAX_TOKENS_PER_BATCH", "8192"))
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "128"))
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+BACKEND_CONFIG_FILE = "backend_config.json"
+
+
+def validate_backend(backend: str) -> str:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {list(EMBEDDING_BACKENDS)}")
+    return backend
+
+
+def configure_embedding_backends(backend: str = DEFAULT_BACKEND, onnx_model_dir: str = DEFAULT_ONNX_MODEL_DIR,
+                                 max_tokens_per_batch: int = DEFAULT_MAX_TOKENS_PER_BATCH,
+                                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+    """Set the process-wide embedding defaults (called once at startup)"""
+    global DEFAULT_BACKEND, DEFAULT_ONNX_MODEL_DIR, DEFAULT_MAX_TOKENS_PER_BATCH, DEFAULT_MAX_BATCH_SIZE
+    DEFAULT_BACKEND = validate_backend(backend)
+    DEFAULT_ONNX_MODEL_DIR = onnx_model_dir
+    DEFAULT_MAX_TOKENS_PER_BATCH = max_tokens_per_batch
+    DEFAULT_MAX_BATCH_SIZE = max_batch_size
+
+
+def embedding_backend_settings() -> Dict[str, Any]:
+    """Current process-wide embedding defaults, as keyword arguments for configure_embedding_backends"""
+    return {
+        'backend': DEFAULT_BACKEND,
+        'onnx_model_dir': DEFAULT_ONNX_MODEL_DIR,
+        'max_tokens_per_batch': DEFAULT_MAX_TOKENS_PER_BATCH,
+        'max_batch_size': DEFAULT_MAX_BATCH_SIZE,
+    }
+
+
+def cache_model_name(model_name: str, backend: str) -> str:
+    """
+    Name under which a backend's vectors are cached. Torch keeps the bare
+    model name so existing cache entries stay valid; ONNX variants drift
+    slightly and get their own namespace.
+    """
+    return model_name if backend == 'torch' else f"{model_name}@{backend}"
+
+
+class TorchEmbeddingBackend:
+    """SentenceTransformer (PyTorch) backend"""
+
+    name = 'torch'
+
+    def __init__(self, model):
+        self.model = model
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True, **kwargs),
+                          dtype=np.float32)
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            return [len(text) for text in texts]
+        encoded = tokenizer(list(texts), truncation=True, max_length=self.model.max_seq_length)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+
+def export_onnx_model(model_name: str, export_dir: str, quantize: bool = False) -> str:
+    """
+    Export a SentenceTransformer's transformer to ONNX (once), together with
+    its tokenizer and pooling configuration, and optionally write a dynamic
+    int8 quantized copy. Needs torch and sentence-transformers only for the
+    export itself. Returns the path of the requested model file.
+    """
+    model_path = os.path.join(export_dir, ONNX_MODEL_FILE)
+    if not os.path.exists(model_path):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        os.makedirs(export_dir, exist_ok=True)
+        sentence_model = SentenceTransformer(model_name, device="cpu")
+        transformer = sentence_model[0].auto_model.eval()
+        tokenizer = sentence_model.tokenizer
+        tokenizer.save_pretrained(export_dir)
+
+        encoded = tokenizer(["An example requirement sentence."], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in encoded]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(encoded[name] for name in input_names),
+                model_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                dynamo=False,
+            )
+
+        pooling = sentence_model[1] if len(sentence_model) > 1 else None
+        config = {
+            'model_name': model_name,
+            'max_seq_length': sentence_model.max_seq_length,
+            'pooling': 'cls' if pooling is not None and getattr(pooling, 'pooling_mode_cls_token', False) else 'mean',
+            'normalize': any(type(module).__name__ == 'Normalize' for module in sentence_model),
+        }
+        with open(os.path.join(export_dir, BACKEND_CONFIG_FILE), "w") as config_file:
+            json.dump(config, config_file, indent=2)
+
+    if not quantize:
+        return model_path
+
+    quantized_path = os.path.join(export_dir, ONNX_INT8_MODEL_FILE)
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        logger.info(f"Quantizing {model_path} to int8")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class OnnxEmbeddingBackend:
+    """
+    ONNX Runtime backend: Hugging Face tokenizer plus the exported transformer,
+    followed by the same pooling and normalization as the SentenceTransformer.
+    Runs without torch once the model has been exported.
+    """
+
+    def __init__(self, model_name: str, model_dir: str = DEFAULT_ONNX_MODEL_DIR, quantize: bool = False,
+                 threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.name = 'onnx-int8' if quantize else 'onnx'
+        export_dir = os.path.join(model_dir, model_name.replace('/', '__'))
+        self.model_path = export_onnx_model(model_name, export_dir, quantize)
+
+        with open(os.path.join(export_dir, BACKEND_CONFIG_FILE)) as config_file:
+            self.config: Dict[str, Any] = json.load(config_file)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(export_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config['max_seq_length'])
+        pad_id = self.tokenizer.token_to_id("[PAD]")
+        self.tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 0, pad_token="[PAD]")
+        # Unpadded copy for measuring token lengths
+        self._length_tokenizer = Tokenizer.from_file(os.path.join(export_dir, "tokenizer.json"))
+        self._length_tokenizer.enable_truncation(max_length=self.config['max_seq_length'])
+        self._length_tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.model_bytes = os.path.getsize(self.model_path)
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        texts = list(texts)
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+            feeds = {
+                'input_ids': np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+                'attention_mask': mask,
+            }
+            if 'token_type_ids' in self.input_names:
+                feeds['token_type_ids'] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+            batches.append(self._pool(hidden, mask))
+
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(batches).astype(np.float32, copy=False)
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        return [len(encoding.ids) for encoding in self._length_tokenizer.encode_batch(list(texts))]
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.config.get('pooling') == 'cls':
+            pooled = hidden[:, 0]
+        else:
+            weights = mask[:, :, np.newaxis].astype(hidden.dtype)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if self.config.get('normalize', True):
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled = pooled / np.clip(norms, 1e-12, None)
+        return pooled
+
+
+class BucketedEncoder:
+    """
+    Length-bucketed batching in front of an embedding backend.
+
+    Texts are sorted by token length and grouped into batches under a token
+    budget (batch size x longest sequence), so short sentences are no longer
+    padded to the length of a 500-word requirement block. Results come back
+    in the original order. Throughput and padding counters are kept for the
+    pipeline health endpoint.
+    """
+
+    def __init__(self, backend, max_tokens_per_batch: int = None, max_batch_size: int = None):
+        self.backend = backend
+        self.max_tokens_per_batch = max_tokens_per_batch or DEFAULT_MAX_TOKENS_PER_BATCH
+        self.max_batch_size = max_batch_size or DEFAULT_MAX_BATCH_SIZE
+        self._lock = threading.Lock()
+        self.texts = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def batches_for(self, lengths: List[int]) -> List[List[int]]:
+        """Indices grouped into batches, longest texts first"""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+        batches = []
+        current: List[int] = []
+        for i in order:
+            # Sorted descending, so the first text of a batch sets its padded width
+            width = lengths[current[0]] if current else lengths[i]
+            if current and (len(current) >= self.max_batch_size or (len(current) + 1) * width > self.max_tokens_per_batch):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        token_lengths = getattr(self.backend, 'token_lengths', None)
+        if token_lengths is None:
+            # Rough estimate for backends without a tokenizer
+            return [len(text) // 4 for text in texts]
+        return token_lengths(texts)
+
+    def encode(self, texts: List[str], batch_size: int = None, **kwargs) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        started = time.perf_counter()
+        lengths = [max(length, 1) for length in self._token_lengths(texts)]
+        batches = self.batches_for(lengths)
+
+        result = None
+        for batch in batches:
+            vectors = self.backend.encode([texts[i] for i in batch], batch_size=len(batch), **kwargs)
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[batch] = vectors
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.texts += len(texts)
+            self.tokens += sum(lengths)
+            self.padded_tokens += sum(len(batch) * lengths[batch[0]] for batch in batches)
+            self.batches += len(batches)
+            self.seconds += elapsed
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': getattr(self.backend, 'name', type(self.backend).__name__),
+                'max_tokens_per_batch': self.max_tokens_per_batch,
+                'max_batch_size': self.max_batch_size,
+                'texts': self.texts,
+                'batches': self.batches,
+                'tokens': self.tokens,
+                'padding_ratio': round(1 - self.tokens / self.padded_tokens, 4) if self.padded_tokens else 0.0,
+                'encode_seconds': round(self.seconds, 3),
+                'texts_per_second': round(self.texts / self.seconds, 1) if self.seconds else 0.0,
+                'tokens_per_second': round(self.tokens / self.seconds, 1) if self.seconds else 0.0,
+            }
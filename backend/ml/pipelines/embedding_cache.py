@@ -0,0 +1,204 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+import numpy as np
+from typing import List, Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.sqlite3")
+DEFAULT_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+DEFAULT_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of a text; the tokenizer ignores the difference anyway"""
+    return " ".join(text.split())
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding store.
+
+    Entries are keyed by (model name, sha256 of the normalized text) and kept in
+    a single SQLite file as raw float32/float16 blobs. When the store grows past
+    ``max_entries`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 dtype: str = DEFAULT_DTYPE):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.path = path
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                dtype TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, digest)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached float32 vectors for texts, None where missing"""
+        digests = [text_digest(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(digests))
+
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT digest, dtype, vector FROM embeddings WHERE model = ? AND digest IN ({placeholders})",
+                    [model_name, *chunk]
+                ).fetchall()
+                for digest, dtype, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND digest = ?",
+                    [(now, model_name, digest) for digest in found]
+                )
+                self._conn.commit()
+
+            results = [found.get(digest) for digest in digests]
+            hit_count = sum(1 for vector in results if vector is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], vectors) -> None:
+        """Store vectors for texts, evicting least recently used entries if needed"""
+        if not len(texts):
+            return
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            vector = np.asarray(vector, dtype=self.dtype)
+            rows.append((model_name, text_digest(text), vector.shape[-1], self.dtype.name, vector.tobytes(), now))
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, digest, dim, dtype, vector, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._entries += self._conn.total_changes - before
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Evict down to 90% so we do not pay an eviction on every insert
+        target = int(self.max_entries * 0.9)
+        excess = self._entries - target
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self.evictions += excess
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logger.info(f"Evicted {excess} embeddings from cache {self.path}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'dtype': self.dtype.name,
+            'entries': self._entries,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddingModel:
+    """
+    Read-through wrapper: only texts missing from the cache reach the model.
+    Vectors are keyed by model and text, so encode takes no options that
+    could change them
+    """
+
+    def __init__(self, model, model_name: str, cache: EmbeddingCache):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        cached = self.cache.get_many(self.model_name, texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+
+        computed: Dict[str, np.ndarray] = {}
+        if missing:
+            vectors = np.asarray(self.model.encode(missing), dtype=np.float32)
+            self.cache.put_many(self.model_name, missing, vectors)
+            computed = dict(zip(missing, vectors))
+
+        return np.vstack([
+            vector if vector is not None else computed[text]
+            for text, vector in zip(texts, cached)
+        ]).astype(np.float32, copy=False)
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache, created on first use"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
+
+
+def configure_embedding_cache(path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                              dtype: str = DEFAULT_DTYPE) -> EmbeddingCache:
+    """Replace the process-wide embedding cache (called once at startup)"""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is not None:
+            _embedding_cache.close()
+        _embedding_cache = EmbeddingCache(path, max_entries, dtype)
+    return _embedding_cache
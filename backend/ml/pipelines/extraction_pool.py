@@ -0,0 +1,182 @@
+import os
+import time
+import atexit
+import asyncio
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_EXECUTORS = ('thread', 'process')
+DEFAULT_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_QUEUE_SIZE = int(os.getenv("EXTRACTION_QUEUE_SIZE", "16"))
+DEFAULT_EXECUTOR = os.getenv("EXTRACTION_EXECUTOR", "process")
+
+# Recent samples kept for the percentiles reported by stats()
+_SAMPLE_WINDOW = 1000
+
+
+def _timed_call(fn: Callable, args: Tuple) -> Tuple[float, float, Any]:
+    """Runs inside the worker: (wall-clock start, execution seconds, result)"""
+    started = time.time()
+    began = time.perf_counter()
+    result = fn(*args)
+    return started, time.perf_counter() - began, result
+
+
+def _percentile(samples, q: float) -> float:
+    return round(float(np.percentile(samples, q)), 4) if samples else 0.0
+
+
+class ExtractionPool:
+    """
+    Runs blocking document text extraction (pdfplumber, python-docx) off the
+    event loop.
+
+    At most ``workers`` extractions execute at once and at most
+    ``queue_size`` more wait in the executor; further callers wait
+    asynchronously for a slot, so a burst of uploads cannot pile unbounded
+    work onto the pool. The process executor sidesteps the GIL (pdfminer is
+    pure Python); the thread executor avoids process start-up. Queue wait
+    (submit to start of execution, including waiting for a slot) and
+    execution time are recorded for the pipeline health endpoint.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 executor: str = DEFAULT_EXECUTOR):
+        if executor not in EXTRACTION_EXECUTORS:
+            raise ValueError(f"Unknown extraction executor '{executor}', expected one of {list(EXTRACTION_EXECUTORS)}")
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.executor_type = executor
+        self._executor = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.queue_wait_seconds = 0.0
+        self.exec_seconds = 0.0
+        self._queue_waits = deque(maxlen=_SAMPLE_WINDOW)
+        self._exec_times = deque(maxlen=_SAMPLE_WINDOW)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    # spawn: forking a process that already holds torch/spaCy state is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extraction")
+            return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to one loop; recreate when called from another
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.workers + self.queue_size)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) in the pool; fn and args must be picklable for the process executor"""
+        submitted = time.time()
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        try:
+            async with self._get_semaphore():
+                loop = asyncio.get_running_loop()
+                started, elapsed, result = await loop.run_in_executor(self._get_executor(), _timed_call, fn, args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        queue_wait = max(0.0, started - submitted)
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_seconds += queue_wait
+            self.exec_seconds += elapsed
+            self._queue_waits.append(queue_wait)
+            self._exec_times.append(elapsed)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queue_waits = list(self._queue_waits)
+            exec_times = list(self._exec_times)
+            finished = self.completed
+            return {
+                'executor': self.executor_type,
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'in_flight': self.in_flight,
+                'queue_wait_seconds': {
+                    'mean': round(self.queue_wait_seconds / finished, 4) if finished else 0.0,
+                    'p50': _percentile(queue_waits, 50),
+                    'p95': _percentile(queue_waits, 95),
+                    'max': round(max(queue_waits), 4) if queue_waits else 0.0,
+                },
+                'exec_seconds': {
+                    'mean': round(self.exec_seconds / finished, 4) if finished else 0.0,
+                    'p50': _percentile(exec_times, 50),
+                    'p95': _percentile(exec_times, 95),
+                    'max': round(max(exec_times), 4) if exec_times else 0.0,
+                },
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_extraction_pool: Optional[ExtractionPool] = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ExtractionPool()
+        return _extraction_pool
+
+
+def configure_extraction_pool(workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                              executor: str = DEFAULT_EXECUTOR) -> ExtractionPool:
+    """Replace the process-wide extraction pool (called once at startup)"""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown()
+        _extraction_pool = ExtractionPool(workers, queue_size, executor)
+        return _extraction_pool
+
+
+def shutdown_extraction_pool():
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown()
+
+
+atexit.register(shutdown_extraction_pool)
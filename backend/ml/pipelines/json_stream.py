@@ -0,0 +1,91 @@
+import json
+from typing import Any, Iterable, List, Tuple
+
+_OPENERS = '{['
+_CLOSERS = '}]'
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON object of the form
+    ``{"key": [item, item, ...], ...}``.
+
+    Text is fed in arbitrary chunks; ``feed`` returns the ``(key, item)``
+    pairs of every element of a top-level array listed in ``keys`` that
+    completed within the chunk. Only the element being read is buffered,
+    never the whole response. Text around the object (e.g. a markdown code
+    fence) and members with other keys are skipped.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        self.depth = 0
+        self.finished = False
+        self._in_string = False
+        self._escape = False
+        self._string = []  # Characters of the current string while at the top level (object keys)
+        self._last_string = None
+        self._key = None
+        self._array_key = None  # Set while inside a tracked top-level array
+        self._element = []  # Pieces of the array element being read
+        self._capturing = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        items = []
+        start = 0 if self._capturing else None
+        for position, char in enumerate(chunk):
+            if self.finished:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self.depth == 1:
+                        self._last_string = ''.join(self._string)
+                elif self.depth == 1:
+                    self._string.append(char)
+                continue
+
+            in_array = self._array_key is not None and self.depth == 2
+            if in_array and char in ',]':
+                if self._capturing:
+                    self._element.append(chunk[start:position])
+                    items.append((self._array_key, json.loads(''.join(self._element))))
+                    self._element = []
+                    self._capturing = False
+                    start = None
+            elif in_array and not self._capturing and not char.isspace():
+                self._capturing = True
+                start = position
+
+            if char == '"':
+                self._in_string = True
+                self._string = []
+            elif char in _OPENERS:
+                if self.depth == 1 and char == '[' and self._key in self.keys:
+                    self._array_key = self._key
+                self.depth += 1
+            elif char in _CLOSERS:
+                if self.depth == 0:
+                    continue
+                self.depth -= 1
+                if self.depth == 1:
+                    self._array_key = None
+                elif self.depth == 0:
+                    self.finished = True
+            elif char == ':' and self.depth == 1:
+                self._key = self._last_string
+            elif char == ',' and self.depth == 1:
+                self._key = None
+
+        if self._capturing and start is not None:
+            self._element.append(chunk[start:])
+        return items
+
+    def close(self):
+        """Raise if the stream ended before the top-level object was complete"""
+        if not self.finished:
+            raise ValueError("Truncated JSON stream: the top-level object was not closed")
@@ -0,0 +1,55 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """
+    Scan text once and count hits for several keyword lexicons at the same time.
+
+    Matching follows the semantics of ``keyword in text.lower()``: a keyword is
+    a hit when it occurs anywhere as a substring, and every lexicon counts the
+    number of *distinct* keywords that hit. All keywords are compiled into one
+    longest-first alternation wrapped in a lookahead, so each position of the
+    text is tried once and yields the longest keyword starting there; shorter
+    keywords that start at the same position are exactly the prefixes of that
+    match, which are precomputed.
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        self.lexicons: Dict[str, List[str]] = {name: list(keywords) for name, keywords in lexicons.items()}
+
+        keywords = sorted({kw.lower() for kws in self.lexicons.values() for kw in kws}, key=lambda kw: (-len(kw), kw))
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in keywords) + "))") if keywords else None
+
+        # Every keyword that is a prefix of (or equal to) the longest match at a position
+        self._prefix_closure: Dict[str, Set[str]] = {
+            kw: {other for other in keywords if kw.startswith(other)} for kw in keywords
+        }
+        # keyword -> lexicons containing it
+        self._owners: Dict[str, List[str]] = {}
+        for name, kws in self.lexicons.items():
+            for kw in set(k.lower() for k in kws):
+                self._owners.setdefault(kw, []).append(name)
+
+    def hits(self, text: str) -> Set[str]:
+        """Distinct keywords occurring in text (case-insensitive)"""
+        found: Set[str] = set()
+        if not text or self._pattern is None:
+            return found
+        for match in self._pattern.finditer(text.lower()):
+            longest = match.group(1)
+            if longest not in found:
+                found |= self._prefix_closure[longest]
+        return found
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Number of distinct keywords of every lexicon occurring in text"""
+        return self.count_hits(self.hits(text))
+
+    def count_hits(self, hits: Set[str]) -> Dict[str, int]:
+        """Per-lexicon counts for a set of hits returned by ``hits``"""
+        counts = dict.fromkeys(self.lexicons, 0)
+        for kw in hits:
+            for name in self._owners[kw]:
+                counts[name] += 1
+        return counts
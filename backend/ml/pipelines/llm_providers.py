@@ -0,0 +1,374 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .llm_cache import get_llm_cache, cache_key, MISS
+from .json_stream import JSONArrayStreamParser
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDERS = ('gemini', 'openrouter')
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Recent samples kept for the percentiles reported by stats()
+_SAMPLE_WINDOW = 1000
+
+
+class LLMTimeoutError(Exception):
+    pass
+
+
+def _percentile(samples, q: float) -> float:
+    return round(float(np.percentile(samples, q)), 4) if samples else 0.0
+
+
+class LLMProvider:
+    """
+    Async access to one hosted model provider.
+
+    The SDK client is created on first use and reused, so its HTTP
+    connection pool is shared by every request. At most ``concurrency``
+    requests run at once; later callers wait on the event loop, not in a
+    thread. Each request is bounded by ``timeout`` seconds.
+    """
+
+    name = None
+
+    def __init__(self, api_key: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=_SAMPLE_WINDOW)
+
+    def _create_client(self):
+        raise NotImplementedError
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._create_client()
+            return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to one loop; recreate when called from another
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _generate(self, model: str, prompt: str, system: Optional[str], json_output: bool,
+                        temperature: Optional[float]) -> str:
+        raise NotImplementedError
+
+    def _stream(self, model: str, prompt: str, system: Optional[str], json_output: bool,
+                temperature: Optional[float]) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def generate(self, model: str, prompt: str, system: Optional[str] = None, json_output: bool = False,
+                       temperature: Optional[float] = None) -> str:
+        """Response text for one prompt"""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+        try:
+            async with self._get_semaphore():
+                started = time.perf_counter()
+                text = await asyncio.wait_for(
+                    self._generate(model, prompt, system, json_output, temperature), self.timeout
+                )
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.failed += 1
+                self.timeouts += 1
+            raise LLMTimeoutError(f"{self.name} request timed out after {self.timeout}s")
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        with self._lock:
+            self._latencies.append(time.perf_counter() - started)
+        return text
+
+    async def stream(self, model: str, prompt: str, system: Optional[str] = None, json_output: bool = False,
+                     temperature: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Response text chunks for one prompt as the model produces them;
+        timeout bounds the wait for each chunk. A concurrency slot is held
+        only while waiting for the next chunk, never while the caller handles
+        one, so a consumer that stops iterating (e.g. a disconnected SSE
+        client) cannot keep the slot.
+        """
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+        semaphore = self._get_semaphore()
+        started = time.perf_counter()
+        chunks = self._stream(model, prompt, system, json_output, temperature).__aiter__()
+        try:
+            while True:
+                async with semaphore:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        break
+                yield chunk
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.failed += 1
+                self.timeouts += 1
+            raise LLMTimeoutError(f"{self.name} stream stalled for more than {self.timeout}s")
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            await chunks.aclose()
+            with self._lock:
+                self.in_flight -= 1
+
+        with self._lock:
+            self._latencies.append(time.perf_counter() - started)
+
+    def _cache_key(self, model: str, prompt: str, system: Optional[str], json_output: bool,
+                   temperature: Optional[float]) -> str:
+        return cache_key(self.name, model, prompt, {
+            'system': system, 'json_output': json_output, 'temperature': temperature
+        })
+
+    async def generate_json(self, model: str, prompt: str, system: Optional[str] = None, json_output: bool = False,
+                            temperature: Optional[float] = None, parse: Callable[[str], Any] = json.loads,
+                            use_cache: bool = True) -> Any:
+        """
+        Parsed response for one prompt, served from the LLM response cache
+        when the same (provider, model, prompt, config) was answered before.
+        parse turns the response text into JSON and should raise on anything
+        unusable; only successfully parsed responses are cached.
+        """
+        cache = get_llm_cache() if use_cache else None
+        key = self._cache_key(model, prompt, system, json_output, temperature)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not MISS:
+                return cached
+
+        value = parse(await self.generate(model, prompt, system, json_output, temperature))
+        if cache is not None:
+            cache.put(key, self.name, model, value)
+        return value
+
+    async def stream_json_items(self, model: str, prompt: str, keys: Iterable[str], system: Optional[str] = None,
+                                json_output: bool = False, temperature: Optional[float] = None,
+                                use_cache: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        (key, item) for each element of the top-level arrays named by keys
+        in a streamed JSON object response, yielded as soon as the element is
+        complete. The raw response is never accumulated. Complete responses
+        are cached like generate_json (as {key: [items]}, after the stream
+        ends, so callers must not modify the items), and a cached response
+        is replayed without calling the model.
+        """
+        keys = list(keys)
+        cache = get_llm_cache() if use_cache else None
+        key = self._cache_key(model, prompt, system, json_output, temperature)
+        if cache is not None:
+            cached = cache.get(key)
+            if isinstance(cached, dict):
+                for name in keys:
+                    for item in cached.get(name) or []:
+                        yield name, item
+                return
+
+        parser = JSONArrayStreamParser(keys)
+        collected = {name: [] for name in keys}
+        async for chunk in self.stream(model, prompt, system, json_output, temperature):
+            for name, item in parser.feed(chunk):
+                collected[name].append(item)
+                yield name, item
+        parser.close()
+        if cache is not None:
+            cache.put(key, self.name, model, collected)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                'concurrency': self.concurrency,
+                'timeout_seconds': self.timeout,
+                'requests': self.requests,
+                'failed': self.failed,
+                'timeouts': self.timeouts,
+                'in_flight': self.in_flight,
+                'latency_seconds': {
+                    'p50': _percentile(latencies, 50),
+                    'p95': _percentile(latencies, 95),
+                    'max': round(max(latencies), 4) if latencies else 0.0,
+                },
+            }
+
+    async def aclose(self):
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            await self._close_client(client)
+
+    async def _close_client(self, client):
+        pass
+
+
+class GeminiProvider(LLMProvider):
+    name = 'gemini'
+
+    def _create_client(self):
+        from google import genai
+        return genai.Client(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+
+    @staticmethod
+    def _config(system, json_output, temperature) -> Dict[str, Any]:
+        config = {}
+        if system:
+            config['system_instruction'] = system
+        if json_output:
+            config['response_mime_type'] = "application/json"
+        if temperature is not None:
+            config['temperature'] = temperature
+        return config
+
+    async def _generate(self, model, prompt, system, json_output, temperature):
+        response = await self.client.aio.models.generate_content(
+            model=model, contents=[prompt], config=self._config(system, json_output, temperature)
+        )
+        return response.text
+
+    async def _stream(self, model, prompt, system, json_output, temperature):
+        response = await self.client.aio.models.generate_content_stream(
+            model=model, contents=[prompt], config=self._config(system, json_output, temperature)
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    async def _close_client(self, client):
+        await client.aio.aclose()
+
+
+class OpenRouterProvider(LLMProvider):
+    """OpenAI-compatible chat completions through OpenRouter"""
+
+    name = 'openrouter'
+
+    def _create_client(self):
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=self.api_key or os.getenv("API_KEY"), base_url=OPENROUTER_BASE_URL)
+
+    @staticmethod
+    def _request(model, prompt, system, json_output, temperature) -> Dict[str, Any]:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        request = {'model': model, 'messages': messages}
+        if temperature is not None:
+            request['temperature'] = temperature
+        if json_output:
+            request['response_format'] = {"type": "json_object"}
+        return request
+
+    async def _generate(self, model, prompt, system, json_output, temperature):
+        response = await self.client.chat.completions.create(
+            **self._request(model, prompt, system, json_output, temperature)
+        )
+        return response.choices[0].message.content
+
+    async def _stream(self, model, prompt, system, json_output, temperature):
+        response = await self.client.chat.completions.create(
+            stream=True, **self._request(model, prompt, system, json_output, temperature)
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def _close_client(self, client):
+        await client.close()
+
+
+_PROVIDER_CLASSES = {
+    'gemini': GeminiProvider,
+    'openrouter': OpenRouterProvider,
+}
+
+_providers: Dict[Tuple[str, Optional[str]], LLMProvider] = {}
+_provider_settings = {'concurrency': DEFAULT_CONCURRENCY, 'timeout': DEFAULT_TIMEOUT, 'api_keys': {}}
+_providers_lock = threading.Lock()
+
+
+def get_llm_provider(name: str, api_key: Optional[str] = None) -> LLMProvider:
+    """Shared provider instance; an explicit api_key gets its own (also shared) client"""
+    if name not in _PROVIDER_CLASSES:
+        raise ValueError(f"Unknown LLM provider '{name}', expected one of {list(LLM_PROVIDERS)}")
+    with _providers_lock:
+        key = (name, api_key)
+        if key not in _providers:
+            _providers[key] = _PROVIDER_CLASSES[name](
+                api_key or _provider_settings['api_keys'].get(name),
+                _provider_settings['concurrency'],
+                _provider_settings['timeout']
+            )
+        return _providers[key]
+
+
+def configure_llm_providers(gemini_api_key: Optional[str] = None, openrouter_api_key: Optional[str] = None,
+                            concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT):
+    """Set keys, per-provider concurrency and timeout (called once at startup, before any request)"""
+    with _providers_lock:
+        _provider_settings['concurrency'] = concurrency
+        _provider_settings['timeout'] = timeout
+        _provider_settings['api_keys'] = {'gemini': gemini_api_key, 'openrouter': openrouter_api_key}
+        _providers.clear()
+
+
+def llm_provider_stats() -> Dict[str, Any]:
+    with _providers_lock:
+        providers = list(_providers.items())
+    stats = {}
+    for (name, api_key), provider in providers:
+        stats[name if api_key is None else f"{name} (custom key)"] = provider.stats()
+    return stats
+
+
+async def close_llm_providers():
+    with _providers_lock:
+        providers = list(_providers.values())
+        _providers.clear()
+    for provider in providers:
+        try:
+            await provider.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close {provider.name} client: {e}")
@@ -0,0 +1,160 @@
+import os
+import time
+import threading
+import logging
+from typing import Dict, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss() -> int:
+    """Return the resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            # ru_maxrss is the peak, not the current RSS, but it is the best
+            # we can do on platforms without /proc
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of heavyweight NLP models.
+
+    Every model is loaded at most once per process and the same instance is
+    handed to every consumer (requirement analyzer, traceability engine, ...).
+    Load time and resident memory growth are recorded per model.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._encoders: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.RLock()
+
+    def get_spacy(self, name: str = "en_core_web_sm"):
+        """Get the shared spaCy pipeline, loading it on first use"""
+        def load():
+            import spacy
+            return spacy.load(name)
+        return self._get_or_load("spacy", name, load)
+
+    def get_sentence_transformer(self, name: str = "all-MiniLM-L6-v2"):
+        """Get the shared SentenceTransformer, loading it on first use"""
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(name)
+        return self._get_or_load("sentence_transformer", name, load)
+
+    def get_embedding_backend(self, name: str = "all-MiniLM-L6-v2", backend: str = None,
+                              onnx_model_dir: str = None):
+        """Shared embedding backend: the torch SentenceTransformer or an ONNX Runtime session"""
+        from .embedding_backends import (
+            TorchEmbeddingBackend, OnnxEmbeddingBackend, validate_backend, DEFAULT_BACKEND, DEFAULT_ONNX_MODEL_DIR
+        )
+        backend = validate_backend(backend or DEFAULT_BACKEND)
+        if backend == 'torch':
+            return TorchEmbeddingBackend(self.get_sentence_transformer(name))
+
+        def load():
+            return OnnxEmbeddingBackend(name, onnx_model_dir or DEFAULT_ONNX_MODEL_DIR, quantize=backend == 'onnx-int8')
+        return self._get_or_load(backend, name, load)
+
+    def get_bucketed_encoder(self, name: str = "all-MiniLM-L6-v2", backend: str = None, onnx_model_dir: str = None):
+        """Shared length-bucketed encoder for a backend; one per process so its counters aggregate"""
+        from .embedding_backends import BucketedEncoder, DEFAULT_BACKEND
+        backend = backend or DEFAULT_BACKEND
+        key = (backend, name)
+        with self._lock:
+            encoder = self._encoders.get(key)
+            if encoder is None:
+                encoder = BucketedEncoder(self.get_embedding_backend(name, backend, onnx_model_dir))
+                self._encoders[key] = encoder
+            return encoder
+
+    def get_text_encoder(self, name: str = "all-MiniLM-L6-v2", backend: str = None, onnx_model_dir: str = None):
+        """Embedding cache -> length-bucketed batching -> backend"""
+        from .embedding_cache import CachedEmbeddingModel, get_embedding_cache
+        from .embedding_backends import cache_model_name, DEFAULT_BACKEND
+        backend = backend or DEFAULT_BACKEND
+        return CachedEmbeddingModel(
+            self.get_bucketed_encoder(name, backend, onnx_model_dir),
+            cache_model_name(name, backend),
+            get_embedding_cache()
+        )
+
+    def _get_or_load(self, kind: str, name: str, loader: Callable[[], Any]):
+        key = (kind, name)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+            rss_before = _current_rss()
+            started = time.perf_counter()
+            model = loader()
+            load_time = time.perf_counter() - started
+            rss_delta = max(_current_rss() - rss_before, 0)
+
+            self._models[key] = model
+            self._stats[f"{kind}:{name}"] = {
+                'kind': kind,
+                'name': name,
+                'load_time_seconds': round(load_time, 3),
+                'rss_delta_bytes': rss_delta,
+                'parameter_bytes': self._parameter_bytes(model),
+                'loaded_at': time.time(),
+            }
+            logger.info(f"Loaded {kind} model '{name}' in {load_time:.2f}s (+{rss_delta / 2**20:.1f} MiB RSS)")
+            return model
+
+    @staticmethod
+    def _parameter_bytes(model) -> int:
+        """Size of the model weights for torch and ONNX models, 0 otherwise"""
+        if hasattr(model, "model_bytes"):
+            return model.model_bytes
+        parameters = getattr(model, "parameters", None)
+        if not callable(parameters):
+            return 0
+        try:
+            return sum(p.numel() * p.element_size() for p in parameters())
+        except Exception:
+            return 0
+
+    def is_loaded(self, kind: str, name: str) -> bool:
+        return (kind, name) in self._models
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load time and memory footprint of every loaded model"""
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def encoder_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Throughput and padding counters of the shared encoders"""
+        with self._lock:
+            encoders = dict(self._encoders)
+        return {f"{backend}:{name}": encoder.stats() for (backend, name), encoder in encoders.items()}
+
+    def clear(self):
+        """Drop all cached models (mainly useful for tests and benchmarks)"""
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+            self._encoders.clear()
+
+
+model_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return model_registry
@@ -1,19 +1,71 @@
 import re
-import spacy
 import numpy as np
-from typing import List, Dict, Tuple, Optional, Set
+from bisect import bisect_right
+from typing import List, Dict, Tuple, Optional, Set, Iterator
 from dataclasses import dataclass
-from collections import defaultdict, Counter
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
 from pathlib import Path
 import json
+from .model_registry import get_model_registry
+from .keyword_matcher import KeywordMatcher
+from .deduplication import NearDuplicateDetector
+from .batch_scoring import BatchScorer, build_report, clause_count
+from .revision_diff import requirement_fingerprint
+from .document_index import (
+    DocumentIndex, SECTION_PATTERNS, match_section_header, preprocess_text, preprocess_with_offsets, split_sentences
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# spaCy components switched off by each analysis profile. "fast" drops entity
+# recognition, "minimal" also drops the dependency parser; the scores that
+# depend on them degrade to tag-based approximations.
+ANALYSIS_PROFILES = {
+    'full': [],
+    'fast': ['ner'],
+    'minimal': ['ner', 'parser'],
+}
+
+# Below this many formal, numbered and pattern requirements the semantic strategy runs too
+SEMANTIC_FALLBACK_THRESHOLD = 5
+
+NUMBERED_FORMAT = re.compile(r'\d+\.\s+[A-Z]')
+
+# Sentences (up to a terminator) that read like requirements
+REQUIREMENT_PATTERNS = [
+    re.compile(r'(?:shall|must|should|will|required to|needs to|has to)', re.IGNORECASE),
+    re.compile(r'the system shall', re.IGNORECASE),
+    re.compile(r'the application must', re.IGNORECASE),
+    re.compile(r'user should be able to', re.IGNORECASE),
+]
+
+
+def build_id_lexer(id_patterns: List[str]):
+    """
+    One regex that finds every requirement ID that starts a block (group
+    "id") and every block terminator - a line starting with '#' or a number
+    (group "stop") - in a single left-to-right scan. An ID only starts a
+    block at the start of a line (after optional indentation or a bullet),
+    optionally followed by ':' or '-'; IDs mentioned inside a sentence stay
+    part of the text. IDs must not run into a following word character, so
+    "REQ-0010" is never read as "REQ-001".
+    """
+    ids = '|'.join(id_patterns)
+    return re.compile(
+        rf'^[ \t]*(?:[-*\u2022][ \t]+)?(?P<id>{ids})(?!\w)[ \t]*[:-]?|(?P<stop>\n(?=#|\d+\.))',
+        re.IGNORECASE | re.MULTILINE
+    )
+
+
+def _overlaps(spans: List[Tuple[int, int]], start: int, end: int) -> bool:
+    """Whether [start, end) overlaps any of the sorted, non-overlapping spans"""
+    position = bisect_right(spans, (start, float('inf'))) - 1
+    if position >= 0 and spans[position][1] > start:
+        return True
+    return position + 1 < len(spans) and spans[position + 1][0] < end
+
 @dataclass
 class Requirement:
     id: str
@@ -39,10 +91,24 @@ class SemanticRequirementAnalyzer:
     Production-ready BRD processor that handles any format with comprehensive analysis
     """
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', spacy_model: str = 'en_core_web_sm',
+                 batch_size: int = 64, n_process: int = 1,
+                 dedup_threshold: float = 0.85, dedup_block_size: int = 1024,
+                 profile: str = 'full', embedding_backend: str = None, onnx_model_dir: str = None):
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-            self.sentence_model = SentenceTransformer(model_name)
+            self.profile = self._validate_profile(profile)
+            # nlp.pipe settings for the analysis stage
+            self.batch_size = batch_size
+            self.n_process = n_process
+            self.dedup_threshold = dedup_threshold
+            self.dedup_block_size = dedup_block_size
+            # Models are shared process-wide, so constructing an analyzer per
+            # document no longer reloads spaCy or the sentence transformer
+            registry = get_model_registry()
+            self.nlp = registry.get_spacy(spacy_model)
+            # Embeddings are read through the on-disk cache shared with traceability;
+            # the backend (torch or ONNX Runtime) only sees cache misses
+            self.encoder = registry.get_text_encoder(model_name, embedding_backend, onnx_model_dir)
             self._initialize_patterns()
             self._initialize_classifiers()
             logger.info("BRD Processor initialized successfully")
@@ -60,20 +126,14 @@ class SemanticRequirementAnalyzer:
             r'(BR-\d+)',                    # BR-001
             r'(UC-\d+)',                    # UC-001
             r'(S-\d+)',                     # S-001
-            r'(\d+\.\d+(?:\.\d+)?)',       # 1.1, 1.1.1
+            r'(^\d+\.\d+(?:\.\d+)?)',      # 1.1, 1.1.1 at the start of a line
             r'(\[R-\d+\])',                 # [R-001]
             r'(Requirement\s+\d+)',         # Requirement 1
         ]
+        self.id_lexer = build_id_lexer(self.id_patterns)
         
         # Section headers
-        self.section_patterns = [
-            r'#+\s*(.*?)(?=\n|$)',
-            r'\d+\.\d*\s*(.*?)(?=\n|$)',
-            r'^(?:FUNCTIONAL|NON-FUNCTIONAL|BUSINESS|TECHNICAL)\s+REQUIREMENTS',
-            r'^REQUIREMENTS?\s*$',
-            r'^SPECIFICATIONS?\s*$',
-            r'^SCOPE\s*$',
-        ]
+        self.section_patterns = list(SECTION_PATTERNS)
         
         # Metadata patterns
         self.metadata_patterns = {
@@ -130,31 +190,56 @@ class SemanticRequirementAnalyzer:
             'medium': ['medium', 'standard', 'normal', 'typical'],
             'low': ['low', 'nice to have', 'optional', 'enhancement']
         }
+        
+        self.ambiguous_terms = [
+            'appropriate', 'as needed', 'as required', 'etc', 'and so on',
+            'flexible', 'user-friendly', 'robust', 'efficient', 'fast',
+            'easy to use', 'intuitive', 'when necessary', 'if applicable'
+        ]
+        self.vague_quantifiers = ['some', 'several', 'many', 'few', 'multiple', 'various']
+        
+        self.specific_indicators = [
+            'when', 'if', 'within', 'less than', 'greater than', 'equal to',
+            'exactly', 'precisely', 'specific', 'must', 'shall'
+        ]
+        self.measurable_terms = [
+            'seconds', 'minutes', 'hours', 'percentage', 'limit', 'size',
+            'count', 'number', 'amount', 'quantity', 'frequency'
+        ]
+        
+        self.success_indicators = ['shall', 'must', 'will', 'should']
+        self.dependency_components = ['system', 'database', 'api', 'service', 'module', 'component']
+        
+        # One matcher scans each requirement once for every lexicon above
+        lexicons = {f"type:{req_type}": keywords for req_type, keywords in self.type_classifiers.items()}
+        lexicons.update({f"priority:{level}": indicators for level, indicators in self.priority_indicators.items()})
+        lexicons.update({
+            'ambiguous': self.ambiguous_terms,
+            'vague': self.vague_quantifiers,
+            'specific': self.specific_indicators,
+            'measurable': self.measurable_terms,
+            'success': self.success_indicators,
+            'components': self.dependency_components,
+        })
+        self.keyword_matcher = KeywordMatcher(lexicons)
+        self.batch_scorer = BatchScorer(self.keyword_matcher, list(self.type_classifiers), list(self.priority_indicators))
+    
+    @staticmethod
+    def _validate_profile(profile: str) -> str:
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile '{profile}', expected one of {list(ANALYSIS_PROFILES)}")
+        return profile
     
-    def extract_requirements(self, text: str, brd_name: str = "unknown") -> List[Dict]:
+    def extract_requirements(self, text: str, brd_name: str = "unknown", profile: str = None) -> List[Dict]:
         """
         Main method to process any BRD format
         """
         try:
-            logger.info(f"Processing BRD: {brd_name}")
-            
-            # Pre-process text
-            cleaned_text = self._preprocess_text(text)
-            
-            # Detect document structure
-            document_structure = self._analyze_document_structure(cleaned_text)
-            
-            # Extract requirements using multi-strategy approach
-            raw_requirements = self._multi_strategy_extraction(cleaned_text, document_structure)
-            
-            # Remove duplicates
-            unique_requirements = self._deduplicate_requirements(raw_requirements)
-            
-            # Analyze requirements
-            analyzed_requirements = []
-            for i, req_data in enumerate(unique_requirements):
-                requirement = self._deep_analyze_requirement(req_data, i + 1)
-                analyzed_requirements.append(requirement)
+            analyzed_requirements = [
+                requirement
+                for chunk in self.iter_requirements(text, brd_name, profile=profile)
+                for requirement in chunk
+            ]
             
             logger.info(f"Successfully processed {len(analyzed_requirements)} requirements")
             return analyzed_requirements
@@ -163,118 +248,238 @@ class SemanticRequirementAnalyzer:
             logger.error(f"Error processing BRD {brd_name}: {e}")
             return []
     
-    def _preprocess_text(self, text: str) -> str:
-        """Clean and normalize text"""
-        # Remove excessive whitespace but preserve structure
-        text = re.sub(r' +', ' ', text)
-        text = re.sub(r'\t+', ' ', text)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+    def iter_requirements(self, text: str, brd_name: str = "unknown", chunk_size: int = 256,
+                          profile: str = None, reuse: Optional[Dict[str, Dict]] = None,
+                          index: Optional[DocumentIndex] = None,
+                          page_offsets: Optional[List[int]] = None) -> Iterator[List[Dict]]:
+        """
+        Streaming variant of extract_requirements: yields analyzed requirements
+        in chunks of at most chunk_size, in document order. Deduplication is
+        incremental against everything kept so far, so the concatenated output
+        is identical to extract_requirements. Errors are raised to the caller.
+        
+        reuse maps requirement fingerprints to analyses from a previous
+        revision (analyzed with the same profile); those requirements skip
+        spaCy and scoring and only get their positional fields refreshed.
+        
+        index is a DocumentIndex of the preprocessed text built earlier (e.g.
+        by the document processor); it is rebuilt if it does not match.
+        Requirements get a "page" number when the index has page offsets or
+        page_offsets (page start offsets into text) are given.
+        """
+        profile = self._validate_profile(profile or self.profile)
+        logger.info(f"Processing BRD: {brd_name} (profile: {profile})")
         
-        # Fix common encoding issues
-        text = text.replace('�', '').replace('�', '"').replace('�', '"')
+        raw_requirements = self._extract_candidates(text, index, page_offsets)
         
-        return text.strip()
+        detector = NearDuplicateDetector(self.dedup_threshold, self.dedup_block_size)
+        sequence_id = 0
+        for start in range(0, len(raw_requirements), chunk_size):
+            candidates = raw_requirements[start:start + chunk_size]
+            
+            # Remove duplicates of this chunk and of earlier chunks
+            embeddings = self.encoder.encode([req['text'] for req in candidates])
+            unique_requirements = [candidates[i] for i in detector.add(embeddings)]
+            if not unique_requirements:
+                continue
+            
+            if reuse:
+                yield self._analyze_or_reuse(unique_requirements, sequence_id, profile, reuse)
+            else:
+                yield self._analyze_requirements(unique_requirements, sequence_id, profile)
+            sequence_id += len(unique_requirements)
+    
+    def _analyze_or_reuse(self, requirements: List[Dict], start_sequence: int, profile: str,
+                          reuse: Dict[str, Dict]) -> List[Dict]:
+        """Analyze only the requirements whose fingerprint has no previous analysis"""
+        fingerprints = [requirement_fingerprint(req_data) for req_data in requirements]
+        fresh = [req_data for req_data, fp in zip(requirements, fingerprints) if fp not in reuse]
+        analyzed = iter(self._analyze_requirements(fresh, start_sequence, profile))
+        
+        results = []
+        for sequence_id, (req_data, fp) in enumerate(zip(requirements, fingerprints), start_sequence + 1):
+            if fp not in reuse:
+                results.append(next(analyzed))
+                continue
+            results.append({
+                **reuse[fp],
+                "id":req_data.get('id', f"REQ-{sequence_id:03d}"),
+                "original_text":req_data.get('original', req_data['text']),
+                "format_detected":req_data.get('format', 'unknown'),
+                "section":req_data.get('metadata', {}).get('section', 'main'),
+                "metadata":req_data.get('metadata', {}),
+                "page":req_data.get('page'),
+                "fingerprint":fp
+            })
+        return results
+    
+    def _extract_candidates(self, text: str, index: Optional[DocumentIndex] = None,
+                            page_offsets: Optional[List[int]] = None, semantic: Optional[bool] = None) -> List[Dict]:
+        """Pre-process the text and run every extraction strategy"""
+        # Pre-process text, carrying page boundaries along
+        if page_offsets is not None:
+            cleaned_text, cleaned_page_offsets = preprocess_with_offsets(text, page_offsets)
+        else:
+            cleaned_text, cleaned_page_offsets = self._preprocess_text(text), None
+        
+        # One structural scan shared by every strategy
+        if index is None or not index.matches(cleaned_text):
+            index = DocumentIndex.build(cleaned_text, self.section_patterns, cleaned_page_offsets)
+        elif cleaned_page_offsets is not None:
+            index.page_offsets = cleaned_page_offsets
+        
+        # Detect document structure
+        document_structure = self._analyze_document_structure(cleaned_text, index)
+        
+        # Extract requirements using multi-strategy approach
+        requirements = self._multi_strategy_extraction(cleaned_text, document_structure, index, semantic)
+        if index.page_offsets:
+            for req in requirements:
+                if 'offset' in req:
+                    req['page'] = index.page_at(req['offset'])
+        return requirements
     
-    def _analyze_document_structure(self, text: str) -> Dict:
+    def _analyze_requirements(self, requirements: List[Dict], start_sequence: int = 0, profile: str = None) -> List[Dict]:
+        """
+        Parse requirement texts in batches and score them all in one vectorized
+        pass. Produces the same dicts as calling _deep_analyze_requirement on
+        each requirement.
+        """
+        profile = profile or self.profile
+        docs = list(self._parse_texts([req_data['text'] for req_data in requirements], profile))
+        return self._score_parsed(requirements, docs, start_sequence, profile)
+    
+    def _score_parsed(self, requirements: List[Dict], docs: List, start_sequence: int = 0, profile: str = None) -> List[Dict]:
+        """Scoring half of _analyze_requirements, given the spaCy docs"""
+        profile = profile or self.profile
+        texts = [req_data['text'] for req_data in requirements]
+        hits_list = [self.keyword_matcher.hits(text) for text in texts]
+        scores = self.batch_scorer.score(hits_list, docs, [req_data['metadata'] for req_data in requirements])
+        
+        analyzed = []
+        for i, (req_data, doc, hits) in enumerate(zip(requirements, docs, hits_list)):
+            fields = scores.fields(i)
+            entities = [(ent.text, ent.label_) for ent in doc.ents]
+            analyzed.append(self._build_requirement(
+                req_data, start_sequence + i + 1,
+                entities=entities,
+                key_phrases=self._extract_key_phrases(doc),
+                dependencies=self._identify_dependencies(req_data['text'], entities, hits),
+                analysis_profile=profile,
+                **fields
+            ))
+        return analyzed
+    
+    def _preprocess_text(self, text: str) -> str:
+        """Clean and normalize text"""
+        return preprocess_text(text)
+    
+    def _analyze_document_structure(self, text: str, index: Optional[DocumentIndex] = None) -> Dict:
         """Analyze document structure and sections"""
+        if index is None:
+            index = DocumentIndex.build(text, self.section_patterns)
+        
         structure = {
-            'sections': [],
+            'sections': index.section_names(),
             'formats_detected': set(),
             'requirement_density': 0,
             'document_quality': 0
         }
         
-        # Detect sections
-        lines = text.split('\n')
-        current_section = "Main"
-        sections = defaultdict(list)
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Check if line is a section header
-            is_section = False
-            for pattern in self.section_patterns:
-                match = re.match(pattern, line, re.IGNORECASE)
-                if match:
-                    current_section = match.group(1) if match.groups() else line
-                    structure['sections'].append(current_section)
-                    is_section = True
-                    break
-            
-            if not is_section and len(line) > 10:  # Meaningful content
-                sections[current_section].append(line)
-        
         # Detect formats
         text_lower = text.lower()
         if any(pattern in text_lower for pattern in ['req-', 'fr-', 'nfr-']):
             structure['formats_detected'].add('formal')
-        if re.search(r'\d+\.\s+[A-Z]', text):
+        if NUMBERED_FORMAT.search(text):
             structure['formats_detected'].add('numbered')
         if any(pattern in text_lower for pattern in ['as a', 'i want', 'so that']):
             structure['formats_detected'].add('user_story')
         if any(pattern in text_lower for pattern in ['|', 'table', 'grid']):
             structure['formats_detected'].add('tabular')
         
-        structure['sections_content'] = dict(sections)
+        structure['sections_content'] = index.sections_content(text)
         return structure
     
-    def _multi_strategy_extraction(self, text: str, structure: Dict) -> List[Dict]:
-        """Extract requirements using multiple strategies"""
+    def _multi_strategy_extraction(self, text: str, structure: Dict, index: Optional[DocumentIndex] = None,
+                                   semantic: Optional[bool] = None) -> List[Dict]:
+        """
+        Extract requirements using multiple strategies. The semantic strategy
+        runs when the others found fewer than SEMANTIC_FALLBACK_THRESHOLD
+        requirements, or always/never when semantic is True/False.
+        """
+        if index is None:
+            index = DocumentIndex.build(text, self.section_patterns)
+        
         all_requirements = []
         
         # Strategy 1: Formal ID-based extraction
-        # all_requirements.extend(self._extract_formal_requirements(text))
+        all_requirements.extend(self._extract_formal_requirements(text))
         
         # Strategy 2: Numbered list extraction
-        all_requirements.extend(self._extract_numbered_requirements(text))
+        all_requirements.extend(self._extract_numbered_requirements(text, index))
         
         # Strategy 3: Section-based extraction
         # all_requirements.extend(self._extract_section_requirements(structure))
         
-        # Strategy 4: Pattern-based extraction
-        # all_requirements.extend(self._extract_pattern_based_requirements(text))
+        # Strategy 4: Pattern-based extraction, for sentences outside the
+        # formal and numbered blocks (those are already requirements)
+        all_requirements.extend(
+            self._extract_pattern_based_requirements(text, index, exclude=self._merge_spans(all_requirements))
+        )
         
         # Strategy 5: Semantic extraction (fallback)
-        if len(all_requirements) < 5:  # If few requirements found
-            all_requirements.extend(self._extract_semantic_requirements(text))
+        if semantic or (semantic is None and len(all_requirements) < SEMANTIC_FALLBACK_THRESHOLD):
+            all_requirements.extend(self._extract_semantic_requirements(text, index))
         
         return all_requirements
     
+    @staticmethod
+    def _merge_spans(requirements: List[Dict]) -> List[Tuple[int, int]]:
+        """Sorted, merged [offset, end) spans of the requirements' source blocks"""
+        merged = []
+        for start, end in sorted((req['offset'], req['end']) for req in requirements):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+    
     def _extract_formal_requirements(self, text: str) -> List[Dict]:
         """Extract requirements with formal IDs"""
         requirements = []
         
-        for pattern in self.id_patterns:
-            # Enhanced pattern to capture requirement blocks
-            full_pattern = f'({pattern})\\s*:?\\s*(.*?)(?=(?:{"|".join(self.id_patterns)}|\\n#|\\n\\d+\\.|\\Z))'
+        # A block runs from its ID to the next ID, the next terminator or the end
+        tokens = list(self.id_lexer.finditer(text))
+        for i, token in enumerate(tokens):
+            if token.group('id') is None:
+                continue
+            end = tokens[i + 1].start() if i + 1 < len(tokens) else len(text)
+            req_id = token.group('id').strip()
+            req_content = text[token.end():end].strip()
             
-            for match in re.finditer(full_pattern, text, re.DOTALL | re.IGNORECASE):
-                req_id = match.group(1).strip()
-                req_content = match.group(2).strip()
-                
-                if self._is_valid_requirement_content(req_content):
-                    cleaned_content = self._clean_requirement_content(req_content)
-                    requirements.append({
-                        'id': req_id,
-                        'text': cleaned_content,
-                        'original': req_content,
-                        'format': 'formal',
-                        'metadata': self._extract_metadata(req_content)
-                    })
+            if self._is_valid_requirement_content(req_content):
+                cleaned_content = self._clean_requirement_content(req_content)
+                requirements.append({
+                    'id': req_id,
+                    'text': cleaned_content,
+                    'original': req_content,
+                    'format': 'formal',
+                    'metadata': self._extract_metadata(req_content),
+                    'offset': token.start('id'),
+                    'end': end
+                })
         
         return requirements
     
-    def _extract_numbered_requirements(self, text: str) -> List[Dict]:
+    def _extract_numbered_requirements(self, text: str, index: Optional[DocumentIndex] = None) -> List[Dict]:
         """Extract numbered requirements"""
         requirements = []
-        pattern = r'^(\d+)\.\s+(.*?)(?=^\d+\.\s+|^#|\Z)'
+        if index is None:
+            index = DocumentIndex.build(text, self.section_patterns)
         
-        for match in re.finditer(pattern, text, re.MULTILINE | re.DOTALL):
-            req_num = match.group(1)
-            req_content = match.group(2).strip()
+        # Items run up to the next numbered item, a '#' line or the end
+        for req_num, start, end in index.numbered_items:
+            req_content = text[start:end].strip()
             
             if self._is_valid_requirement_content(req_content):
                 cleaned_content = self._clean_requirement_content(req_content)
@@ -283,7 +488,9 @@ class SemanticRequirementAnalyzer:
                     'text': cleaned_content,
                     'original': req_content,
                     'format': 'numbered',
-                    'metadata': self._extract_metadata(req_content)
+                    'metadata': self._extract_metadata(req_content),
+                    'offset': start,
+                    'end': end
                 })
         
         return requirements
@@ -304,42 +511,46 @@ class SemanticRequirementAnalyzer:
         
         return requirements
     
-    def _extract_pattern_based_requirements(self, text: str) -> List[Dict]:
-        """Extract requirements based on linguistic patterns"""
+    def _extract_pattern_based_requirements(self, text: str, index: Optional[DocumentIndex] = None,
+                                            exclude: Optional[List[Tuple[int, int]]] = None) -> List[Dict]:
+        """Extract requirements based on linguistic patterns, skipping sentences that overlap exclude spans"""
         requirements = []
-        
-        # Pattern 1: Shall/must/should patterns
-        patterns = [
-            r'([^.!?]*(?:shall|must|should|will|required to|needs to|has to)[^.!?]*[.!?])',
-            r'([^.!?]*the system shall[^.!?]*[.!?])',
-            r'([^.!?]*the application must[^.!?]*[.!?])',
-            r'([^.!?]*user should be able to[^.!?]*[.!?])',
-        ]
-        
-        for pattern in patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                req_text = match.group(1).strip()
-                if self._is_valid_requirement_content(req_text):
-                    requirements.append({
-                        'id': f"PAT-{len(requirements) + 1:03d}",
-                        'text': req_text,
-                        'original': req_text,
-                        'format': 'pattern',
-                        'metadata': {}
-                    })
+        if index is None:
+            index = DocumentIndex.build(text, self.section_patterns)
+        
+        # A match is a whole sentence plus its terminator, so test each
+        # terminated sentence of the index instead of scanning the text; a
+        # sentence matching several patterns is still one requirement
+        for start, end in index.sentences:
+            if end >= len(text) or (exclude and _overlaps(exclude, start, end + 1)):
+                continue
+            if not any(pattern.search(text, start, end) for pattern in REQUIREMENT_PATTERNS):
+                continue
+            req_text = text[start:end + 1].strip()
+            if self._is_valid_requirement_content(req_text):
+                requirements.append({
+                    'id': f"PAT-{len(requirements) + 1:03d}",
+                    'text': req_text,
+                    'original': req_text,
+                    'format': 'pattern',
+                    'metadata': {},
+                    'offset': start,
+                    'end': end + 1
+                })
         
         return requirements
     
-    def _extract_semantic_requirements(self, text: str) -> List[Dict]:
+    def _extract_semantic_requirements(self, text: str, index: Optional[DocumentIndex] = None) -> List[Dict]:
         """Extract requirements using semantic analysis"""
         requirements = []
+        if index is None:
+            index = DocumentIndex.build(text, self.section_patterns)
         
-        # Split into sentences and analyze each
-        sentences = re.split(r'[.!?]+', text)
+        # Analyze each sentence of the index
         requirement_keywords = ['shall', 'must', 'should', 'will', 'required', 'system', 'application', 'user']
         
-        for i, sentence in enumerate(sentences):
-            sentence = sentence.strip()
+        for start, end in index.sentences:
+            sentence = text[start:end].strip()
             if len(sentence) < 25 or len(sentence) > 500:
                 continue
                 
@@ -350,11 +561,13 @@ class SemanticRequirementAnalyzer:
             
             if has_keywords and has_action:
                 requirements.append({
-                    'id': f"SEM-{i:03d}",
+                    'id': f"SEM-{len(requirements) + 1:03d}",
                     'text': sentence,
                     'original': sentence,
                     'format': 'semantic',
-                    'metadata': {}
+                    'metadata': {},
+                    'offset': start,
+                    'end': end
                 })
         
         return requirements
@@ -362,7 +575,7 @@ class SemanticRequirementAnalyzer:
     def _extract_requirement_sentences(self, text: str, section: str) -> List[Dict]:
         """Extract requirement sentences from text"""
         requirements = []
-        sentences = re.split(r'[.!?]+', text)
+        sentences = split_sentences(text)
         
         for i, sentence in enumerate(sentences):
             sentence = sentence.strip()
@@ -461,75 +674,120 @@ class SemanticRequirementAnalyzer:
         
         # Use text embeddings for similarity detection
         texts = [req['text'] for req in requirements]
-        embeddings = self.sentence_model.encode(texts)
-        
-        # Calculate similarity matrix
-        similarity_matrix = cosine_similarity(embeddings)
+        embeddings = self.encoder.encode(texts)
         
-        # Group similar requirements
-        unique_indices = []
-        visited = set()
-        
-        for i in range(len(requirements)):
-            if i in visited:
-                continue
-                
-            unique_indices.append(i)
-            visited.add(i)
-            
-            # Find similar requirements to this one
-            for j in range(i + 1, len(requirements)):
-                if j not in visited and similarity_matrix[i][j] > 0.85:  # 85% similarity threshold
-                    visited.add(j)
+        # Greedy first-wins grouping without building the n x n similarity matrix
+        detector = NearDuplicateDetector(self.dedup_threshold, self.dedup_block_size)
+        unique_indices = detector.unique_indices(embeddings)
         
         return [requirements[i] for i in unique_indices]
     
-    def _deep_analyze_requirement(self, req_data: Dict, sequence_id: int) -> Dict :
+    def _disabled_components(self, profile: str = None) -> List[str]:
+        disabled = ANALYSIS_PROFILES[profile or self.profile]
+        return [name for name in disabled if name in self.nlp.pipe_names]
+    
+    def _parse_texts(self, texts: List[str], profile: str = None):
+        """Run spaCy over all texts with nlp.pipe, preserving order"""
+        if not texts:
+            return []
+        return self.nlp.pipe(
+            texts,
+            batch_size=self.batch_size,
+            n_process=self.n_process,
+            disable=self._disabled_components(profile)
+        )
+    
+    def _extract_key_phrases(self, doc) -> List[str]:
+        """Noun chunks when parsed, otherwise runs of adjectives/nouns from the tagger"""
+        if doc.has_annotation("DEP"):
+            return [chunk.text for chunk in doc.noun_chunks][:5]
+        
+        phrases = []
+        current = []
+        for token in list(doc) + [None]:
+            if token is not None and token.pos_ in ('ADJ', 'NOUN', 'PROPN'):
+                current.append(token)
+                continue
+            # Keep the run up to its last noun
+            while current and current[-1].pos_ == 'ADJ':
+                current.pop()
+            if current:
+                phrases.append(doc[current[0].i:current[-1].i + 1].text)
+            current = []
+        return phrases[:5]
+    
+    def _deep_analyze_requirement(self, req_data: Dict, sequence_id: int, doc=None, profile: str = None) -> Dict :
         """Perform deep analysis on a single requirement"""
         text = req_data['text']
-        doc = self.nlp(text)
+        profile = profile or self.profile
+        if doc is None:
+            doc = self.nlp(text, disable=self._disabled_components(profile))
+        
+        # Single keyword scan shared by every scoring function
+        hits = self.keyword_matcher.hits(text)
+        counts = self.keyword_matcher.count_hits(hits)
         
         # Comprehensive analysis
-        requirement_type = self._classify_requirement_type(text)
-        priority = self._assess_priority(text, req_data['metadata'])
+        requirement_type = self._classify_requirement_type(text, counts)
+        priority = self._assess_priority(text, req_data['metadata'], counts)
         complexity = self._calculate_complexity(doc)
-        testability = self._assess_testability(text)
-        ambiguity = self._calculate_ambiguity(text)
-        specificity = self._calculate_specificity(text)
+        ambiguity = self._calculate_ambiguity(text, counts)
+        specificity = self._calculate_specificity(text, counts)
+        testability = self._assess_testability(text, counts, specificity, ambiguity)
         entities = [(ent.text, ent.label_) for ent in doc.ents]
-        key_phrases = [chunk.text for chunk in doc.noun_chunks][:5]
-        dependencies = self._identify_dependencies(text, entities)
+        key_phrases = self._extract_key_phrases(doc)
+        dependencies = self._identify_dependencies(text, entities, hits)
         risks = self._identify_risks(text, complexity, ambiguity, testability)
         quality_score = self._calculate_quality_score(complexity, ambiguity, testability, specificity)
         
+        return self._build_requirement(
+            req_data, sequence_id,
+            type=requirement_type,
+            priority=priority,
+            complexity=complexity,
+            testability=testability,
+            ambiguity=ambiguity,
+            specificity=specificity,
+            entities=entities,
+            key_phrases=key_phrases,
+            dependencies=dependencies,
+            risks=risks,
+            quality_score=quality_score,
+            analysis_profile=profile
+        )
+    
+    def _build_requirement(self, req_data: Dict, sequence_id: int, **analysis) -> Dict:
+        text = req_data['text']
         return {
             "id":req_data.get('id', f"REQ-{sequence_id:03d}"),
             "original_text":req_data.get('original', text),
             "cleaned_text":text,
-            "type":requirement_type,
-            "priority":priority,
-            "complexity":complexity,
-            "testability":testability,
-            "ambiguity":ambiguity,
-            "specificity":specificity,
-            "entities":entities,
-            "key_phrases":key_phrases,
-            "dependencies":dependencies,
-            "risks":risks,
-            "quality_score":quality_score,
+            "type":analysis['type'],
+            "priority":analysis['priority'],
+            "complexity":analysis['complexity'],
+            "testability":analysis['testability'],
+            "ambiguity":analysis['ambiguity'],
+            "specificity":analysis['specificity'],
+            "entities":analysis['entities'],
+            "key_phrases":analysis['key_phrases'],
+            "dependencies":analysis['dependencies'],
+            "risks":analysis['risks'],
+            "quality_score":analysis['quality_score'],
             "format_detected":req_data.get('format', 'unknown'),
             "section":req_data.get('metadata', {}).get('section', 'main'),
-            "metadata":req_data.get('metadata', {})
+            "metadata":req_data.get('metadata', {}),
+            "page":req_data.get('page'),
+            "analysis_profile":analysis.get('analysis_profile', self.profile),
+            "fingerprint":requirement_fingerprint(req_data)
         }
     
-    def _classify_requirement_type(self, text: str) -> str:
+    def _keyword_counts(self, text: str, counts: Optional[Dict[str, int]]) -> Dict[str, int]:
+        return counts if counts is not None else self.keyword_matcher.count(text)
+    
+    def _classify_requirement_type(self, text: str, counts: Dict[str, int] = None) -> str:
         """Classify requirement type with confidence scoring"""
-        text_lower = text.lower()
-        scores = {}
-        
-        for req_type, keywords in self.type_classifiers.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            scores[req_type] = score
+        counts = self._keyword_counts(text, counts)
+        scores = {req_type: counts[f"type:{req_type}"] for req_type in self.type_classifiers}
         
         # Return type with highest score, default to functional
         if scores:
@@ -538,16 +796,16 @@ class SemanticRequirementAnalyzer:
         
         return 'functional'
     
-    def _assess_priority(self, text: str, metadata: Dict) -> str:
+    def _assess_priority(self, text: str, metadata: Dict, counts: Dict[str, int] = None) -> str:
         """Assess requirement priority"""
         # Check metadata first
         if 'priority' in metadata:
             return metadata['priority'].lower()
         
         # Infer from content
-        text_lower = text.lower()
-        for priority_level, indicators in self.priority_indicators.items():
-            if any(indicator in text_lower for indicator in indicators):
+        counts = self._keyword_counts(text, counts)
+        for priority_level in self.priority_indicators:
+            if counts[f"priority:{priority_level}"]:
                 return priority_level
         
         return 'medium'
@@ -560,7 +818,7 @@ class SemanticRequirementAnalyzer:
         factors.append(min(len(doc) / 50, 1.0))
         
         # Structural complexity
-        clauses = len([token for token in doc if token.dep_ in ['advcl', 'relcl', 'ccomp', 'conj']])
+        clauses = clause_count(doc)
         factors.append(min(clauses / 3, 1.0))
         
         # Conditional complexity
@@ -570,69 +828,52 @@ class SemanticRequirementAnalyzer:
         # Average of factors
         return sum(factors) / len(factors)
     
-    def _calculate_ambiguity(self, text: str) -> float:
+    def _calculate_ambiguity(self, text: str, counts: Dict[str, int] = None) -> float:
         """Calculate ambiguity score"""
-        ambiguous_terms = [
-            'appropriate', 'as needed', 'as required', 'etc', 'and so on',
-            'flexible', 'user-friendly', 'robust', 'efficient', 'fast',
-            'easy to use', 'intuitive', 'when necessary', 'if applicable'
-        ]
-        
-        vague_quantifiers = ['some', 'several', 'many', 'few', 'multiple', 'various']
-        
-        text_lower = text.lower()
-        ambiguous_count = sum(1 for term in ambiguous_terms if term in text_lower)
-        vague_count = sum(1 for quantifier in vague_quantifiers if quantifier in text_lower)
-        
-        total_ambiguity = ambiguous_count + vague_count
+        counts = self._keyword_counts(text, counts)
+        total_ambiguity = counts['ambiguous'] + counts['vague']
         return min(total_ambiguity / 5, 1.0)
     
-    def _calculate_specificity(self, text: str) -> float:
+    def _calculate_specificity(self, text: str, counts: Dict[str, int] = None) -> float:
         """Calculate how specific the requirement is"""
-        specific_indicators = [
-            'when', 'if', 'within', 'less than', 'greater than', 'equal to',
-            'exactly', 'precisely', 'specific', 'must', 'shall'
-        ]
-        
-        measurable_terms = [
-            'seconds', 'minutes', 'hours', 'percentage', 'limit', 'size',
-            'count', 'number', 'amount', 'quantity', 'frequency'
-        ]
-        
-        text_lower = text.lower()
-        specific_count = sum(1 for term in specific_indicators if term in text_lower)
-        measurable_count = sum(1 for term in measurable_terms if term in text_lower)
+        counts = self._keyword_counts(text, counts)
+        specific_count = counts['specific']
+        measurable_count = counts['measurable']
         
         specificity = (specific_count * 0.6) + (measurable_count * 0.4)
         return min(specificity / 8, 1.0)
     
-    def _assess_testability(self, text: str) -> float:
+    def _assess_testability(self, text: str, counts: Dict[str, int] = None,
+                            specificity: float = None, ambiguity: float = None) -> float:
         """Assess how testable the requirement is"""
+        counts = self._keyword_counts(text, counts)
         testability_factors = []
         
         # Specificity contributes to testability
-        testability_factors.append(self._calculate_specificity(text))
+        if specificity is None:
+            specificity = self._calculate_specificity(text, counts)
+        testability_factors.append(specificity)
         
         # Presence of clear success criteria
-        success_indicators = ['shall', 'must', 'will', 'should']
-        text_lower = text.lower()
-        clarity_score = sum(1 for indicator in success_indicators if indicator in text_lower)
+        clarity_score = counts['success']
         testability_factors.append(min(clarity_score / 3, 1.0))
         
         # Absence of ambiguity
-        testability_factors.append(1.0 - self._calculate_ambiguity(text))
+        if ambiguity is None:
+            ambiguity = self._calculate_ambiguity(text, counts)
+        testability_factors.append(1.0 - ambiguity)
         
         return sum(testability_factors) / len(testability_factors)
     
-    def _identify_dependencies(self, text: str, entities: List[Tuple[str, str]]) -> List[str]:
+    def _identify_dependencies(self, text: str, entities: List[Tuple[str, str]], hits: Set[str] = None) -> List[str]:
         """Identify potential dependencies"""
         dependencies = []
-        text_lower = text.lower()
+        if hits is None:
+            hits = self.keyword_matcher.hits(text)
         
         # System component dependencies
-        components = ['system', 'database', 'api', 'service', 'module', 'component']
-        for component in components:
-            if component in text_lower:
+        for component in self.dependency_components:
+            if component in hits:
                 dependencies.append(f"depends_on_{component}")
         
         # Entity-based dependencies
@@ -676,66 +917,32 @@ class SemanticRequirementAnalyzer:
         
         return round(score, 2)
     
-    def generate_analysis_report(self, requirements: List[Requirement]) -> Dict:
-        """Generate comprehensive analysis report"""
+    def generate_analysis_report(self, requirements: List) -> Dict:
+        """Generate comprehensive analysis report from Requirement objects or analyzed dicts"""
         if not requirements:
             return {}
         
-        # Basic statistics
-        total_requirements = len(requirements)
-        type_distribution = Counter([req.requirement_type for req in requirements])
-        priority_distribution = Counter([req.priority for req in requirements])
-        
-        # Quality metrics
-        avg_quality = np.mean([req.quality_score for req in requirements])
-        avg_complexity = np.mean([req.complexity for req in requirements])
-        avg_testability = np.mean([req.testability for req in requirements])
-        
-        # Risk analysis
-        total_risks = sum(len(req.risks) for req in requirements)
-        high_risk_reqs = [req for req in requirements if req.quality_score < 0.5]
-        
-        return {
-            'summary': {
-                'total_requirements': total_requirements,
-                'average_quality_score': round(avg_quality, 2),
-                'average_complexity': round(avg_complexity, 2),
-                'average_testability': round(avg_testability, 2),
-                'total_risks_identified': total_risks,
-                'high_risk_requirements': len(high_risk_reqs)
-            },
-            'distribution': {
-                'by_type': dict(type_distribution),
-                'by_priority': dict(priority_distribution)
-            },
-            'quality_analysis': {
-                'excellent_quality': len([r for r in requirements if r.quality_score >= 0.8]),
-                'good_quality': len([r for r in requirements if 0.6 <= r.quality_score < 0.8]),
-                'fair_quality': len([r for r in requirements if 0.4 <= r.quality_score < 0.6]),
-                'poor_quality': len([r for r in requirements if r.quality_score < 0.4])
-            },
-            'recommendations': self._generate_recommendations(requirements)
-        }
-    
-    def _generate_recommendations(self, requirements: List[Requirement]) -> List[str]:
-        """Generate recommendations based on analysis"""
-        recommendations = []
-        
-        # Check for common issues
-        ambiguous_reqs = [r for r in requirements if r.ambiguity > 0.7]
-        complex_reqs = [r for r in requirements if r.complexity > 0.8]
-        low_testability_reqs = [r for r in requirements if r.testability < 0.3]
-        
-        if ambiguous_reqs:
-            recommendations.append(f"Clarify {len(ambiguous_reqs)} ambiguous requirements")
-        
-        if complex_reqs:
-            recommendations.append(f"Simplify {len(complex_reqs)} highly complex requirements")
-        
-        if low_testability_reqs:
-            recommendations.append(f"Make {len(low_testability_reqs)} requirements more testable")
-        
-        if not recommendations:
-            recommendations.append("Requirements quality is generally good")
+        # Gather every metric in a single pass, then aggregate with NumPy
+        def field(req, attr, key):
+            return req[key] if isinstance(req, dict) else getattr(req, attr)
+        
+        rows = [
+            (
+                field(req, 'requirement_type', 'type'),
+                field(req, 'priority', 'priority'),
+                field(req, 'quality_score', 'quality_score'),
+                field(req, 'complexity', 'complexity'),
+                field(req, 'testability', 'testability'),
+                field(req, 'ambiguity', 'ambiguity'),
+                len(field(req, 'risks', 'risks'))
+            )
+            for req in requirements
+        ]
+        types, priorities, quality, complexity, testability, ambiguity, risk_counts = zip(*rows)
         
-        return recommendations
+        return build_report(
+            list(types), list(priorities),
+            np.array(quality, dtype=float), np.array(complexity, dtype=float),
+            np.array(testability, dtype=float), np.array(ambiguity, dtype=float),
+            np.array(risk_counts)
+        )
@@ -0,0 +1,74 @@
+import re
+import hashlib
+from difflib import SequenceMatcher
+from typing import List, Dict, Tuple, Iterable
+
+from .embedding_cache import normalize_text
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+
+def fingerprint(text: str) -> str:
+    """sha256 of the whitespace-normalized text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def requirement_fingerprint(req_data: Dict) -> str:
+    """
+    Fingerprint of an extracted requirement block: everything its analysis
+    depends on, i.e. the text and an explicitly stated priority. Section and
+    position are deliberately left out so moved requirements are reused.
+    """
+    priority = req_data.get('metadata', {}).get('priority', '')
+    return fingerprint(f"{priority}\x00{req_data['text']}")
+
+
+def paragraph_fingerprints(text: str) -> List[str]:
+    return [fingerprint(paragraph) for paragraph in PARAGRAPH_BREAK.split(text) if paragraph.strip()]
+
+
+def diff_paragraphs(old: List[str], new: List[str]) -> Dict[str, int]:
+    """Paragraph-level change counts between two fingerprint sequences"""
+    counts = {'unchanged': 0, 'modified': 0, 'added': 0, 'removed': 0}
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            counts['unchanged'] += i2 - i1
+        elif tag == 'replace':
+            paired = min(i2 - i1, j2 - j1)
+            counts['modified'] += paired
+            counts['removed'] += (i2 - i1) - paired
+            counts['added'] += (j2 - j1) - paired
+        elif tag == 'delete':
+            counts['removed'] += i2 - i1
+        else:
+            counts['added'] += j2 - j1
+    return counts
+
+
+def diff_requirements(old: Iterable[Tuple[str, str]], new: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """
+    Requirement-level diff of two revisions given as (requirement id,
+    fingerprint) pairs. A requirement is unchanged when its fingerprint
+    existed before, modified when its id existed with different content,
+    and added otherwise; old ids that disappeared are removed.
+    """
+    old = list(old)
+    old_fingerprints = {fp for _, fp in old}
+    old_ids = {req_id for req_id, _ in old}
+    new_ids = set()
+    new_fingerprints = set()
+
+    diff = {'added': [], 'modified': [], 'unchanged': [], 'removed': []}
+    for req_id, fp in new:
+        new_ids.add(req_id)
+        new_fingerprints.add(fp)
+        if fp in old_fingerprints:
+            diff['unchanged'].append(req_id)
+        elif req_id in old_ids:
+            diff['modified'].append(req_id)
+        else:
+            diff['added'].append(req_id)
+    # Renumbered requirements keep their content and are not reported as removed
+    diff['removed'] = [req_id for req_id, fp in old if req_id not in new_ids and fp not in new_fingerprints]
+    return diff
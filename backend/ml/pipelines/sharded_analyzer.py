@@ -0,0 +1,262 @@
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterator, Optional, Tuple, Any
+
+from .requirement_analyzer import SemanticRequirementAnalyzer, SEMANTIC_FALLBACK_THRESHOLD
+from .document_index import DocumentIndex, match_section_header
+from .deduplication import NearDuplicateDetector
+from .embedding_cache import configure_embedding_cache
+from .embedding_backends import configure_embedding_backends, embedding_backend_settings
+from .revision_diff import requirement_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Analyzer living in each worker process, created once by the pool initializer
+_worker_analyzer: Optional[SemanticRequirementAnalyzer] = None
+
+
+def _init_worker(analyzer_kwargs: Dict[str, Any], embedding_cache: Optional[Dict[str, Any]],
+                 embedding_backends: Optional[Dict[str, Any]] = None):
+    """
+    Preload spaCy and the embedding model once per worker process. Spawned
+    workers only see environment defaults, so the parent passes the
+    embedding cache and backend settings it resolved at startup.
+    """
+    global _worker_analyzer
+    if embedding_cache:
+        configure_embedding_cache(**embedding_cache)
+    if embedding_backends:
+        configure_embedding_backends(**embedding_backends)
+    # spaCy multiprocessing inside a pool worker would oversubscribe the cores
+    _worker_analyzer = SemanticRequirementAnalyzer(**{**analyzer_kwargs, 'n_process': 1})
+
+
+def _extract_shard(shard_text: str, page_offsets: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Run the extraction strategies over one shard. The semantic candidates are
+    always included; whether the fallback applies is decided by the parent
+    for the whole document.
+    """
+    return _worker_analyzer._extract_candidates(shard_text, page_offsets=page_offsets, semantic=True)
+
+
+def _embed_texts(texts: List[str]):
+    return _worker_analyzer.encoder.encode(texts)
+
+
+def _analyze_batch(candidates: List[Dict], profile: Optional[str] = None,
+                   reuse: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    """spaCy parsing and scoring for already deduplicated candidates"""
+    if reuse:
+        return _worker_analyzer._analyze_or_reuse(candidates, 0, profile, reuse)
+    return _worker_analyzer._analyze_requirements(candidates, profile=profile)
+
+
+# Order in which the single-process analyzer emits the candidates of each strategy
+_FORMAT_ORDER = {'formal': 0, 'numbered': 1, 'pattern': 2, 'semantic': 3}
+# Strategies whose IDs are generated by counting, so each shard starts again at 001
+_GENERATED_ID_PREFIXES = {'pattern': 'PAT', 'semantic': 'SEM'}
+
+
+def merge_shard_candidates(shard_candidates: List[List[Dict]]) -> List[Dict]:
+    """
+    Combine the candidates extracted from each shard into the list the
+    single-process analyzer produces for the whole document: grouped by
+    strategy, in document order within a strategy, with PAT-/SEM- IDs
+    renumbered across shards. Semantic candidates are only kept when the
+    other strategies found fewer than SEMANTIC_FALLBACK_THRESHOLD in total.
+    """
+    ranked = sorted(
+        (_FORMAT_ORDER.get(req.get('format'), len(_FORMAT_ORDER)), shard, position, req)
+        for shard, candidates in enumerate(shard_candidates)
+        for position, req in enumerate(candidates)
+    )
+    primary = sum(1 for _, _, _, req in ranked if req.get('format') != 'semantic')
+    use_semantic = primary < SEMANTIC_FALLBACK_THRESHOLD
+
+    merged = []
+    counters = {}
+    for _, _, _, req in ranked:
+        format_ = req.get('format')
+        if format_ == 'semantic' and not use_semantic:
+            continue
+        prefix = _GENERATED_ID_PREFIXES.get(format_)
+        if prefix:
+            counters[prefix] = counters.get(prefix, 0) + 1
+            req = {**req, 'id': f"{prefix}-{counters[prefix]:03d}"}
+        merged.append(req)
+    return merged
+
+
+def split_into_shards(text: str, target_chars: int) -> List[str]:
+    """
+    Split text into shards of roughly target_chars, cutting only at line
+    boundaries. A shard ends right before the next section header once it has
+    reached the target size; if no header shows up before twice the target,
+    the next blank line is used instead.
+    """
+    shards = []
+    current: List[str] = []
+    size = 0
+
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if current and size >= target_chars:
+            at_header = bool(stripped) and match_section_header(stripped) is not None
+            at_paragraph = not stripped and size >= 2 * target_chars
+            if at_header or at_paragraph:
+                shards.append('\n'.join(current))
+                current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+
+    if current:
+        shards.append('\n'.join(current))
+    return [shard for shard in shards if shard.strip()]
+
+
+def shard_page_offsets(text: str, shards: List[str], page_offsets: List[int]) -> List[List[int]]:
+    """
+    Page offsets relative to each shard. Pages that start before a shard are
+    clamped to 0, so counting offsets <= a position still gives the absolute
+    page number.
+    """
+    relative = []
+    cursor = 0
+    for shard in shards:
+        start = text.index(shard, cursor)
+        cursor = start + len(shard)
+        relative.append([max(offset - start, 0) for offset in page_offsets])
+    return relative
+
+
+_pools: Dict[Tuple, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers: int, analyzer_kwargs: Dict[str, Any], embedding_cache: Optional[Dict[str, Any]],
+              embedding_backends: Optional[Dict[str, Any]] = None) -> ProcessPoolExecutor:
+    """Long-lived pool per configuration, so workers keep their models between documents"""
+    key = (workers, tuple(sorted(analyzer_kwargs.items())), tuple(sorted((embedding_cache or {}).items())),
+           tuple(sorted((embedding_backends or {}).items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # spawn: forking a process that already holds torch/spaCy state is unsafe
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(analyzer_kwargs, embedding_cache, embedding_backends)
+            )
+            _pools[key] = pool
+        return pool
+
+
+def shutdown_shard_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+atexit.register(shutdown_shard_pools)
+
+
+class ShardedRequirementAnalyzer:
+    """
+    Analyze very large BRDs on several cores.
+
+    The text is split into section-aligned shards. Worker processes, which
+    preload the models once, extract the candidates of each shard; the
+    parent merges them in the single-process order (renumbering generated
+    IDs and applying the semantic fallback to the whole document), runs the
+    global greedy deduplication over embeddings computed by the workers and
+    farms the surviving candidates back out for spaCy analysis. The result
+    matches the single-process analyzer up to extraction effects at shard
+    boundaries. Accepts the same keyword arguments as
+    SemanticRequirementAnalyzer; embedding_cache and embedding_backends are
+    passed to configure_embedding_cache/configure_embedding_backends in each
+    worker and default to the parent's current embedding backend settings.
+    """
+
+    def __init__(self, workers: int = None, shard_chars: int = 100_000,
+                 embedding_cache: Optional[Dict[str, Any]] = None,
+                 embedding_backends: Optional[Dict[str, Any]] = None, **analyzer_kwargs):
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_chars = shard_chars
+        self.embedding_cache = embedding_cache
+        self.embedding_backends = embedding_backends if embedding_backends is not None else embedding_backend_settings()
+        self.analyzer_kwargs = analyzer_kwargs
+        self.dedup_threshold = analyzer_kwargs.get('dedup_threshold', 0.85)
+        self.dedup_block_size = analyzer_kwargs.get('dedup_block_size', 1024)
+
+    def extract_requirements(self, text: str, brd_name: str = "unknown", profile: str = None) -> List[Dict]:
+        try:
+            return [req for chunk in self.iter_requirements(text, brd_name, profile=profile) for req in chunk]
+        except Exception as e:
+            logger.error(f"Error processing BRD {brd_name}: {e}")
+            return []
+
+    def iter_requirements(self, text: str, brd_name: str = "unknown", chunk_size: int = 256,
+                          profile: str = None, reuse: Optional[Dict[str, Dict]] = None,
+                          index: Optional[DocumentIndex] = None,
+                          page_offsets: Optional[List[int]] = None) -> Iterator[List[Dict]]:
+        """
+        Yield analyzed requirements in chunks, in document order, as soon as
+        they are analyzed. Extraction of every shard finishes first, since
+        candidate order and the semantic fallback depend on the whole
+        document. A document-wide index does not apply to shards, so each
+        worker indexes its own shard. Page numbers come from page_offsets
+        (page start offsets into text).
+        """
+        profile = SemanticRequirementAnalyzer._validate_profile(
+            profile or self.analyzer_kwargs.get('profile', 'full')
+        )
+        shards = split_into_shards(text, self.shard_chars)
+        logger.info(f"Processing BRD: {brd_name} in {len(shards)} shards on {self.workers} workers")
+
+        shard_pages = (shard_page_offsets(text, shards, page_offsets) if page_offsets is not None
+                       else [None] * len(shards))
+
+        pool = _get_pool(self.workers, self.analyzer_kwargs, self.embedding_cache, self.embedding_backends)
+        extract_futures = [pool.submit(_extract_shard, shard, pages) for shard, pages in zip(shards, shard_pages)]
+        embed_futures = []
+        analysis_futures = deque()
+
+        detector = NearDuplicateDetector(self.dedup_threshold, self.dedup_block_size)
+        try:
+            candidates = merge_shard_candidates([future.result() for future in extract_futures])
+            batches = [candidates[start:start + chunk_size] for start in range(0, len(candidates), chunk_size)]
+            embed_futures = [pool.submit(_embed_texts, [req['text'] for req in batch]) for batch in batches]
+
+            for batch, future in zip(batches, embed_futures):
+                # Global dedup keeps the first occurrence in candidate order
+                unique = [batch[i] for i in detector.add(future.result())]
+                if unique:
+                    analysis_futures.append(pool.submit(
+                        _analyze_batch, unique, profile, self._reuse_for(unique, reuse)
+                    ))
+
+                # Hand out whatever is already analyzed without waiting on later batches
+                while analysis_futures and analysis_futures[0].done():
+                    yield analysis_futures.popleft().result()
+
+            while analysis_futures:
+                yield analysis_futures.popleft().result()
+        finally:
+            for future in extract_futures + embed_futures + list(analysis_futures):
+                future.cancel()
+
+    @staticmethod
+    def _reuse_for(batch: List[Dict], reuse: Optional[Dict[str, Dict]]) -> Optional[Dict[str, Dict]]:
+        """Only ship the previous analyses a batch can actually use to the worker"""
+        if not reuse:
+            return None
+        fingerprints = (requirement_fingerprint(req) for req in batch)
+        return {fp: reuse[fp] for fp in fingerprints if fp in reuse} or None
@@ -1,46 +1,136 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, AsyncIterator
+import copy
 import json
 import re
-import requests
+import time
+import asyncio
+import logging
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime
 from .traceability_engine import TraceabilityEngine 
-from app.models.database import Document
+from .llm_providers import get_llm_provider
+from .revision_diff import fingerprint
+from app.models.database import Document, RequirementTestCases
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
-import os
-from google import genai
-
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+TEST_SUITE_SYSTEM_PROMPT = (
+    "You are an expert QA engineer specializing in creating comprehensive test suites. "
+    "Always respond with valid JSON. "
+    "Generate complete test suites including test cases and integration scenarios "
+    "in a single response."
+)
+# Events of a streamed generation buffered ahead of a slow consumer
+STREAM_QUEUE_SIZE = 256
+
+# Rough size of the generated JSON per requirement (3+ test cases plus its share of scenarios)
+OUTPUT_TOKENS_PER_REQUIREMENT = 700
+
+
 @dataclass
 class AIConfig:
-    api_key: str = os.getenv("GEMINI_API_KEY")
-    base_url: str = "https://generativelanguage.googleapis.com/v1beta"
-    model: str = "gemini-2.5-flash-lite"
+    api_key: str = None  # None: the provider's configured key (GEMINI_API_KEY)
+    provider: str = "gemini"
+    model: str = "gemini-2.5-flash"
+    # Estimated prompt + output tokens per generation request
+    batch_tokens: int = int(os.getenv("TEST_GENERATION_BATCH_TOKENS", "12000"))
+    max_batch_size: int = int(os.getenv("TEST_GENERATION_MAX_BATCH_SIZE", "20"))
+    # Generation requests in flight at once for one suite
+    concurrency: int = int(os.getenv("TEST_GENERATION_CONCURRENCY", "4"))
+    # Serve identical prompts from the LLM response cache
+    use_cache: bool = True
+
+
+@dataclass
+class _BatchDone:
+    """Queue marker for a finished streamed batch; grouped is None if the batch must not be memoized"""
+    batch: List[Dict]
+    grouped: Optional[Dict[str, List[Dict]]] = None
+    scenarios: List[Dict] = field(default_factory=list)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for batch packing"""
+    return max(1, len(text) // 4)
+
+
+def _requirement_summary(requirement: Dict) -> Dict:
+    return {
+        'id': requirement['id'],
+        'text': requirement['original_text'],
+        'type': requirement.get('type', 'functional')
+    }
+
+
+def requirement_content_hash(requirement: Dict) -> str:
+    """Fingerprint of everything the test generation prompt takes from a requirement"""
+    return fingerprint(f"{requirement.get('type', 'functional')}\x00{requirement['original_text']}")
+
+
+def _parse_test_suite(response: str) -> Dict:
+    result = json.loads(response)
+    if not isinstance(result, dict):
+        raise ValueError("Expected a JSON object with test_cases and test_scenarios")
+    return result
+
+
+def pack_requirement_batches(requirements: List[Dict], max_tokens: int, max_batch_size: int) -> List[List[Dict]]:
+    """
+    Split requirements, in document order, into batches whose estimated
+    prompt plus output tokens stay within max_tokens. A requirement larger
+    than the budget gets a batch of its own.
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for requirement in requirements:
+        cost = estimate_tokens(json.dumps(_requirement_summary(requirement))) + OUTPUT_TOKENS_PER_REQUIREMENT
+        if batch and (batch_tokens + cost > max_tokens or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(requirement)
+        batch_tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
 
 class AdvancedTestGenerator:
-    def __init__(self, db: Session, config: AIConfig = None):
+    def __init__(self, db: Session, config: AIConfig = None, traceability_engine: TraceabilityEngine = None):
         self.config = config or AIConfig()
+        self.provider = get_llm_provider(self.config.provider, self.config.api_key)
         self.template_manager = TestTemplateManager()
         self.db = db
+        # Callers pass an engine built with the configured embedding model; the default one is created on demand
+        self.traceability_engine = traceability_engine
         
-    def generate_test_suite(self, requirements: List[Dict], document_id: int) -> Dict:
-        """Generate comprehensive test suite using ai model in a single API call"""
+    async def generate_test_suite(self, requirements: List[Dict], document_id: int, force_refresh: bool = False,
+                                  refresh_requirement_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Generate comprehensive test suite using ai model, in concurrent token-budgeted batches.
+        Requirements whose content was seen before reuse their memoized test cases unless
+        force_refresh is set or their id is in refresh_requirement_ids.
+        """
         try:
             document = self.db.query(Document).filter(Document.id == document_id).first()
             project_id = document.project_id if document else None
-            # Generate everything in one API call
-            ai_response = self._generate_complete_test_suite_ai(requirements)
-            traceability_engine = TraceabilityEngine()
+            ai_response = await self._generate_complete_test_suite_ai(requirements, force_refresh, refresh_requirement_ids)
+            if self.traceability_engine is None:
+                self.traceability_engine = TraceabilityEngine()
+            traceability_engine = self.traceability_engine
             
             test_suite = {
                 'test_cases': ai_response.get('test_cases', []),
                 'test_scenarios': ai_response.get('test_scenarios', []),
                 'traceability_matrix': traceability_engine.build_traceability_matrix(requirements, ai_response.get('test_cases', []), project_id),
-                'coverage_analysis': self._analyze_coverage(requirements, ai_response.get('test_cases', []))
+                'coverage_analysis': self._analyze_coverage(requirements, ai_response.get('test_cases', [])),
+                'generation_stats': ai_response.get('generation_stats', {})
             }
             
             return test_suite
@@ -49,22 +139,361 @@ class AdvancedTestGenerator:
             print(f"AI test suite generation failed: {e}")
             return self._generate_fallback_test_suite(requirements)
     
-    def _generate_complete_test_suite_ai(self, requirements: List[Dict]) -> Dict:
-        """Generate complete test suite in a single API call"""
-        prompt = self._create_complete_test_suite_prompt(requirements)
-        response = self._call_ai(prompt)
-        return json.loads(response)
+    async def _generate_complete_test_suite_ai(self, requirements: List[Dict], force_refresh: bool = False,
+                                               refresh_requirement_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Generate the test suite batch by batch, at most config.concurrency
+        requests at a time, so total latency is about that of the slowest
+        batch. Only requirements without memoized test cases are sent to the
+        model. A failed batch falls back to basic test cases for its own
+        requirements only (and is not memoized).
+        """
+        refresh = {str(req_id) for req_id in refresh_requirement_ids or []}
+        memoized, memoized_scenarios = ({}, []) if force_refresh else self._memoized_test_cases(
+            [req for req in requirements if str(req['id']) not in refresh]
+        )
+        pending = [req for req in requirements if str(req['id']) not in memoized]
+
+        batches = pack_requirement_batches(pending, self.config.batch_tokens, self.config.max_batch_size)
+        semaphore = asyncio.Semaphore(max(1, self.config.concurrency))
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(
+            # A forced refresh must not be answered from the LLM response cache either
+            self._generate_batch(batch, semaphore, use_cache=not (force_refresh or any(
+                str(req['id']) in refresh for req in batch
+            )))
+            for batch in batches
+        ))
+
+        generated = {}
+        unmatched = []
+        test_scenarios = memoized_scenarios
+        for batch, (result, _, fell_back) in zip(batches, outcomes):
+            grouped, leftovers, scenarios = self._group_batch_cases(batch, result)
+            if not fell_back:
+                self._memoize_test_cases(batch, grouped, scenarios)
+            generated.update(grouped)
+            unmatched.extend(leftovers)
+            test_scenarios.extend(scenarios)
+        if batches:
+            self.db.commit()
+
+        batch_seconds = [seconds for _, seconds, _ in outcomes]
+        fallback_batches = sum(1 for _, _, fell_back in outcomes if fell_back)
+        merged = self._number_test_cases(requirements, {**memoized, **generated}, unmatched, test_scenarios)
+        merged['generation_stats'] = {
+            'batches': len(batches),
+            'fallback_batches': fallback_batches,
+            'memoized_requirements': len(memoized),
+            'generated_requirements': len(pending),
+            'concurrency': self.config.concurrency,
+            'seconds': round(time.perf_counter() - started, 3),
+            'slowest_batch_seconds': round(max(batch_seconds), 3) if batch_seconds else 0.0,
+        }
+        logger.info(f"Generated {len(merged['test_cases'])} test cases for {len(requirements)} requirements "
+                    f"({len(memoized)} memoized) in {len(batches)} batches ({fallback_batches} fallback)")
+        return merged
+
+    async def _generate_batch(self, batch: List[Dict], semaphore: asyncio.Semaphore, use_cache: bool = True):
+        """(suite for the batch, seconds, whether the fallback was used)"""
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                prompt = self._create_complete_test_suite_prompt(batch)
+                result = await self._call_ai(prompt, use_cache)
+                return result, time.perf_counter() - started, False
+            except Exception as e:
+                logger.warning(f"Test generation failed for a batch of {len(batch)} requirements, "
+                               f"using basic test cases: {e}")
+                cases = []
+                for req in batch:
+                    cases.extend(self._generate_basic_test_cases(req, len(cases) + 1))
+                result = {
+                    'test_cases': cases,
+                    'test_scenarios': self._generate_basic_integration_scenarios(cases)
+                }
+                return result, time.perf_counter() - started, True
+
+    async def stream_test_suite(self, requirements: List[Dict], force_refresh: bool = False,
+                                refresh_requirement_ids: Optional[List[int]] = None) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of generate_test_suite. Yields events as they
+        happen instead of one merged suite:
+
+        - ``{'event': 'test_case', 'test_case': ..., 'memoized': bool}`` for
+          every memoized case up front, then for every generated case as
+          soon as its JSON object is complete in the model's token stream
+        - ``{'event': 'batch', ...}`` when a batch finishes
+        - ``{'event': 'generation_stats', 'generation_stats': ...}`` last
+
+        Generated cases arrive in completion order, so they carry no
+        suite-wide ID; scenarios are not streamed.
+        """
+        refresh = {str(req_id) for req_id in refresh_requirement_ids or []}
+        memoized, _ = ({}, []) if force_refresh else self._memoized_test_cases(
+            [req for req in requirements if str(req['id']) not in refresh]
+        )
+        for req in requirements:
+            for case in memoized.get(str(req['id']), []):
+                yield {'event': 'test_case', 'test_case': case, 'memoized': True}
+
+        pending = [req for req in requirements if str(req['id']) not in memoized]
+        batches = pack_requirement_batches(pending, self.config.batch_tokens, self.config.max_batch_size)
+        semaphore = asyncio.Semaphore(max(1, self.config.concurrency))
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        started = time.perf_counter()
+
+        async def run(batch):
+            use_cache = not (force_refresh or any(str(req['id']) in refresh for req in batch))
+            done = _BatchDone(batch)
+            try:
+                result = await self._stream_batch(batch, semaphore, queue, use_cache)
+                if result is not None:
+                    done.grouped, done.scenarios = result
+            except Exception as e:
+                logger.error(f"Streamed test generation batch failed: {e}")
+            await queue.put(done)
+
+        tasks = [asyncio.create_task(run(batch)) for batch in batches]
+        remaining = len(tasks)
+        batch_events = []
+        try:
+            while remaining:
+                event = await queue.get()
+                if isinstance(event, _BatchDone):
+                    remaining -= 1
+                    # Only this consumer touches the session; the batch tasks just report
+                    if event.grouped is not None:
+                        self._memoize_test_cases(event.batch, event.grouped, event.scenarios)
+                        self.db.commit()
+                    continue
+                if event['event'] == 'batch':
+                    batch_events.append(event)
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        fallback_batches = sum(1 for event in batch_events if event['fallback'])
+        yield {'event': 'generation_stats', 'generation_stats': {
+            'batches': len(batches),
+            'fallback_batches': fallback_batches,
+            'memoized_requirements': len(memoized),
+            'generated_requirements': len(pending),
+            'concurrency': self.config.concurrency,
+            'seconds': round(time.perf_counter() - started, 3),
+            'slowest_batch_seconds': max((event['seconds'] for event in batch_events), default=0.0),
+        }}
+
+    async def _stream_batch(self, batch: List[Dict], semaphore: asyncio.Semaphore, queue: asyncio.Queue,
+                            use_cache: bool = True) -> Optional[Tuple[Dict[str, List[Dict]], List[Dict]]]:
+        """
+        Stream one batch's test cases onto the queue as they are parsed and
+        return them grouped by requirement, plus the batch's scenarios
+        (referencing the case dicts), for memoization. If the stream fails,
+        requirements that got no case yet receive basic test cases, and None
+        is returned so the batch is not memoized.
+        """
+        requirements_by_key = {str(req['id']): req for req in batch}
+        grouped: Dict[str, List[Dict]] = {}
+        cases_by_id = {}
+        scenarios = []
+        async with semaphore:
+            started = time.perf_counter()
+            fell_back = False
+            try:
+                items = self.provider.stream_json_items(
+                    self.config.model,
+                    self._create_complete_test_suite_prompt(batch),
+                    ('test_cases', 'test_scenarios'),
+                    system=TEST_SUITE_SYSTEM_PROMPT,
+                    json_output=True,
+                    use_cache=self.config.use_cache and use_cache
+                )
+                async for key, item in items:
+                    if not isinstance(item, dict):
+                        continue
+                    if key == 'test_scenarios':
+                        scenarios.append(item)
+                        continue
+                    # Copy: the provider caches the parsed items once the stream ends
+                    case = {name: value for name, value in item.items() if name != 'id'}
+                    cases_by_id.setdefault(str(item.get('id')), case)
+                    requirement = requirements_by_key.get(str(case.get('requirement_id')))
+                    if requirement is not None:
+                        case['requirement_id'] = requirement['id']
+                        grouped.setdefault(str(requirement['id']), []).append(case)
+                    await queue.put({'event': 'test_case', 'test_case': case, 'memoized': False})
+            except Exception as e:
+                logger.warning(f"Streamed test generation failed for a batch of {len(batch)} requirements, "
+                               f"using basic test cases where none were received: {e}")
+                fell_back = True
+                for req in batch:
+                    if str(req['id']) in grouped:
+                        continue
+                    for case in self._generate_basic_test_cases(req, 1):
+                        case.pop('id')
+                        await queue.put({'event': 'test_case', 'test_case': case, 'memoized': False})
+
+            await queue.put({
+                'event': 'batch',
+                'requirements': len(batch),
+                'fallback': fell_back,
+                'seconds': round(time.perf_counter() - started, 3)
+            })
+        if fell_back:
+            return None
+        return grouped, [
+            dict(scenario, test_cases=[
+                cases_by_id[str(case_id)] for case_id in scenario.get('test_cases') or [] if str(case_id) in cases_by_id
+            ])
+            for scenario in scenarios
+        ]
+
+    def _group_batch_cases(self, batch: List[Dict], result: Dict) -> Tuple[Dict[str, List[Dict]], List[Dict], List[Dict]]:
+        """
+        Split one batch's suite into test cases per requirement (in the
+        order the model returned them), cases naming an unknown requirement,
+        and scenarios whose test_cases hold the referenced case dicts.
+        """
+        requirements_by_key = {str(req['id']): req for req in batch}
+        grouped: Dict[str, List[Dict]] = {}
+        unmatched = []
+        cases_by_id = {}
+        for case in result.get('test_cases', []):
+            if not isinstance(case, dict):
+                continue
+            cases_by_id.setdefault(str(case.get('id')), case)
+            key = str(case.get('requirement_id'))
+            if key in requirements_by_key:
+                case['requirement_id'] = requirements_by_key[key]['id']
+                grouped.setdefault(key, []).append(case)
+            else:
+                unmatched.append(case)
+
+        scenarios = []
+        for scenario in result.get('test_scenarios', []):
+            if not isinstance(scenario, dict):
+                continue
+            scenario['test_cases'] = [
+                cases_by_id[str(case_id)] for case_id in scenario.get('test_cases', []) if str(case_id) in cases_by_id
+            ]
+            scenarios.append(scenario)
+        return grouped, unmatched, scenarios
+
+    def _number_test_cases(self, requirements: List[Dict], cases_by_requirement: Dict[str, List[Dict]],
+                           unmatched: List[Dict], test_scenarios: List[Dict]) -> Dict:
+        """
+        Stable IDs: test cases are ordered by requirement (document order,
+        then the order the model returned them) and numbered from 1
+        regardless of which batch finished first or whether they were
+        memoized. Scenario references are replaced by the new IDs.
+        """
+        test_cases = []
+        for req in requirements:
+            test_cases.extend(cases_by_requirement.get(str(req['id']), []))
+        test_cases.extend(unmatched)
+        for number, case in enumerate(test_cases, 1):
+            case['id'] = number
+        for scenario in test_scenarios:
+            scenario['test_cases'] = [case['id'] for case in scenario['test_cases']]
+        return {'test_cases': test_cases, 'test_scenarios': test_scenarios}
+
+    def _memoized_test_cases(self, requirements: List[Dict]) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+        """
+        Copies of memoized test cases per requirement id (as str) for
+        requirements seen before, and the memoized scenarios among them
+        (test_cases holding the case dicts, as from _group_batch_cases).
+        A scenario keeps only its cases of requirements memoized here.
+        """
+        hashes = {str(req['id']): requirement_content_hash(req) for req in requirements}
+        unique = list(set(hashes.values()))
+        stored = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            rows = self.db.query(RequirementTestCases).filter(
+                RequirementTestCases.content_hash.in_(unique[start:start + 500]),
+                RequirementTestCases.provider == self.config.provider,
+                RequirementTestCases.model == self.config.model
+            ).all()
+            stored.update((row.content_hash, row) for row in rows)
+
+        memoized = {}
+        key_by_hash = {}  # First requirement with each memoized content, in document order
+        for req in requirements:
+            key = str(req['id'])
+            row = stored.get(hashes[key])
+            if row is not None and row.test_cases:
+                memoized[key] = [dict(copy.deepcopy(case), requirement_id=req['id']) for case in row.test_cases]
+                key_by_hash.setdefault(hashes[key], key)
+
+        scenarios = []
+        for content_hash, key in key_by_hash.items():
+            for scenario in stored[content_hash].test_scenarios or []:
+                cases = []
+                for case_hash, position in scenario['test_cases']:
+                    owner = key_by_hash.get(case_hash)
+                    if owner is not None and position < len(memoized[owner]):
+                        cases.append(memoized[owner][position])
+                if cases:
+                    scenarios.append(dict(copy.deepcopy(scenario), test_cases=cases))
+        return memoized, scenarios
+
+    def _memoize_test_cases(self, batch: List[Dict], grouped: Dict[str, List[Dict]],
+                            scenarios: Optional[List[Dict]] = None):
+        """
+        Store freshly generated test cases by requirement content hash
+        (committed by the caller). Each scenario is stored with the
+        requirement of its first case, its cases as [content hash, index].
+        """
+        cases_by_hash = {}
+        references = {}
+        for req in batch:
+            cases = grouped.get(str(req['id']))
+            if cases:
+                content_hash = requirement_content_hash(req)
+                cases_by_hash[content_hash] = [
+                    {key: value for key, value in case.items() if key not in ('id', 'requirement_id')}
+                    for case in cases
+                ]
+                references.update((id(case), [content_hash, position]) for position, case in enumerate(cases))
+        if not cases_by_hash:
+            return
+
+        scenarios_by_hash = {}
+        for scenario in scenarios or []:
+            refs = [references[id(case)] for case in scenario.get('test_cases', []) if id(case) in references]
+            if refs:
+                scenarios_by_hash.setdefault(refs[0][0], []).append(dict(scenario, test_cases=refs))
+
+        existing = {
+            row.content_hash: row for row in self.db.query(RequirementTestCases).filter(
+                RequirementTestCases.content_hash.in_(list(cases_by_hash)),
+                RequirementTestCases.provider == self.config.provider,
+                RequirementTestCases.model == self.config.model
+            )
+        }
+        now = datetime.utcnow()
+        for content_hash, cases in cases_by_hash.items():
+            row = existing.get(content_hash)
+            if row is None:
+                self.db.add(RequirementTestCases(
+                    content_hash=content_hash,
+                    provider=self.config.provider,
+                    model=self.config.model,
+                    test_cases=cases,
+                    test_scenarios=scenarios_by_hash.get(content_hash, []),
+                    created_at=now,
+                    updated_at=now
+                ))
+            else:
+                row.test_cases = cases
+                row.test_scenarios = scenarios_by_hash.get(content_hash, [])
+                row.updated_at = now
     
     def _create_complete_test_suite_prompt(self, requirements: List[Dict]) -> str:
         """Create optimized prompt for complete test suite generation"""
-        requirements_summary = json.dumps([
-            {
-                'id': req['id'],
-                'text': req['original_text'],
-                'type': req.get('type', 'functional')
-            }
-            for req in requirements
-        ], indent=2)
+        requirements_summary = json.dumps([_requirement_summary(req) for req in requirements], indent=2)
         
         return f"""
         Generate a complete test suite for the following software requirements in a single response.
@@ -177,59 +606,20 @@ class AdvancedTestGenerator:
             'total_test_cases': len(test_cases)
         }
     
-    def _call_ai(self, prompt: str) -> str:
-        """Call Google Gemini model via API"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.config.api_key}"
-        }
-
-        # Gemini uses `contents` instead of `messages`
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": (
-                            "You are an expert QA engineer specializing in creating comprehensive test suites. "
-                            "Always respond with valid JSON. "
-                            "Generate complete test suites including test cases and integration scenarios "
-                            "in a single response.\n\n"
-                            f"User prompt: {prompt}"
-                        )}
-                    ]
-                }
-            ]
-        }
-
+    async def _call_ai(self, prompt: str, use_cache: bool = True) -> Dict:
+        """Parsed test suite JSON from the configured model (Gemini by default), cached by prompt"""
         try:
-            # response = requests.post(
-            #     f"{self.config.base_url}/models/{self.config.model}:generateContent",
-            #     headers=headers,
-            #     json=payload
-            # )
-            # response.raise_for_status()
-
-            # data = response.json()
-            # # Gemini responses: candidates[0].content.parts[0].text
-            # return data["candidates"][0]["content"]["parts"][0]["text"]
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[  
-                        "You are an expert QA engineer specializing in creating comprehensive test suites. "
-                        "Always respond with valid JSON."
-                        "Generate complete test suites including test cases and integration scenarios "
-                        "in a single response.\n\n"
-                        f"User prompt: {prompt}"
-                    ],
-                    config={
-                        "response_mime_type": "application/json"
-                    },
+            return await self.provider.generate_json(
+                self.config.model,
+                prompt,
+                system=TEST_SUITE_SYSTEM_PROMPT,
+                json_output=True,
+                parse=_parse_test_suite,
+                use_cache=self.config.use_cache and use_cache
             )
-            print("Gemini API response received:", response.text)
-            return response.text
 
         except Exception as e:
-            print(f"Gemini API error: {e}")
+            logger.error(f"{self.config.provider} API error: {e}")
             raise
     
     def _generate_fallback_test_suite(self, requirements: List[Dict]) -> Dict:
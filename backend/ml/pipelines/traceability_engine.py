@@ -3,12 +3,14 @@ from chromadb.config import Settings
 import uuid
 from typing import List, Dict, Any
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from .model_registry import get_model_registry
 
 class TraceabilityEngine:
-    def __init__(self, persist_directory: str = "./chroma_traceability"):
+    def __init__(self, persist_directory: str = "./chroma_traceability", model_name: str = 'all-MiniLM-L6-v2',
+                 embedding_backend: str = None, onnx_model_dir: str = None):
         self.client = chromadb.PersistentClient(path=persist_directory)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # All vectors handed to Chroma go through the shared embedding cache
+        self.encoder = get_model_registry().get_text_encoder(model_name, embedding_backend, onnx_model_dir)
         
         # Create collections
         self.requirements_collection = self._get_or_create_collection("requirements")
@@ -96,8 +98,12 @@ class TraceabilityEngine:
                 })
                 ids.append(f"req_{project_id}_{req_id}")
             
+            if not documents:
+                return
+            
             self.requirements_collection.add(
                 documents=documents,
+                embeddings=self.encoder.encode(documents).tolist(),
                 metadatas=metadatas,
                 ids=ids
             )
@@ -127,8 +133,12 @@ class TraceabilityEngine:
                 })
                 ids.append(f"tc_{project_id}_{tc_id}")
             
+            if not documents:
+                return
+            
             self.test_cases_collection.add(
                 documents=documents,
+                embeddings=self.encoder.encode(documents).tolist(),
                 metadatas=metadatas,
                 ids=ids
             )
@@ -141,12 +151,15 @@ class TraceabilityEngine:
         semantic_links = []
         
         try:
-            for req in requirements:
+            # Requirement vectors were cached when they were stored, so this is a cache read
+            req_texts = [req.get('cleaned_text', req.get('original_text', '')) for req in requirements]
+            req_embeddings = self.encoder.encode(req_texts) if req_texts else []
+            
+            for req, req_text, req_embedding in zip(requirements, req_texts, req_embeddings):
                 req_id = req['id']
-                req_text = req.get('cleaned_text', req.get('original_text', ''))
                 
                 # Find semantically similar test cases
-                similar_tests = self._find_similar_test_cases(req_text, n_results=5)
+                similar_tests = self._find_similar_test_cases(req_text, n_results=5, query_embedding=req_embedding)
                 
                 for test_case in similar_tests:
                     # Only include if similarity is above threshold
@@ -178,11 +191,13 @@ class TraceabilityEngine:
         
         return semantic_links
     
-    def _find_similar_test_cases(self, query_text: str, n_results: int = 5) -> List[Dict]:
+    def _find_similar_test_cases(self, query_text: str, n_results: int = 5, query_embedding=None) -> List[Dict]:
         """Find test cases semantically similar to query text"""
         try:
+            if query_embedding is None:
+                query_embedding = self.encoder.encode([query_text])[0]
             results = self.test_cases_collection.query(
-                query_texts=[query_text],
+                query_embeddings=[query_embedding.tolist()],
                 n_results=n_results,
                 include=['metadatas', 'distances']
             )
@@ -279,7 +294,7 @@ class TraceabilityEngine:
             where_filter = {'project_id': project_id} if project_id else None
             
             results = self.requirements_collection.query(
-                query_texts=[query],
+                query_embeddings=self.encoder.encode([query]).tolist(),
                 n_results=n_results,
                 where=where_filter,
                 include=['metadatas', 'documents', 'distances']
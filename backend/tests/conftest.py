@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Run from anywhere: the app and ml packages live in backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def extraction_analyzer():
+    """SemanticRequirementAnalyzer with patterns and classifiers only (no spaCy or embedding model)"""
+    from ml.pipelines.requirement_analyzer import SemanticRequirementAnalyzer
+
+    analyzer = SemanticRequirementAnalyzer.__new__(SemanticRequirementAnalyzer)
+    analyzer.profile = 'full'
+    analyzer._initialize_patterns()
+    analyzer._initialize_classifiers()
+    return analyzer
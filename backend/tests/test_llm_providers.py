@@ -0,0 +1,29 @@
+import asyncio
+
+from ml.pipelines.llm_providers import LLMProvider
+
+
+class FakeProvider(LLMProvider):
+    name = 'fake'
+
+    async def _generate(self, model, prompt, system, json_output, temperature):
+        return prompt
+
+    async def _stream(self, model, prompt, system, json_output, temperature):
+        for chunk in prompt.split():
+            await asyncio.sleep(0)
+            yield chunk
+
+
+def test_abandoned_stream_does_not_hold_the_concurrency_slot():
+    async def scenario():
+        provider = FakeProvider(concurrency=1, timeout=1.0)
+        # A consumer that reads one chunk and then goes away without closing the stream
+        stream = provider.stream('model', 'one two three')
+        assert await stream.__anext__() == 'one'
+        try:
+            return await asyncio.wait_for(provider.generate('model', 'still served'), 0.5)
+        finally:
+            await stream.aclose()
+
+    assert asyncio.run(scenario()) == 'still served'
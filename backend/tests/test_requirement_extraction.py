@@ -0,0 +1,37 @@
+from ml.pipelines.document_index import DocumentIndex, preprocess_text
+
+BRD = """# Functional Requirements
+REQ-001: The system shall lock the account after three failed logins within one session. See also REQ-001 which the admin can override from the console.
+Priority: High
+FR-002 - The system shall email a reset link to the registered address when the user requests it.
+- REQ-003: Users must be able to export their report as a PDF document for offline review.
+"""
+
+
+def _extract(analyzer, text):
+    text = preprocess_text(text)
+    index = DocumentIndex.build(text)
+    return analyzer._multi_strategy_extraction(text, analyzer._analyze_document_structure(text, index), index)
+
+
+def test_inline_id_reference_stays_in_the_block(extraction_analyzer):
+    formal = extraction_analyzer._extract_formal_requirements(preprocess_text(BRD))
+
+    assert [req['id'] for req in formal] == ['REQ-001', 'FR-002', 'REQ-003']
+    assert 'See also REQ-001 which the admin can override' in formal[0]['text']
+    assert formal[1]['text'].startswith('The system shall email a reset link')
+
+
+def test_pattern_hits_inside_formal_blocks_are_dropped(extraction_analyzer):
+    requirements = _extract(extraction_analyzer, BRD + "\n# Notes\nThe application must keep an audit log for a year.\n"
+                            "The application must keep an audit log for a year.\n")
+
+    formal_spans = [(req['offset'], req['end']) for req in requirements if req['format'] == 'formal']
+    patterns = [req for req in requirements if req['format'] == 'pattern']
+    assert patterns
+    for req in patterns:
+        assert 'REQ-' not in req['text'] and 'FR-' not in req['text']
+        assert all(req['end'] <= start or req['offset'] >= end for start, end in formal_spans)
+    # One hit per sentence, even when it matches several patterns
+    assert len({req['offset'] for req in patterns}) == len(patterns)
+    assert [req['id'] for req in patterns] == [f"PAT-{i:03d}" for i in range(1, len(patterns) + 1)]
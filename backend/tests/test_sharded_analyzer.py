@@ -0,0 +1,92 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from ml.pipelines import sharded_analyzer
+from ml.pipelines.sharded_analyzer import ShardedRequirementAnalyzer, split_into_shards
+
+SECTION = """# {name} Requirements
+REQ-{n}01: The system shall record every {name} change in the audit trail with the acting user.
+REQ-{n}02: The system shall notify the owner by email when a {name} record is rejected.
+
+# {name} Rules
+These rules cover {name} records.
+The application must keep {name} drafts for thirty days before purging them.
+Users should be able to view the {name} list by status and creation date.
+"""
+
+# The last section repeats a rule of the first one, so deduplication has to work across shards
+DOCUMENT = "\n".join(SECTION.format(name=name, n=n) for n, name in enumerate(
+    ['Invoice', 'Payment', 'Customer', 'Supplier'], start=1
+)) + "\n# Misc Rules\nRepeated on purpose.\nThe application must keep Invoice drafts for thirty days before purging them.\nEnd of document.\n"
+
+SMALL_DOCUMENT = """# Overview
+The user will create a project and manage its members from the dashboard.
+
+# Details
+REQ-001: The system shall archive projects that were inactive for a year.
+
+# Notes
+The application must process uploads in the background and show progress.
+"""
+
+
+class FakeEncoder:
+    """Deterministic unit vectors per text: equal texts are duplicates, different ones are not"""
+
+    def encode(self, texts):
+        vectors = []
+        for text in texts:
+            seed = int(hashlib.sha256(" ".join(text.split()).encode()).hexdigest()[:8], 16)
+            vectors.append(np.random.default_rng(seed).standard_normal(64))
+        vectors = np.array(vectors, dtype=np.float32).reshape(len(vectors), 64)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def worker_analyzer(extraction_analyzer, monkeypatch):
+    """The extraction analyzer standing in for every pool worker, with threads instead of processes"""
+    analyzer = extraction_analyzer
+    analyzer.encoder = FakeEncoder()
+    analyzer.dedup_threshold = 0.85
+    analyzer.dedup_block_size = 1024
+    analyzer._analyze_requirements = lambda requirements, start_sequence=0, profile=None: [
+        {'id': req['id'], 'text': req['text'], 'format': req['format']} for req in requirements
+    ]
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(sharded_analyzer, '_worker_analyzer', analyzer)
+    monkeypatch.setattr(sharded_analyzer, '_get_pool', lambda *args: pool)
+    yield analyzer
+    pool.shutdown()
+
+
+def _sharded(text, shard_chars):
+    analyzer = ShardedRequirementAnalyzer(workers=2, shard_chars=shard_chars, embedding_backends={})
+    return [req for chunk in analyzer.iter_requirements(text, chunk_size=3) for req in chunk]
+
+
+def test_sharded_output_matches_single_process(worker_analyzer):
+    assert len(split_into_shards(DOCUMENT, 300)) > 3
+
+    single = [req for chunk in worker_analyzer.iter_requirements(DOCUMENT, chunk_size=3) for req in chunk]
+    sharded = _sharded(DOCUMENT, 300)
+
+    assert sharded == single
+    pattern_ids = [req['id'] for req in sharded if req['format'] == 'pattern']
+    assert pattern_ids == [f"PAT-{i:03d}" for i in range(1, len(pattern_ids) + 1)]
+    assert sum('Invoice drafts' in req['text'] for req in sharded) == 1
+
+
+def test_semantic_fallback_is_decided_for_the_whole_document(worker_analyzer):
+    # Every shard finds fewer than five requirements, the document as a whole does not
+    assert len(split_into_shards(DOCUMENT, 300)) > 1
+    assert not any(req['format'] == 'semantic' for req in _sharded(DOCUMENT, 300))
+
+    # A document with few requirements falls back to semantic extraction, numbered across shards
+    single = [req for chunk in worker_analyzer.iter_requirements(SMALL_DOCUMENT) for req in chunk]
+    sharded = _sharded(SMALL_DOCUMENT, 40)
+    assert len(split_into_shards(SMALL_DOCUMENT, 40)) == 3
+    assert any(req['format'] == 'semantic' for req in single)
+    assert sharded == single
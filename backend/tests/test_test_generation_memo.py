@@ -0,0 +1,70 @@
+import asyncio
+import json
+import sys
+import types
+
+import pytest
+
+# The traceability engine is passed in as a placeholder, so chromadb is only
+# needed for the import of test_generator
+try:
+    import chromadb  # noqa: F401
+except ImportError:
+    sys.modules['chromadb'] = types.ModuleType('chromadb')
+    sys.modules['chromadb.config'] = types.SimpleNamespace(Settings=object)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from ml.pipelines.test_generator import AdvancedTestGenerator, AIConfig
+
+
+def _requirement(req_id, text):
+    return {'id': req_id, 'original_text': text, 'type': 'functional'}
+
+
+async def fake_call_ai(prompt, use_cache=True):
+    """Two cases per requirement and one scenario spanning the whole batch"""
+    batch = json.loads(prompt[prompt.index('['):prompt.index('Generate the complete')].strip())
+    cases = []
+    for req in batch:
+        for test_type in ('positive', 'negative'):
+            cases.append({'id': str(len(cases) + 1), 'requirement_id': str(req['id']),
+                          'name': f"{test_type} {req['text']}", 'test_type': test_type})
+    names = '+'.join(str(req['id']) for req in batch)
+    return {'test_cases': cases,
+            'test_scenarios': [{'name': f"flow {names}", 'test_cases': [case['id'] for case in cases]}]}
+
+
+@pytest.fixture
+def generator():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    generator = AdvancedTestGenerator(db, AIConfig(max_batch_size=10, use_cache=False), traceability_engine=object())
+    generator._call_ai = fake_call_ai
+    yield generator
+    db.close()
+
+
+def test_mixed_memo_hits_keep_their_scenarios(generator):
+    login = _requirement(1, "The system shall lock the account after three failed logins.")
+    reset = _requirement(2, "The system shall email a password reset link.")
+    export = _requirement(3, "Users must be able to export reports as PDF.")
+
+    first = asyncio.run(generator._generate_complete_test_suite_ai([login, reset]))
+    assert [scenario['name'] for scenario in first['test_scenarios']] == ['flow 1+2']
+
+    # A new revision: the first two requirements are memoized, the third one is generated
+    suite = asyncio.run(generator._generate_complete_test_suite_ai([
+        dict(login, id=11), dict(reset, id=12), dict(export, id=13)
+    ]))
+    assert suite['generation_stats']['memoized_requirements'] == 2
+    assert suite['generation_stats']['generated_requirements'] == 1
+
+    case_ids = {case['id']: case['requirement_id'] for case in suite['test_cases']}
+    scenarios = {scenario['name']: scenario['test_cases'] for scenario in suite['test_scenarios']}
+    assert set(scenarios) == {'flow 1+2', 'flow 13'}
+    assert sorted(case_ids[case_id] for case_id in scenarios['flow 1+2']) == [11, 11, 12, 12]
+    assert [case_ids[case_id] for case_id in scenarios['flow 13']] == [13, 13]